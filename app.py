@@ -1,20 +1,19 @@
 import streamlit as st
-import yaml
-import streamlit_authenticator as stauth
+
+from core.auth_config import get_authenticator, load_auth_config
+from core.prewarm import start_prewarmer
 
 # Configuration de la page
 st.set_page_config(page_title="BI+ – Connexion", layout="centered")
 
-# Charger la config d'auth depuis les secrets (YAML embarqué)
-config = yaml.safe_load(st.secrets["auth"]["config"])
+# Charger la config d'auth depuis les secrets (YAML embarqué, parsé une seule fois)
+auth = load_auth_config(st.secrets["auth"]["config"])
+
+# Pré-chargement de nuit des dossiers clients (thread unique par processus)
+start_prewarmer(st.secrets)
 
 # Initialiser l'authenticator
-authenticator = stauth.Authenticate(
-    config["credentials"],
-    config["cookie"]["name"],
-    config["cookie"]["key"],
-    config["cookie"]["expiry_days"]
-)
+authenticator = get_authenticator(auth)
 
 # Interface de connexion
 st.title("🔐 BI+ – Connexion")
@@ -0,0 +1,3 @@
+"""
+Traitements par lots BI+ hors Streamlit (exports de fin d'exercice…).
+"""
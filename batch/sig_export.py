@@ -0,0 +1,257 @@
+"""
+Calcul et export du SIG de tous les dossiers clients, sans navigateur.
+
+Chaque dossier déclaré dans la configuration d'auth (`dropbox_folders`) est
+traité dans un pool de processus : téléchargement du grand livre, lecture
+en flux (core.excel_ingest), SIG N / N-1 (core.datasets.FolderSig), puis
+écriture des résultats du client en Parquet et Excel. Un export consolidé
+(tous dossiers) est produit à la fin.
+
+Le traitement est reprenable : un manifeste (manifest.json) enregistre
+l'état de chaque dossier au fil de l'eau. Un nouveau lancement ne refait que
+les dossiers en échec, jamais traités, ou dont le grand livre a changé.
+
+Usage :
+    python -m batch.sig_export --output exports/sig_2024
+    python -m batch.sig_export --workers 8 --folders /Clients/A /Clients/B
+    python -m batch.sig_export --force          # tout recalculer
+
+Les identifiants Dropbox et la configuration d'auth sont lus dans
+.streamlit/secrets.toml (variables d'environnement DROPBOX_* prioritaires).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from core.auth_config import AuthConfig
+from core.datasets import KEY_POSTES, FolderSig, is_text_fec, ledger_path
+from core.excel_ingest import read_workbook
+from core.fec import download_fec
+from core.storage import get_dropbox_client
+
+DEFAULT_SECRETS = os.path.join(".streamlit", "secrets.toml")
+DROPBOX_KEYS = ("DROPBOX_REFRESH_TOKEN", "DROPBOX_CLIENT_ID", "DROPBOX_CLIENT_SECRET")
+MANIFEST = "manifest.json"
+
+
+def load_secrets(path):
+    with open(path, "rb") as f:
+        secrets = tomllib.load(f)
+    for key in DROPBOX_KEYS:
+        if os.environ.get(key):
+            secrets[key] = os.environ[key]
+    return secrets
+
+
+def folder_slug(folder):
+    return re.sub(r"[^\w.-]+", "_", folder.strip("/")) or "racine"
+
+
+# -------------------------------------------------------
+# Manifeste (reprise)
+# -------------------------------------------------------
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# -------------------------------------------------------
+# Un dossier (exécuté dans un processus du pool)
+# -------------------------------------------------------
+def process_folder(folder, dropbox_secrets, out_dir, previous=None, force=False):
+    """
+    Calcule et écrit le SIG d'un dossier ; renvoie l'entrée de manifeste.
+    """
+    start = time.perf_counter()
+    client_dir = os.path.join(out_dir, "clients", folder_slug(folder))
+    path = ledger_path(folder)
+    try:
+        dbx = get_dropbox_client(dropbox_secrets)
+        rev = dbx.files_get_metadata(path).rev
+        if (
+            not force
+            and previous
+            and previous.get("status") == "done"
+            and previous.get("rev") == rev
+            and os.path.exists(os.path.join(client_dir, "postes.parquet"))
+        ):
+            return dict(previous, status="done", skipped=True)
+
+        if is_text_fec(path):
+            # FEC texte : lu en flux et agrégé au fil de l'eau (lignes = agrégats mensuels)
+            metadata, ledger = download_fec(dbx, path)
+            nbytes = metadata.size
+            folder_sig = FolderSig.from_lines(ledger)
+        else:
+            _, res = dbx.files_download(path)
+            nbytes = len(res.content)
+            ledger = read_workbook(res.content)
+            folder_sig = FolderSig.from_ledger(ledger)
+        nb_lines = len(ledger)
+        if folder_sig.sig is None:
+            raise ValueError("grand livre sans écriture datée")
+
+        os.makedirs(client_dir, exist_ok=True)
+        postes = folder_sig.sig.postes
+        comptes = folder_sig.sig.comptes
+        postes.to_parquet(os.path.join(client_dir, "postes.parquet"), index=False)
+        comptes.to_parquet(os.path.join(client_dir, "comptes.parquet"), index=False)
+        xlsx_tmp = os.path.join(client_dir, "sig.tmp.xlsx")
+        with pd.ExcelWriter(xlsx_tmp, engine="openpyxl") as writer:
+            postes.to_excel(writer, sheet_name="Postes", index=False)
+            comptes.to_excel(writer, sheet_name="Comptes", index=False)
+        os.replace(xlsx_tmp, os.path.join(client_dir, "sig.xlsx"))
+    except Exception as e:
+        return {
+            "status": "failed",
+            "error": f"{type(e).__name__} : {e}",
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+    return {
+        "status": "done",
+        "rev": rev,
+        "annee_n": folder_sig.annee_n,
+        "annee_n_1": folder_sig.annee_n_1,
+        "lines": int(nb_lines),
+        "bytes": int(nbytes),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+# -------------------------------------------------------
+# Export consolidé
+# -------------------------------------------------------
+def consolidate(out_dir, manifest):
+    """
+    Réunit les postes de tous les dossiers terminés (y compris lors de lancements précédents).
+    """
+    parts = []
+    for folder, entry in sorted(manifest.items()):
+        if entry.get("status") != "done":
+            continue
+        postes = pd.read_parquet(os.path.join(out_dir, "clients", folder_slug(folder), "postes.parquet"))
+        postes.insert(0, "dossier", folder)
+        postes.insert(1, "annee_n", entry.get("annee_n"))
+        parts.append(postes)
+    if not parts:
+        return None
+
+    postes = pd.concat(parts, ignore_index=True)
+    synthese = (
+        postes.loc[postes["poste"].isin(KEY_POSTES)]
+        .pivot_table(index="dossier", columns="poste", values="N", aggfunc="sum", sort=False)
+        .reindex(columns=[p for p in KEY_POSTES if p in set(postes["poste"])])
+        .reset_index()
+    )
+    synthese.columns.name = None
+
+    postes.to_parquet(os.path.join(out_dir, "consolide_postes.parquet"), index=False)
+    with pd.ExcelWriter(os.path.join(out_dir, "consolide.xlsx"), engine="openpyxl") as writer:
+        synthese.to_excel(writer, sheet_name="Synthèse", index=False)
+        postes.to_excel(writer, sheet_name="Postes", index=False)
+    return postes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export SIG de tous les dossiers clients")
+    parser.add_argument("--output", default=os.path.join("exports", "sig"), help="répertoire de sortie")
+    parser.add_argument("--secrets", default=DEFAULT_SECRETS, help="fichier secrets.toml")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus en parallèle")
+    parser.add_argument("--folders", nargs="+", default=None, help="dossiers à traiter (défaut : tous)")
+    parser.add_argument("--force", action="store_true", help="recalculer même les dossiers déjà exportés")
+    args = parser.parse_args(argv)
+
+    secrets = load_secrets(args.secrets)
+    dropbox_secrets = {k: secrets[k] for k in DROPBOX_KEYS}
+    folders = args.folders or AuthConfig(secrets["auth"]["config"]).all_folders
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = load_manifest(args.output)
+
+    total = len(folders)
+    done = failed = skipped = 0
+    lines = nbytes = 0
+    start = time.perf_counter()
+    print(f"{total} dossier(s) à traiter avec {args.workers} processus → {args.output}")
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(process_folder, folder, dropbox_secrets, args.output, manifest.get(folder), args.force): folder
+            for folder in folders
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            folder = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                # Processus du pool tué (mémoire...) ou résultat illisible : le dossier
+                # est noté en échec et sera retraité au prochain lancement
+                entry = {
+                    "status": "failed",
+                    "error": f"{type(e).__name__} : {e}",
+                    "finished_at": datetime.now().isoformat(timespec="seconds"),
+                    "seconds": 0.0,
+                }
+            manifest[folder] = entry
+            # Manifeste réécrit à chaque dossier : une interruption ne perd rien
+            save_manifest(args.output, manifest)
+
+            if entry["status"] == "failed":
+                failed += 1
+                state = f"ÉCHEC ({entry['error']})"
+            elif entry.get("skipped"):
+                skipped += 1
+                state = "inchangé"
+            else:
+                done += 1
+                lines += entry["lines"]
+                nbytes += entry["bytes"]
+                state = f"ok {entry['seconds']:.1f}s"
+            elapsed = time.perf_counter() - start
+            rate = i / elapsed if elapsed else 0.0
+            eta = (total - i) / rate if rate else 0.0
+            print(f"[{i}/{total}] {folder} : {state} – {rate:.2f} dossier(s)/s, reste ~{eta:.0f}s", flush=True)
+
+    elapsed = time.perf_counter() - start
+    consolidated = consolidate(args.output, manifest)
+
+    def per_second(n):
+        return n / elapsed if elapsed else 0.0
+
+    lines_rate = f"{per_second(lines):,.0f}".replace(",", " ")
+    print(
+        f"Terminé en {elapsed:.1f}s : {done} calculé(s), {skipped} inchangé(s), {failed} en échec "
+        f"– {per_second(total):.2f} dossier(s)/s, {lines_rate} lignes/s, "
+        f"{per_second(nbytes) / 1e6:.1f} Mo/s"
+    )
+    if consolidated is not None:
+        print(f"Export consolidé : {os.path.join(args.output, 'consolide.xlsx')}")
+    if failed:
+        print("Relancer la même commande pour retraiter uniquement les dossiers en échec.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Benchmarks BI+ (génération de grands livres synthétiques, mesures par étape,
+démarrage à froid des pages).
+"""
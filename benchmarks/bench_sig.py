@@ -0,0 +1,153 @@
+"""
+Benchmark du pipeline SIG à différents volumes.
+
+Pour chaque taille de grand livre synthétique, mesure la durée et le pic
+mémoire (tracemalloc) de chaque étape :
+load (Parquet, et Excel pour les petits volumes : pandas et lecture en
+flux), classify, aggregate, pivot, format, chart.
+
+Usage :
+    python -m benchmarks.bench_sig --sizes 10000 1000000 10000000
+    python -m benchmarks.bench_sig --sizes 10000 --output resultats.json
+
+Les résultats sont écrits en JSON pour comparer les versions entre elles.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.synthetic import make_ledger
+from core.charts import monthly_chart_data, share_chart_data
+from core.cube import SigCube
+from core.excel_ingest import read_workbook
+from core.pcg import PcgClassifier, PCG_TYPES
+from core.sig import SIG_PCG, SigEngine
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+# Au-delà, l'écriture / lecture Excel n'a plus de sens (limite de 1 048 576 lignes)
+EXCEL_MAX_LINES = 100_000
+YEARS = (2023, 2024)
+
+fmt = lambda x: f"{x:,.0f} €".replace(",", " ")
+
+
+def measure(results, stage, fn):
+    """
+    Exécute `fn()` en mesurant durée et pic mémoire ; renvoie son résultat.
+    """
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results[stage] = {"seconds": round(elapsed, 6), "peak_bytes": peak}
+    return out
+
+
+def bench_size(n_lines, n_accounts, tmp_dir):
+    lines_per_month = max(n_lines // (12 * len(YEARS)), 1)
+    ledger = make_ledger(n_accounts=n_accounts, years=YEARS, lines_per_month=lines_per_month)
+    stages = {}
+
+    # Chargement : Parquet (chemin nominal) et Excel (petits volumes seulement)
+    parquet_path = os.path.join(tmp_dir, f"ledger_{n_lines}.parquet")
+    ledger.to_parquet(parquet_path, index=False)
+    df = measure(stages, "load_parquet", lambda: pd.read_parquet(parquet_path, memory_map=True))
+    if len(ledger) <= EXCEL_MAX_LINES:
+        excel_path = os.path.join(tmp_dir, f"ledger_{n_lines}.xlsx")
+        ledger.drop(columns=["periode", "EcritureDate"]).to_excel(excel_path, index=False)
+        measure(stages, "load_excel", lambda: pd.read_excel(excel_path))
+        with open(excel_path, "rb") as f:
+            content = f.read()
+        measure(stages, "load_excel_stream", lambda: read_workbook(content))
+    del ledger
+
+    classifier = PcgClassifier(PCG_TYPES)
+    types = measure(stages, "classify", lambda: classifier.classify(df["compte"])["type"])
+    df["type"] = types.to_numpy()
+    df["libelle"] = df["compte"]
+
+    cube = measure(stages, "aggregate", lambda: SigCube.from_lines(df))
+
+    engine = SigEngine(SIG_PCG)
+    sig = measure(stages, "pivot", lambda: engine.compute(cube.flat(), YEARS[-1], YEARS[0]))
+
+    def format_tables():
+        table = sig.comptes.copy()
+        for col in ["N", "N_1", "Var"]:
+            table[col] = table[col].map(fmt)
+        table["Var_%"] = table["Var_%"].map(lambda v: f"{v:.1f} %")
+        return table
+
+    measure(stages, "format", format_tables)
+
+    def chart_prep():
+        mensuel = sig.monthly("Ventes de marchandises")
+        return monthly_chart_data(mensuel), share_chart_data(mensuel)
+
+    measure(stages, "chart", chart_prep)
+
+    return {
+        "lines": int(len(df)),
+        "accounts": int(df["compte"].nunique()),
+        "cube_cells": int(len(cube.cells)),
+        "stages": stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 6),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline SIG")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="nombres de lignes")
+    parser.add_argument("--accounts", type=int, default=2000, help="nombre de comptes distincts")
+    parser.add_argument("--output", default=None, help="fichier JSON de sortie")
+    args = parser.parse_args(argv)
+
+    report = {
+        "benchmark": "sig_pipeline",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            run = bench_size(size, args.accounts, tmp_dir)
+            report["runs"].append(run)
+            print(
+                f"{run['lines']:>12,} lignes  "
+                + "  ".join(f"{k}={v['seconds']:.3f}s" for k, v in run["stages"].items())
+            )
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"bench_sig_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
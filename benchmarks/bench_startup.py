@@ -0,0 +1,230 @@
+"""
+Benchmark du démarrage à froid : temps d'import et mémoire par page.
+
+Chaque page (app.py puis pages/*.py) est mesurée dans un interpréteur neuf :
+seules ses instructions `import` de premier niveau sont exécutées, ce qui
+correspond au coût payé au premier affichage de la page après un démarrage
+de conteneur. Pour chaque page : durée des imports (médiane sur --repeat
+lancements), RSS maximal du processus, surcoût RSS par rapport à un
+interpréteur vide, et dépendances lourdes effectivement chargées.
+
+La page de connexion est en plus exécutée en entier (`AppTest`, secrets
+d'auth synthétiques, pré-chargement désactivé) : les imports différés dans
+des fonctions appelées à chaque affichage (ex. streamlit-authenticator dans
+`get_authenticator`) sont ainsi comptés. Le temps d'import de Streamlit et
+de son outillage de test est exclu de la mesure.
+
+Usage :
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget-ms 800 --output startup.json
+
+Avec --budget-ms, le code de sortie vaut 1 si l'affichage complet de la page
+de connexion (app.py) dépasse le budget : utilisable en CI après un
+changement de dépendances.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIN_PAGE = "app.py"
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "altair",
+    "dropbox",
+    "openpyxl",
+    "streamlit_authenticator",
+]
+
+# Exécuté dans un interpréteur neuf : imports de premier niveau de la page
+_PROBE = r"""
+import ast, json, resource, sys, time
+
+def rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+path, heavy = sys.argv[1], sys.argv[2].split(",")
+nodes = []
+if path:
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+
+missing = []
+start = time.perf_counter()
+for node in nodes:
+    try:
+        exec(compile(ast.Module([node], []), path, "exec"), {})
+    except ImportError as e:
+        missing.append(e.name or str(e))
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_mb": rss_mb(),
+    "heavy_loaded": [m for m in heavy if m in sys.modules],
+    "missing": missing,
+}))
+"""
+
+# Exécuté dans un interpréteur neuf : affichage complet de la page via AppTest
+_RENDER_PROBE = r"""
+import json, os, resource, sys, time
+
+def rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+os.environ["BI_PLUS_PREWARM"] = "0"
+path, heavy, secrets = sys.argv[1], sys.argv[2].split(","), json.loads(sys.argv[3])
+from streamlit.testing.v1 import AppTest
+
+before = set(sys.modules)
+rss_before = rss_mb()
+at = AppTest.from_file(path, default_timeout=120)
+for section, values in secrets.items():
+    at.secrets[section] = values
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "render_ms": elapsed * 1000,
+    "rss_mb": rss_mb(),
+    "rss_delta_mb": rss_mb() - rss_before,
+    "heavy_loaded": [m for m in heavy if m in sys.modules and m not in before],
+    "exceptions": [e.message for e in at.exception],
+}))
+"""
+
+# Secrets minimaux pour afficher le formulaire de connexion (aucun appel réseau)
+_LOGIN_SECRETS = {
+    "auth": {
+        "config": (
+            "credentials:\n"
+            "  usernames:\n"
+            "    bench: {name: Bench, email: bench@example.com, password: x, role: viewer, dropbox_folders: []}\n"
+            "cookie: {name: bench, key: bench, expiry_days: 1}\n"
+        )
+    }
+}
+
+
+def _run(args):
+    out = subprocess.run(
+        [sys.executable, "-c", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Streamlit peut journaliser sur stdout : le résultat est la dernière ligne
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def probe(path, repeat):
+    runs = [_run([_PROBE, path, ",".join(HEAVY_MODULES)]) for _ in range(repeat)]
+    return {
+        "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+        "rss_mb": round(statistics.median(r["rss_mb"] for r in runs), 1),
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "missing": runs[-1]["missing"],
+    }
+
+
+def probe_render(path, repeat):
+    """
+    Affichage complet de `path` ; None si Streamlit n'est pas installé.
+    """
+    try:
+        runs = [
+            _run([_RENDER_PROBE, path, ",".join(HEAVY_MODULES), json.dumps(_LOGIN_SECRETS)])
+            for _ in range(repeat)
+        ]
+    except subprocess.CalledProcessError as e:
+        if "No module named 'streamlit'" in (e.stderr or ""):
+            return None
+        raise
+    return {
+        "render_ms": round(statistics.median(r["render_ms"] for r in runs), 1),
+        "rss_delta_mb": round(statistics.median(r["rss_delta_mb"] for r in runs), 1),
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "exceptions": runs[-1]["exceptions"],
+    }
+
+
+def pages():
+    return [LOGIN_PAGE] + sorted(
+        os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py"))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps d'import et mémoire par page au démarrage à froid")
+    parser.add_argument("--repeat", type=int, default=3, help="lancements par page (médiane)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="budget d'import de la page de connexion")
+    parser.add_argument("--output", default=None, help="fichier JSON de sortie")
+    args = parser.parse_args(argv)
+
+    baseline = probe("", args.repeat)
+    report = {
+        "benchmark": "startup",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "baseline_rss_mb": baseline["rss_mb"],
+        "pages": {},
+    }
+    print(f"Interpréteur vide : {baseline['rss_mb']:.1f} Mo")
+    for page in pages():
+        result = probe(page, args.repeat)
+        result["rss_delta_mb"] = round(result["rss_mb"] - baseline["rss_mb"], 1)
+        report["pages"][page] = result
+        note = f"  (absents : {', '.join(result['missing'])})" if result["missing"] else ""
+        print(
+            f"{page:<32} {result['import_ms']:>8.1f} ms  {result['rss_mb']:>7.1f} Mo "
+            f"(+{result['rss_delta_mb']:.1f})  {', '.join(result['heavy_loaded']) or '-'}{note}"
+        )
+
+    render = probe_render(LOGIN_PAGE, args.repeat)
+    report["login_render"] = render
+    if render is None:
+        print("Affichage complet de la page de connexion non mesuré (Streamlit absent).")
+    else:
+        note = f"  (exceptions : {'; '.join(render['exceptions'])})" if render["exceptions"] else ""
+        print(
+            f"{LOGIN_PAGE + ' (affichage complet)':<32} {render['render_ms']:>8.1f} ms  "
+            f"(+{render['rss_delta_mb']:.1f} Mo)  {', '.join(render['heavy_loaded']) or '-'}{note}"
+        )
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"bench_startup_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+    if args.budget_ms is not None:
+        if render is not None:
+            login_ms = render["render_ms"]
+        else:
+            login_ms = report["pages"][LOGIN_PAGE]["import_ms"]
+        if login_ms > args.budget_ms:
+            print(f"Budget dépassé pour {LOGIN_PAGE} : {login_ms:.1f} ms > {args.budget_ms:.0f} ms")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
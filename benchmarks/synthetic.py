@@ -0,0 +1,93 @@
+"""
+Générateur de grands livres synthétiques pour les benchmarks.
+
+Les écritures reprennent le format long de `make_sample_sig` (annee, mois,
+periode, compte, montant) enrichi des colonnes FEC utiles au visualiseur
+(JournalCode, EcritureDate, EcritureLib). La saisonnalité mensuelle suit les
+mêmes poids sinusoïdaux que les données de démonstration.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Racines PCG et journal associé pour les comptes générés
+ACCOUNT_ROOTS = [
+    ("707", "VE"), ("706", "VE"), ("701", "VE"),
+    ("607", "AC"), ("601", "AC"), ("6037", "OD"), ("6031", "OD"),
+    ("613", "AC"), ("622", "AC"), ("626", "AC"),
+    ("635", "OD"), ("641", "OD"), ("645", "OD"),
+    ("661", "BQ"), ("681", "OD"), ("761", "BQ"),
+]
+
+
+def base_weights():
+    """
+    Poids mensuels (somme = 1) identiques à ceux de make_sample_sig.
+    """
+    months = np.arange(1, 13)
+    weights = 1 + 0.3 * np.sin(2 * np.pi * (months - 1) / 12)
+    return weights / weights.sum()
+
+
+def make_accounts(n_accounts, seed=0):
+    """
+    `n_accounts` numéros de compte PCG distincts (8 chiffres) répartis sur ACCOUNT_ROOTS.
+    """
+    rng = np.random.default_rng(seed)
+    roots = rng.integers(0, len(ACCOUNT_ROOTS), n_accounts)
+    comptes, journaux = [], []
+    seen = set()
+    for i, r in enumerate(roots):
+        root, journal = ACCOUNT_ROOTS[r]
+        compte = (root + str(i).zfill(8 - len(root)))[:8]
+        while compte in seen:
+            compte = root + str(rng.integers(0, 10 ** (8 - len(root)))).zfill(8 - len(root))
+        seen.add(compte)
+        comptes.append(compte)
+        journaux.append(journal)
+    return pd.DataFrame({"compte": comptes, "journal": journaux})
+
+
+def make_ledger(n_accounts=500, years=(2023, 2024), lines_per_month=1000, seed=0):
+    """
+    Grand livre synthétique de `len(years) * 12 * lines_per_month` lignes.
+
+    Les comptes suivent une loi de Zipf (quelques comptes très mouvementés),
+    les montants une loi log-normale modulée par la saisonnalité mensuelle.
+    """
+    rng = np.random.default_rng(seed)
+    accounts = make_accounts(n_accounts, seed)
+
+    n_months = len(years) * 12
+    n = n_months * lines_per_month
+    month_index = np.repeat(np.arange(n_months), lines_per_month)
+    annee = np.asarray(years, dtype=np.int16)[month_index // 12]
+    mois = (month_index % 12 + 1).astype(np.int8)
+
+    ranks = np.arange(1, n_accounts + 1, dtype=np.float64)
+    probs = (1 / ranks) / (1 / ranks).sum()
+    acc_idx = rng.choice(n_accounts, size=n, p=probs)
+
+    seasonal = (base_weights() * 12)[mois - 1]
+    montant = np.round(rng.lognormal(mean=5.0, sigma=1.2, size=n) * seasonal, 2)
+
+    day = rng.integers(1, 29, size=n)
+    dates = pd.to_datetime({"year": annee, "month": mois, "day": day})
+
+    comptes = pd.Categorical.from_codes(acc_idx, categories=accounts["compte"])
+    journaux = pd.Categorical.from_codes(
+        pd.Categorical(accounts["journal"]).codes[acc_idx],
+        categories=pd.Categorical(accounts["journal"]).categories,
+    )
+    return pd.DataFrame(
+        {
+            "annee": annee,
+            "mois": mois,
+            "periode": dates.dt.to_period("M").dt.to_timestamp(),
+            "compte": comptes,
+            "montant": montant,
+            "JournalCode": journaux,
+            "EcritureDate": dates,
+            "EcritureLib": pd.Categorical.from_codes(acc_idx % 50, categories=[f"Libellé {i}" for i in range(50)]),
+        }
+    )
@@ -0,0 +1,6 @@
+"""
+Briques partagées de BI+ (accès Dropbox, caches, calculs SIG).
+
+Les modules de ce paquet n'importent pas Streamlit : ils sont utilisables
+depuis les pages comme depuis des scripts en ligne de commande.
+"""
@@ -0,0 +1,181 @@
+"""
+Index disque par compte pour descendre jusqu'aux écritures.
+
+À l'ingestion, les écritures sont réécrites en Parquet triées par (compte,
+date), par groupes de lignes de taille fixe, accompagnées d'une table
+d'offsets compte -> [début, fin[ de lignes. Ouvrir les écritures d'un compte
+(ou d'une racine de compte, ex. 7071) revient à :
+- trouver la plage de lignes par `searchsorted` dans la table d'offsets ;
+- lire uniquement les groupes de lignes Parquet qui la recouvrent ;
+- filtrer la période puis paginer sur cette tranche.
+
+Le coût dépend du nombre d'écritures du compte, pas de la taille du FEC.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.ledger_view import COMPTE_CANDIDATES, DATE_CANDIDATES, _find_column, _to_datetime
+
+ROW_GROUP_SIZE = 64 * 1024
+DEFAULT_PAGE_SIZE = 100
+COMPTE_COLUMN = "compte"
+DATE_COLUMN = "date"
+
+
+def index_paths(stem):
+    """
+    (écritures triées, table d'offsets) pour un préfixe de fichier.
+    """
+    return stem + ".comptes.parquet", stem + ".offsets.parquet"
+
+
+def frame_fingerprint(df):
+    """
+    Empreinte du contenu de `df` (valeurs, colonnes, index), pour nommer un
+    index construit hors de toute révision Dropbox.
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update("|".join(f"{c}:{t}" for c, t in df.dtypes.items()).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_account_index(df, stem, row_group_size=ROW_GROUP_SIZE):
+    """
+    Écrit l'index par compte de `df` ; renvoie False si aucune colonne compte n'est reconnue.
+
+    Les colonnes d'origine sont conservées ; `compte` (texte normalisé) et
+    `date` (datetime) sont ajoutées pour le tri et le filtrage.
+    """
+    compte_col = _find_column(df, COMPTE_CANDIDATES)
+    if compte_col is None:
+        return False
+    date_col = _find_column(df, DATE_CANDIDATES)
+
+    comptes = df[compte_col].astype("string").fillna("").str.strip()
+    data = df.drop(columns=[c for c in (COMPTE_COLUMN, DATE_COLUMN) if c in df.columns])
+    data.insert(0, COMPTE_COLUMN, comptes.to_numpy(dtype=object).astype(str))
+    dates = _to_datetime(df[date_col]) if date_col is not None else pd.Series(pd.NaT, index=df.index)
+    data.insert(1, DATE_COLUMN, dates.to_numpy(dtype="datetime64[ns]"))
+    data = data.sort_values([COMPTE_COLUMN, DATE_COLUMN], kind="stable", ignore_index=True)
+
+    values = data[COMPTE_COLUMN].to_numpy()
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]]) if len(values) else np.empty(0, dtype=np.int64)
+    offsets = pd.DataFrame(
+        {
+            COMPTE_COLUMN: values[starts],
+            "start": starts.astype(np.int64),
+            "stop": np.r_[starts[1:], len(values)].astype(np.int64),
+        }
+    )
+
+    # Import local : core.columnar construit l'index à l'ingestion
+    from core.columnar import write_parquet_atomic
+
+    entries_path, offsets_path = index_paths(stem)
+    # Table d'offsets écrite en dernier : sa présence signale un index complet
+    write_parquet_atomic(data, entries_path, row_group_size=row_group_size)
+    write_parquet_atomic(offsets, offsets_path)
+    return True
+
+
+class AccountIndex:
+    """
+    Lecture paginée des écritures d'un compte depuis l'index disque.
+    """
+
+    def __init__(self, stem):
+        import pyarrow.parquet as pq
+
+        entries_path, offsets_path = index_paths(stem)
+        offsets = pd.read_parquet(offsets_path)
+        self.comptes = offsets[COMPTE_COLUMN].to_numpy().astype(str)
+        self._starts = offsets["start"].to_numpy()
+        self._stops = offsets["stop"].to_numpy()
+        self._file = pq.ParquetFile(entries_path, memory_map=True)
+        self.columns = [c for c in self._file.schema_arrow.names if c not in (COMPTE_COLUMN, DATE_COLUMN)]
+        # Première ligne de chaque groupe de lignes (+ total) pour localiser une plage
+        sizes = [self._file.metadata.row_group(i).num_rows for i in range(self._file.num_row_groups)]
+        self._group_bounds = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+        self._lock = threading.Lock()
+
+    def rows(self, compte):
+        """
+        Plage [début, fin[ des lignes des comptes commençant par `compte`.
+        """
+        prefix = str(compte).strip()
+        lo = np.searchsorted(self.comptes, prefix, side="left")
+        hi = np.searchsorted(self.comptes, prefix + "\U0010ffff", side="left")
+        if lo >= hi:
+            return 0, 0
+        return int(self._starts[lo]), int(self._stops[hi - 1])
+
+    def _read_rows(self, start, stop, columns):
+        first = int(np.searchsorted(self._group_bounds, start, side="right")) - 1
+        last = int(np.searchsorted(self._group_bounds, stop, side="left"))
+        groups = list(range(first, last))
+        # ParquetFile n'est pas sûr entre threads : lectures sérialisées
+        with self._lock:
+            table = self._file.read_row_groups(groups, columns=columns)
+        offset = start - int(self._group_bounds[first])
+        return table.slice(offset, stop - start).to_pandas()
+
+    def _empty(self, columns):
+        return self._file.schema_arrow.empty_table().select(columns).to_pandas()
+
+    def entries(self, compte, date_start=None, date_end=None, page=1, page_size=DEFAULT_PAGE_SIZE, columns=None):
+        """
+        (écritures de la page, nombre total) pour `compte` sur la période [date_start, date_end].
+
+        Seuls les groupes de lignes couvrant le compte sont lus sur disque.
+        """
+        start, stop = self.rows(compte)
+        wanted = [COMPTE_COLUMN, DATE_COLUMN] + list(columns or self.columns)
+        if start == stop:
+            return self._empty(wanted), 0
+
+        dates = self._read_rows(start, stop, [DATE_COLUMN])[DATE_COLUMN].to_numpy()
+        mask = np.ones(len(dates), dtype=bool)
+        if date_start is not None:
+            mask &= dates >= np.datetime64(pd.Timestamp(date_start), "ns")
+        if date_end is not None:
+            mask &= dates <= np.datetime64(pd.Timestamp(date_end), "ns")
+        positions = np.flatnonzero(mask)
+        total = len(positions)
+
+        page_positions = positions[(max(page, 1) - 1) * page_size:][:page_size]
+        if not len(page_positions):
+            return self._empty(wanted), total
+        # Relecture limitée aux lignes de la page (toutes colonnes demandées)
+        lo, hi = start + int(page_positions[0]), start + int(page_positions[-1]) + 1
+        chunk = self._read_rows(lo, hi, wanted)
+        return chunk.iloc[page_positions - page_positions[0]].reset_index(drop=True), total
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_OPEN_INDEXES = 16
+
+
+def open_account_index(stem):
+    """
+    AccountIndex partagé pour ce préfixe de fichier, ou None s'il n'a pas été construit.
+    """
+    with _indexes_lock:
+        index = _indexes.get(stem)
+        if index is not None:
+            _indexes.move_to_end(stem)
+            return index
+    if not os.path.exists(index_paths(stem)[1]):
+        return None
+    index = AccountIndex(stem)
+    with _indexes_lock:
+        _indexes[stem] = index
+        while len(_indexes) > MAX_OPEN_INDEXES:
+            _indexes.popitem(last=False)
+    return index
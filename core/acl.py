@@ -0,0 +1,156 @@
+"""
+Contrôle d'accès aux dossiers Dropbox.
+
+Les dossiers autorisés (`dropbox_folders`) sont compilés au chargement de la
+configuration en un trie de segments de chemin ; chaque nœud qui correspond
+à un dossier configuré porte l'ensemble des utilisateurs autorisés. Vérifier
+un chemin revient à descendre le trie segment par segment : le coût dépend
+de la profondeur du chemin, pas du nombre d'utilisateurs ni de dossiers.
+
+Les pages n'utilisent pas le client Dropbox directement mais un
+`GuardedDropbox` : seules les méthodes listées sont exposées, chaque appel
+vérifie son chemin, et les décisions sont mémorisées pour la session.
+"""
+
+
+class AccessDenied(PermissionError):
+    """Chemin Dropbox hors des dossiers autorisés pour l'utilisateur."""
+
+    def __init__(self, username, path):
+        super().__init__(f"Accès refusé à {path!r} pour {username!r}.")
+        self.username = username
+        self.path = path
+
+
+def split_path(path):
+    """
+    Segments normalisés d'un chemin Dropbox (insensible à la casse), ou None
+    si le chemin remonte (`..`) et ne peut donc pas être contrôlé par préfixe.
+    """
+    segments = [s for s in str(path).strip().lower().split("/") if s and s != "."]
+    if ".." in segments:
+        return None
+    return segments
+
+
+class FolderTrie:
+    """
+    Trie des dossiers configurés ; chaque nœud terminal porte ses utilisateurs.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        # Nœud : [enfants {segment: nœud}, utilisateurs autorisés ou None]
+        self.root = [{}, None]
+
+    @classmethod
+    def from_folders(cls, folder_users):
+        trie = cls()
+        for folder, usernames in folder_users.items():
+            trie.add(folder, usernames)
+        return trie
+
+    def add(self, folder, usernames):
+        segments = split_path(folder)
+        if not segments:
+            # Racine ou chemin invalide : jamais accordé implicitement
+            return
+        node = self.root
+        for segment in segments:
+            node = node[0].setdefault(segment, [{}, None])
+        if node[1] is None:
+            node[1] = set()
+        node[1].update(usernames)
+
+    def allows(self, path, username, any_user=False):
+        """
+        True si `path` est dans (ou égal à) un dossier autorisé pour `username`.
+
+        `any_user` : accepte tout dossier configuré (administrateur).
+        """
+        segments = split_path(path)
+        if segments is None:
+            return False
+        node = self.root
+        for segment in segments:
+            node = node[0].get(segment)
+            if node is None:
+                return False
+            users = node[1]
+            if users is not None and (any_user or username in users):
+                return True
+        return False
+
+
+def _path_argument(position, keyword):
+    """
+    Extracteur du chemin passé en argument positionnel `position` ou nommé `keyword`.
+    """
+
+    def extract(args, kwargs):
+        return args[position] if len(args) > position else kwargs.get(keyword)
+
+    return extract
+
+
+# Seules méthodes Dropbox utilisées par les pages, avec l'extraction de leurs chemins.
+# Toute autre méthode (sessions d'upload, appels par lot, curseurs, sharing_*...)
+# est refusée : un chemin qui n'est pas extrait ne peut pas être contrôlé.
+_ALLOWED_METHODS = {
+    "files_get_metadata": (_path_argument(0, "path"),),
+    "files_download": (_path_argument(0, "path"),),
+    "files_upload": (_path_argument(1, "path"),),
+}
+
+
+class GuardedDropbox:
+    """
+    Client Dropbox restreint aux dossiers d'un utilisateur.
+
+    Seules les méthodes de `_ALLOWED_METHODS` sont exposées ; `memo` : dict de
+    session mémorisant les décisions par chemin.
+    """
+
+    def __init__(self, dbx, auth, username, memo=None):
+        self._dbx = dbx
+        self._auth = auth
+        self._username = username
+        self._memo = {} if memo is None else memo
+
+    def check(self, path):
+        if not isinstance(path, str):
+            raise AccessDenied(self._username, path)
+        allowed = self._memo.get(path)
+        if allowed is None:
+            allowed = self._memo[path] = self._auth.can_access(self._username, path)
+        if not allowed:
+            raise AccessDenied(self._username, path)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            # Protocoles Python (copy, pickle, hasattr...) : comportement normal
+            raise AttributeError(name)
+        extractors = _ALLOWED_METHODS.get(name)
+        if extractors is None:
+            raise AccessDenied(self._username, f"<méthode {name}>")
+        method = getattr(self._dbx, name)
+
+        def guarded(*args, **kwargs):
+            for extract in extractors:
+                self.check(extract(args, kwargs))
+            return method(*args, **kwargs)
+
+        return guarded
+
+
+def guarded_client(dbx, auth, username, session_state):
+    """
+    `GuardedDropbox` pour l'utilisateur courant, avec mémo des décisions
+    conservé dans la session (réinitialisé si la config ou l'utilisateur change).
+    """
+    key = (auth.digest, username)
+    memo = session_state.get("acl_memo")
+    if memo is None or memo["key"] != key:
+        memo = session_state["acl_memo"] = {"key": key, "decisions": {}}
+    return GuardedDropbox(dbx, auth, username, memo["decisions"])
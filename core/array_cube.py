@@ -0,0 +1,139 @@
+"""
+Cube dense NumPy années × 12 mois × comptes.
+
+Le cube stocke les montants sur un axe temporel continu (mois 0 = janvier
+de la première année) et leurs sommes cumulées : le total de n'importe quelle
+fenêtre de mois (exercice, exercice décalé, 12 mois glissants, cumul à date)
+s'obtient par une simple différence de deux lignes, sans re-pivoter de
+DataFrame. Les exercices non calendaires ne sont qu'une autre fenêtre sur
+le même axe.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ArrayCube:
+    """
+    Montants (années × 12 × comptes) + index année / compte.
+    """
+
+    def __init__(self, values, years, comptes):
+        # values : ndarray (len(years), 12, len(comptes))
+        self.values = values
+        self.years = list(years)
+        self.comptes = pd.Index(comptes)
+        self.year_index = {y: i for i, y in enumerate(self.years)}
+        self.first_year = self.years[0] if self.years else 0
+
+        n_months = len(self.years) * 12
+        self.flat = values.reshape(n_months, len(self.comptes))
+        self.cumsum = np.zeros((n_months + 1, len(self.comptes)))
+        np.cumsum(self.flat, axis=0, out=self.cumsum[1:])
+
+    @classmethod
+    def from_lines(cls, df):
+        """
+        Construit le cube à partir d'écritures ou de cellules (annee, mois, compte, montant).
+        """
+        years_present = np.unique(df["annee"].to_numpy())
+        # Axe des années continu, même si une année n'a aucune écriture
+        years = list(range(int(years_present.min()), int(years_present.max()) + 1)) if len(years_present) else []
+        codes, comptes = pd.factorize(df["compte"].astype(str), sort=True)
+
+        values = np.zeros((len(years), 12, len(comptes)))
+        if len(years):
+            y = df["annee"].to_numpy().astype(np.int64) - years[0]
+            m = df["mois"].to_numpy().astype(np.int64) - 1
+            np.add.at(values, (y, m, codes), df["montant"].to_numpy(dtype=np.float64))
+        return cls(values, years, comptes)
+
+    @classmethod
+    def from_cube(cls, cube):
+        """
+        Construit le cube dense depuis un SigCube (cellules déjà agrégées).
+        """
+        return cls.from_lines(cube.cells.reset_index())
+
+    # -------------------------------------------------------
+    # Fenêtres de mois sur l'axe continu : (début inclus, fin exclue)
+    # -------------------------------------------------------
+    def month_index(self, year, month):
+        return (year - self.first_year) * 12 + (month - 1)
+
+    def fiscal_window(self, year, start_month=1):
+        """
+        Exercice désigné par son année de clôture (ex. 2024 avec début en juillet = 07/2023 → 06/2024).
+        """
+        end = self.month_index(year, start_month) + (12 if start_month == 1 else 0)
+        return end - 12, end
+
+    def ytd_window(self, year, month, start_month=1):
+        """
+        Cumul depuis le début de l'exercice jusqu'au mois `month` de l'année `year` inclus.
+        """
+        end = self.month_index(year, month) + 1
+        start = self.month_index(year, start_month)
+        if start >= end:
+            start -= 12
+        return start, end
+
+    def rolling_window(self, year, month, length=12):
+        """
+        `length` mois glissants se terminant au mois `month` de l'année `year` inclus.
+        """
+        end = self.month_index(year, month) + 1
+        return end - length, end
+
+    @staticmethod
+    def shift(window, years):
+        """
+        Même fenêtre décalée de `years` années (N-k : years = -k).
+        """
+        return window[0] + 12 * years, window[1] + 12 * years
+
+    def _clip(self, t):
+        return min(max(t, 0), len(self.flat))
+
+    # -------------------------------------------------------
+    # Lectures
+    # -------------------------------------------------------
+    def total(self, window):
+        """
+        Total par compte sur la fenêtre (vecteur de longueur nb comptes), en O(comptes).
+        """
+        start, end = self._clip(window[0]), self._clip(window[1])
+        return self.cumsum[end] - self.cumsum[start]
+
+    def monthly(self, window):
+        """
+        Montants mensuels (mois de la fenêtre × comptes) ; mois hors cube à zéro.
+        """
+        start, end = window
+        out = np.zeros((end - start, len(self.comptes)))
+        lo, hi = self._clip(start), self._clip(end)
+        if hi > lo:
+            out[lo - start:hi - start] = self.flat[lo:hi]
+        return out
+
+    def periods(self, window):
+        """
+        Premiers jours des mois de la fenêtre (DatetimeIndex).
+        """
+        start, end = window
+        t = np.arange(start, end)
+        years = self.first_year + t // 12
+        months = t % 12 + 1
+        return pd.to_datetime({"year": years, "month": months, "day": 1})
+
+    def trend(self, years, start_month=1):
+        """
+        Totaux par exercice (len(years) × comptes) pour les tendances pluriannuelles.
+        """
+        return np.vstack([self.total(self.fiscal_window(y, start_month)) for y in years])
+
+    def accounts(self, comptes):
+        """
+        Positions des comptes demandés dans l'axe comptes (-1 si absent).
+        """
+        return self.comptes.get_indexer(pd.Index(comptes).astype(str))
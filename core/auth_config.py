@@ -0,0 +1,115 @@
+"""
+Configuration d'authentification (utilisateurs, rôles, dossiers) mise en cache.
+
+Le YAML embarqué dans `st.secrets["auth"]["config"]` n'est parsé qu'une fois
+par contenu : l'empreinte SHA-256 du texte sert de clé, si bien que le cache
+n'est invalidé que lorsque le secret change. Les index utiles aux pages
+(utilisateur -> rôle / dossiers, ensemble des dossiers, dossier -> utilisateurs)
+sont construits au chargement.
+"""
+
+import copy
+import hashlib
+import threading
+
+import yaml
+
+from core.acl import FolderTrie
+
+
+class AuthConfig:
+    """
+    Config d'auth parsée + index par utilisateur et par dossier.
+    """
+
+    def __init__(self, raw_yaml):
+        self.digest = hashlib.sha256(raw_yaml.encode("utf-8")).hexdigest()
+        self.config = yaml.safe_load(raw_yaml)
+        self._build_indexes()
+
+    def _build_indexes(self):
+        users = self.config["credentials"]["usernames"]
+        self.roles = {}
+        self.user_folders = {}
+        self.folder_users = {}
+        for username, info in users.items():
+            self.roles[username] = info.get("role", "viewer")
+            folders = list(info.get("dropbox_folders", []))
+            self.user_folders[username] = folders
+            for folder in folders:
+                self.folder_users.setdefault(folder, []).append(username)
+        self.all_folders = sorted(self.folder_users)
+        self.acl = FolderTrie.from_folders(self.folder_users)
+
+    # -------------------------------------------------------
+    # Accès
+    # -------------------------------------------------------
+    @property
+    def users(self):
+        return self.config["credentials"]["usernames"]
+
+    def has_user(self, username):
+        return username in self.roles
+
+    def role(self, username):
+        return self.roles.get(username, "viewer")
+
+    def folders_for(self, username):
+        """
+        Dossiers accessibles : tous pour un admin, sinon ceux de l'utilisateur.
+        """
+        if self.role(username) == "admin":
+            return self.all_folders
+        return self.user_folders.get(username, [])
+
+    def can_access(self, username, path):
+        """
+        Le chemin Dropbox est-il dans un dossier autorisé ? (admin : tout dossier configuré)
+        """
+        return self.acl.allows(path, username, any_user=self.role(username) == "admin")
+
+    def users_of(self, folder):
+        return self.folder_users.get(folder, [])
+
+    def copy_config(self):
+        """
+        Copie modifiable de la config (stauth et la page admin la modifient en place).
+        """
+        return copy.deepcopy(self.config)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_auth_config(raw_yaml):
+    """
+    AuthConfig partagée pour ce contenu de secret (reparsé seulement s'il change).
+    """
+    digest = hashlib.sha256(raw_yaml.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        auth = _cache.get(digest)
+        if auth is None:
+            auth = AuthConfig(raw_yaml)
+            # Une seule version active : l'ancienne config est oubliée
+            _cache.clear()
+            _cache[digest] = auth
+        return auth
+
+
+def get_authenticator(auth):
+    """
+    Instancie `stauth.Authenticate` sur une copie des credentials mis en cache.
+
+    L'objet est recréé à chaque rerun car son composant cookie doit être
+    rendu dans la page ; seul le parsing YAML est évité.
+    """
+    import streamlit_authenticator as stauth
+
+    config = auth.copy_config()
+    return stauth.Authenticate(
+        config["credentials"],
+        config["cookie"]["name"],
+        config["cookie"]["key"],
+        config["cookie"]["expiry_days"]
+    )
@@ -0,0 +1,153 @@
+"""
+Données et spécifications des graphiques Altair, bornées en taille.
+
+Vega-Lite embarque toutes les données source dans la spec envoyée au
+navigateur. Ce module pré-agrège donc toujours au grain exact du graphique,
+limite le nombre de séries (top N comptes + « autres ») et de points
+(derniers mois), puis met en cache la spec sérialisée par version du jeu
+de données : un rerun sans changement de données la réutilise telle quelle.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+MAX_SERIES = 8
+MAX_POINTS = 36  # mois par série
+OTHERS_LABEL = "autres"
+
+
+def top_n_with_others(df, series_col, value_col, keys, n=MAX_SERIES, other_label=OTHERS_LABEL):
+    """
+    Garde les `n` séries au plus fort montant absolu et regroupe le reste en « autres ».
+
+    `keys` : colonnes du grain final (hors `series_col`) sur lesquelles ré-agréger.
+    """
+    weights = df.groupby(series_col, observed=True)[value_col].sum().abs()
+    if len(weights) <= n:
+        return df
+    keep = weights.nlargest(n).index
+    df = df.copy()
+    df[series_col] = df[series_col].astype(object).where(df[series_col].isin(keep), other_label)
+    return df.groupby(keys + [series_col], observed=True, sort=False)[value_col].sum().reset_index()
+
+
+def monthly_chart_data(mensuel, by_compte=True, max_series=MAX_SERIES, max_points=MAX_POINTS):
+    """
+    Série mensuelle (annee, periode[, compte], montant), bornée en séries et en points.
+    """
+    keys = ["annee", "periode"]
+    if by_compte:
+        data = mensuel.groupby(keys + ["compte"], observed=True)["montant"].sum().reset_index()
+        data = top_n_with_others(data, "compte", "montant", keys, n=max_series)
+    else:
+        data = mensuel.groupby(keys, observed=True)["montant"].sum().reset_index()
+
+    periodes = data["periode"].drop_duplicates().sort_values()
+    if len(periodes) > max_points:
+        data = data[data["periode"] >= periodes.iloc[-max_points]]
+    return data.reset_index(drop=True)
+
+
+def share_chart_data(mensuel, max_slices=MAX_SERIES):
+    """
+    Total annuel par compte (exercice, compte, montant) pour les donuts, borné en parts.
+    """
+    data = mensuel.groupby(["annee", "compte"], observed=True)["montant"].sum().reset_index()
+    data = top_n_with_others(data, "compte", "montant", ["annee"], n=max_slices)
+    data["exercice"] = data["annee"].astype(str)
+    return data
+
+
+def line_chart(data, y_title, by_compte=True):
+    """
+    Courbe mensuelle : une couleur par compte et un pointillé par année
+    (ou une couleur par année si `by_compte` est faux).
+    """
+    if by_compte:
+        encoding = dict(
+            color="compte:N",
+            strokeDash="annee:N",
+            tooltip=["annee", "compte", "periode", "montant"],
+        )
+    else:
+        encoding = dict(color="annee:N", tooltip=["annee", "periode", "montant"])
+    # Import différé : altair n'est chargé que si une spec n'est pas en cache
+    import altair as alt
+
+    return (
+        alt.Chart(data)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("periode:T", title="Mois"),
+            y=alt.Y("montant:Q", title=y_title),
+            **encoding,
+        )
+        .properties(height=300)
+    )
+
+
+def donut_chart(data):
+    """
+    Double donut : structure par compte, une facette par exercice.
+    """
+    import altair as alt
+
+    return (
+        alt.Chart(data)
+        .mark_arc(innerRadius=50)
+        .encode(
+            theta="montant:Q",
+            color="compte:N",
+            tooltip=["exercice", "compte", "montant"],
+        )
+        .properties(width=220, height=220)
+        .facet(column="exercice:N")
+    )
+
+
+class ChartSpecCache:
+    """
+    Specs Vega-Lite sérialisées, par (version du jeu de données, nom du graphique).
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, name, build):
+        """
+        Spec en cache, ou `build()` (un alt.Chart) converti en dict puis mémorisé.
+        """
+        key = (version, name)
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+                return spec
+            self.misses += 1
+        spec = build().to_dict()
+        with self._lock:
+            self._specs[key] = spec
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return spec
+
+
+_spec_cache = ChartSpecCache()
+
+
+def get_chart_spec_cache():
+    return _spec_cache
+
+
+def cached_spec(version, name, build):
+    """
+    Raccourci vers le cache de specs partagé par le processus.
+    """
+    return _spec_cache.get(version, name, build)
+
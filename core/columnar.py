@@ -0,0 +1,171 @@
+"""
+Fichiers Parquet « sidecar » pour les classeurs Excel (FEC).
+
+Un classeur n'est parsé (lecture en flux, cf. core.excel_ingest) qu'une seule fois par révision Dropbox :
+le résultat, typé, est écrit en Parquet à côté du cache de téléchargement.
+Les chargements suivants lisent ce fichier en memory-map et uniquement
+les colonnes demandées. Au même moment, les écritures sont aussi indexées par
+compte (cf. core.account_index) pour l'accès ligne à ligne.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+from core.dropbox_cache import DEFAULT_CACHE_DIR
+
+COLUMNAR_DIR = os.path.join(DEFAULT_CACHE_DIR, "columnar")
+
+# Une colonne texte devient catégorielle si elle a moins de valeurs distinctes que ce ratio
+CATEGORY_RATIO = 0.5
+
+
+def _path_key(path):
+    return hashlib.sha1(path.lower().encode("utf-8")).hexdigest()[:16]
+
+
+def sidecar_path(path, rev, sheet_name=0, base_dir=COLUMNAR_DIR):
+    """
+    Chemin local du Parquet associé à (chemin Dropbox, rev, feuille).
+    """
+    safe_rev = "".join(c for c in str(rev) if c.isalnum())
+    return os.path.join(base_dir, f"{_sidecar_prefix(path, sheet_name)}{safe_rev}.parquet")
+
+
+def _sidecar_prefix(path, sheet_name):
+    safe_sheet = "".join(c for c in str(sheet_name) if c.isalnum() or c == "_")
+    return f"{_path_key(path)}_{safe_sheet}_"
+
+
+def index_stem(path, rev, sheet_name=0, base_dir=COLUMNAR_DIR):
+    """
+    Préfixe des fichiers d'index par compte associés au sidecar.
+    """
+    return sidecar_path(path, rev, sheet_name, base_dir)[: -len(".parquet")]
+
+
+def compact_dtypes(df):
+    """
+    Types compacts pour le stockage colonne : entiers réduits, textes en catégories.
+    """
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_integer_dtype(s):
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif s.dtype == object:
+            non_null = s.dropna()
+            # Colonnes mixtes (ex. numéros de compte tantôt int tantôt str) -> texte
+            if not non_null.map(type).eq(str).all():
+                s = s.where(s.isna(), s.astype(str))
+            if len(non_null) and s.nunique() < CATEGORY_RATIO * len(s):
+                df[col] = s.astype("category")
+            else:
+                df[col] = s.astype("string")
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def write_parquet_atomic(df, target, **kwargs):
+    """
+    Écrit `df` en Parquet dans `target` via un fichier temporaire unique du
+    même dossier : deux écrivains concurrents ne partagent jamais le même
+    fichier temporaire, et un lecteur ne voit jamais un fichier partiel.
+    """
+    directory = os.path.dirname(target) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(target) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False, **kwargs)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def remove_stale_revisions(path, rev, sheet_name=0, base_dir=COLUMNAR_DIR):
+    """
+    Supprime les fichiers (sidecar et index) des autres révisions de la même
+    feuille ; les autres feuilles du classeur sont conservées.
+    """
+    prefix = _sidecar_prefix(path, sheet_name)
+    current = "".join(c for c in str(rev) if c.isalnum())
+    # <prefix><rev>.parquet ou <prefix><rev>.<suffixe>.parquet (index par compte)
+    pattern = re.compile(re.escape(prefix) + r"([A-Za-z0-9]+)(\.[a-z]+)?\.parquet$")
+    try:
+        names = os.listdir(base_dir)
+    except OSError:
+        return
+    for name in names:
+        match = pattern.match(name)
+        if match and match.group(1) != current:
+            try:
+                os.remove(os.path.join(base_dir, name))
+            except OSError:
+                pass
+
+
+def excel_to_parquet(content, target, sheet_name=0):
+    """
+    Parse le classeur `content` (bytes) et l'écrit en Parquet dans `target`.
+
+    `sheet_name` : feuille, liste de feuilles ou None pour toutes (lues en parallèle).
+    """
+    # Import local : core.excel_ingest dépend lui-même de compact_dtypes
+    from core.excel_ingest import read_workbook
+
+    df = read_workbook(content, sheets=sheet_name)
+    write_parquet_atomic(df, target)
+    return df
+
+
+def read_columnar(path, rev, load_bytes, columns=None, sheet_name=0, base_dir=COLUMNAR_DIR):
+    """
+    Lit le classeur Dropbox `path` à la révision `rev` sous forme de DataFrame.
+
+    `load_bytes` n'est appelé (et le classeur parsé) que si aucun Parquet
+    n'existe encore pour cette révision ; l'index par compte est alors construit
+    et les fichiers des anciennes révisions de la feuille sont supprimés.
+    `columns` limite la lecture aux colonnes utiles à la page.
+    """
+    from core.account_index import build_account_index
+
+    target = sidecar_path(path, rev, sheet_name, base_dir)
+
+    if not os.path.exists(target):
+        df = excel_to_parquet(load_bytes(), target, sheet_name)
+        stem = index_stem(path, rev, sheet_name, base_dir)
+        build_account_index(df, stem)
+        remove_stale_revisions(path, rev, sheet_name, base_dir)
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(target, columns=list(columns) if columns is not None else None, memory_map=True)
+    return table.to_pandas()
+
+
+def get_account_index(path, rev, load_bytes, sheet_name=0, base_dir=COLUMNAR_DIR):
+    """
+    Index par compte du classeur `path` à la révision `rev` (None sans colonne compte).
+
+    Construit à l'ingestion ; pour un sidecar antérieur à l'index, il est
+    reconstruit une fois depuis le Parquet, sans retélécharger le classeur.
+    """
+    from core.account_index import build_account_index, index_paths, open_account_index
+
+    stem = index_stem(path, rev, sheet_name, base_dir)
+    if not os.path.exists(index_paths(stem)[1]):
+        df = read_columnar(path, rev, load_bytes, sheet_name=sheet_name, base_dir=base_dir)
+        if not os.path.exists(index_paths(stem)[1]) and not build_account_index(df, stem):
+            return None
+    return open_account_index(stem)
@@ -0,0 +1,117 @@
+"""
+Cube SIG pré-agrégé au grain (annee, mois, compte).
+
+Le cube est construit une fois par version du jeu de données ; toutes les
+lignes SIG, les comparatifs N / N-1 et les graphiques mensuels en sont
+extraits. Le coût d'un affichage dépend alors du nombre de comptes × mois
+et non plus du nombre de lignes d'écritures.
+
+Les nouvelles écritures mensuelles sont intégrées par `update`, qui ne
+touche que les cellules concernées.
+"""
+
+import threading
+
+import pandas as pd
+
+CUBE_KEYS = ["annee", "mois", "compte"]
+ACCOUNT_ATTRS = ["type", "libelle"]
+
+
+class SigCube:
+    """
+    Montants agrégés par (annee, mois, compte) + table des comptes (type, libellé).
+    """
+
+    def __init__(self, cells, accounts):
+        # cells : DataFrame indexé par (annee, mois, compte), colonne `montant`
+        # accounts : DataFrame indexé par compte, colonnes type / libelle
+        self.cells = cells.sort_index()
+        self.accounts = accounts
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_lines(cls, df):
+        """
+        Construit le cube à partir d'écritures au format long (make_sample_sig / FEC).
+        """
+        cells = df.groupby(CUBE_KEYS, observed=True)[["montant"]].sum()
+        return cls(cells, cls._accounts_from(df))
+
+    @staticmethod
+    def _accounts_from(df):
+        attrs = [c for c in ACCOUNT_ATTRS if c in df.columns]
+        accounts = df[["compte"] + attrs].drop_duplicates("compte").set_index("compte")
+        for c in ACCOUNT_ATTRS:
+            if c not in accounts.columns:
+                accounts[c] = None
+        return accounts[ACCOUNT_ATTRS]
+
+    # -------------------------------------------------------
+    # Mise à jour incrémentale
+    # -------------------------------------------------------
+    def update(self, lines, replace=False):
+        """
+        Intègre de nouvelles écritures.
+
+        Par défaut les montants s'ajoutent aux cellules existantes ; avec
+        `replace=True` les cellules touchées sont remplacées (réimport d'un mois).
+        Seules les cellules présentes dans `lines` sont modifiées.
+        """
+        delta = lines.groupby(CUBE_KEYS, observed=True)[["montant"]].sum()
+        with self._lock:
+            existing = delta.index.isin(self.cells.index)
+            if existing.any():
+                idx = delta.index[existing]
+                if replace:
+                    self.cells.loc[idx, "montant"] = delta.loc[idx, "montant"].to_numpy()
+                else:
+                    self.cells.loc[idx, "montant"] += delta.loc[idx, "montant"].to_numpy()
+            if (~existing).any():
+                self.cells = pd.concat([self.cells, delta[~existing]]).sort_index()
+
+            new_accounts = self._accounts_from(lines)
+            new_accounts = new_accounts[~new_accounts.index.isin(self.accounts.index)]
+            if len(new_accounts):
+                self.accounts = pd.concat([self.accounts, new_accounts])
+            self.version += 1
+
+    # -------------------------------------------------------
+    # Extractions
+    # -------------------------------------------------------
+    def flat(self, types=None):
+        """
+        Cellules à plat avec les attributs de compte (type, libelle).
+        """
+        flat = self.cells.reset_index().join(self.accounts, on="compte")
+        if types is not None:
+            flat = flat[flat["type"].isin(types)]
+        return flat
+
+    def years(self):
+        return sorted(self.cells.index.get_level_values("annee").unique())
+
+    def totals_by_type(self, years):
+        """
+        Tableau type × années (montants annuels), années manquantes à 0.
+        """
+        flat = self.flat()
+        agg = flat.groupby(["type", "annee"])["montant"].sum().unstack("annee")
+        return agg.reindex(columns=years, fill_value=0.0).fillna(0.0)
+
+    def totals_by_account(self, types, years):
+        """
+        Tableau (compte, libelle) × années pour les comptes des `types` demandés.
+        """
+        flat = self.flat(types)
+        agg = flat.groupby(["compte", "libelle", "annee"])["montant"].sum().unstack("annee")
+        return agg.reindex(columns=years, fill_value=0.0).fillna(0.0)
+
+    def monthly(self, types):
+        """
+        Montants mensuels (annee, periode, compte, montant) pour les graphiques.
+        """
+        flat = self.flat(types)
+        flat["periode"] = pd.to_datetime({"year": flat["annee"], "month": flat["mois"], "day": 1})
+        return flat[["annee", "periode", "compte", "montant"]].reset_index(drop=True)
@@ -0,0 +1,217 @@
+"""
+Magasin de jeux de données partagé par toutes les sessions du processus.
+
+Un jeu de données est chargé une seule fois par clé (dossier, fichier, rev)
+puis servi à chaque session sous forme de vue : les tableaux NumPy sous-jacents
+sont marqués non modifiables et la vue ne les copie pas. Une session peut
+ajouter des colonnes à sa vue sans toucher au jeu partagé ; une écriture en
+place sur une colonne existante lève une erreur au lieu de corrompre les
+données des autres utilisateurs.
+
+La mémoire totale est bornée : au-delà du budget, les jeux les moins
+récemment utilisés sont évincés.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.core.arrays import BaseMaskedArray
+from pandas.core.arrays._mixins import NDArrayBackedExtensionArray
+
+DEFAULT_BUDGET_BYTES = int(os.environ.get("BI_PLUS_DATASET_BUDGET_BYTES", 1024 * 1024 * 1024))
+
+
+def freeze(df):
+    """
+    DataFrame dont les tableaux sous-jacents sont en lecture seule (sans copie
+    pour les colonnes NumPy ; les codes des catégorielles sont partagés).
+    """
+    arrays = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes = s.cat.codes.to_numpy()
+            codes.flags.writeable = False
+            arrays[col] = pd.Categorical.from_codes(codes, dtype=s.dtype)
+        elif isinstance(s.dtype, np.dtype):
+            values = s.to_numpy(copy=False)
+            values.flags.writeable = False
+            arrays[col] = values
+        else:
+            arrays[col] = _freeze_extension(s.array)
+    # copy=False : pas de consolidation en blocs, donc pas de copie
+    return pd.DataFrame(arrays, index=df.index, copy=False)
+
+
+def _readonly(values):
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+def _freeze_extension(array):
+    """
+    Tableau d'extension en lecture seule.
+
+    Int64 / boolean / Float64 : valeurs et masque partagés, marqués non
+    modifiables ; string, datetime avec fuseau… : tableau NumPy sous-jacent
+    idem. Les autres (Arrow, intervalles…) sont modifiables en place via
+    l'objet partagé : ils sont matérialisés en tableau objet en lecture seule.
+    """
+    if isinstance(array, BaseMaskedArray):
+        return type(array)(_readonly(array._data), _readonly(array._mask))
+    if isinstance(array, NDArrayBackedExtensionArray):
+        return array._from_backing_data(_readonly(array._ndarray))
+    return _readonly(np.asarray(array, dtype=object))
+
+
+def frame_nbytes(df):
+    """
+    Mémoire occupée par un DataFrame, chaînes Python comprises.
+
+    (`memory_usage(deep=True)` refuse les colonnes objet en lecture seule.)
+    """
+    total = int(df.memory_usage(index=True, deep=False).sum())
+    for col in df.columns:
+        if df[col].dtype == object:
+            total += sum(sys.getsizeof(v) for v in df[col].to_numpy())
+    return total
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return frame_nbytes(value)
+    return int(getattr(value, "nbytes", 0))
+
+
+class DatasetStore:
+    """
+    Cache LRU borné en octets ; les valeurs sont des DataFrames (gelés) ou
+    des objets exposant `nbytes` (ex. LedgerView).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, load):
+        """
+        Jeu de données pour `key` ; `load()` n'est appelé qu'en cas d'absence.
+
+        Les DataFrames sont renvoyés sous forme de vue en lecture seule.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["hits"] += 1
+                entry["last_access"] = time.time()
+                self.hits += 1
+                return _view(entry["value"])
+            self.misses += 1
+
+        value = load()
+        if isinstance(value, pd.DataFrame):
+            value = freeze(value)
+        entry = {
+            "value": value,
+            "nbytes": _nbytes(value),
+            "hits": 0,
+            "loaded_at": time.time(),
+            "last_access": time.time(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+        return _view(value)
+
+    def resize(self, key):
+        """
+        Re-mesure un jeu dont la taille a changé (ex. caches d'un LedgerView) et
+        évince si le budget est dépassé.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["nbytes"] = _nbytes(entry["value"])
+            self._evict()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        # Le jeu le plus récent reste en mémoire même s'il dépasse seul le budget
+        total = sum(e["nbytes"] for e in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry["nbytes"]
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Compteurs globaux et occupation mémoire par jeu de données.
+        """
+        with self._lock:
+            datasets = [
+                {
+                    "key": key,
+                    "bytes": e["nbytes"],
+                    "hits": e["hits"],
+                    "loaded_at": e["loaded_at"],
+                    "last_access": e["last_access"],
+                }
+                for key, e in reversed(self._entries.items())
+            ]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(datasets),
+                "bytes": sum(d["bytes"] for d in datasets),
+                "max_bytes": self.max_bytes,
+                "datasets": datasets,
+            }
+
+
+def _view(value):
+    if isinstance(value, pd.DataFrame):
+        # Copie superficielle : nouvelles métadonnées, mêmes tableaux en lecture seule
+        return value.copy(deep=False)
+    return value
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_dataset_store():
+    """
+    Instance unique du magasin pour tout le processus.
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = DatasetStore()
+        return _shared_store
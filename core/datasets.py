@@ -0,0 +1,139 @@
+"""
+Jeux de données d'un dossier client : grand livre et SIG.
+
+Point d'entrée commun aux pages, au pré-chargement en tâche de fond et au
+traitement par lots. Tout est indexé par (dossier, fichier, rev) : une
+nouvelle révision Dropbox produit de nouvelles clés, les anciennes finissent
+évincées du magasin de données.
+"""
+
+from core.columnar import read_columnar
+from core.dataset_store import frame_nbytes, get_dataset_store
+from core.dropbox_cache import get_download_cache
+from core.fec import download_fec, read_fec_frame
+from core.ledger_view import get_ledger_view
+from core.sig import SIG_PCG, SigEngine
+from core.singleflight import get_dataset_flight
+from core.tracing import span
+
+# Emplacement du grand livre dans chaque dossier client
+LEDGER_PATH = "{folder}/dossiers/2023/essai_fec.xlsx"
+
+# FEC texte (tabulation / pipe / point-virgule) : lu en flux depuis Dropbox
+TEXT_FEC_EXTENSIONS = (".txt", ".csv")
+
+# Postes affichés en synthèse (accueil, exports consolidés)
+KEY_POSTES = [
+    "Marge commerciale",
+    "Valeur ajoutée",
+    "Excédent brut d'exploitation",
+    "Résultat de l'exercice",
+]
+
+_engine = None
+
+
+def get_sig_engine():
+    global _engine
+    if _engine is None:
+        _engine = SigEngine(SIG_PCG)
+    return _engine
+
+
+def ledger_path(folder):
+    return LEDGER_PATH.format(folder=folder)
+
+
+def is_text_fec(path):
+    return path.lower().endswith(TEXT_FEC_EXTENSIONS)
+
+
+def ledger_key(folder, path, rev):
+    return (folder, path.lower(), rev)
+
+
+def load_ledger_view(dbx, folder, path, rev):
+    """
+    LedgerView du grand livre `path` à la révision `rev` (chargée une fois par processus).
+    """
+    key = ledger_key(folder, path, rev)
+
+    def download():
+        with span("dropbox_download"):
+            return get_download_cache().download(dbx, path)[1]
+
+    def parse():
+        with span("parse"):
+            return read_columnar(path, rev, download)
+
+    return get_dataset_flight().do(key, lambda: get_ledger_view(key, parse))
+
+
+class FolderSig:
+    """
+    SIG d'un dossier : dernier exercice présent (N) comparé à N-1.
+    """
+
+    def __init__(self, lines, annee_n, annee_n_1, sig):
+        self.lines = lines  # format long annee, mois, periode, compte, montant
+        self.annee_n = annee_n
+        self.annee_n_1 = annee_n_1
+        self.sig = sig
+
+    @classmethod
+    def from_ledger(cls, df, engine=None):
+        return cls.from_lines(read_fec_frame(df), engine)
+
+    @classmethod
+    def from_lines(cls, lines, engine=None):
+        """
+        SIG à partir du format long mensuel (annee, mois, periode, compte, montant).
+        """
+        if lines.empty:
+            return cls(lines, None, None, None)
+        annee_n = int(lines["annee"].max())
+        sig = (engine or get_sig_engine()).compute(lines, annee_n, annee_n - 1)
+        return cls(lines, annee_n, annee_n - 1, sig)
+
+    def key_figures(self):
+        """
+        {poste: (N, N_1, Var_%)} pour les postes de synthèse.
+        """
+        if self.sig is None:
+            return {}
+        postes = self.sig.postes.set_index("poste")
+        return {
+            p: (postes.at[p, "N"], postes.at[p, "N_1"], postes.at[p, "Var_%"])
+            for p in KEY_POSTES
+            if p in postes.index
+        }
+
+    @property
+    def nbytes(self):
+        total = frame_nbytes(self.lines)
+        if self.sig is not None:
+            total += sum(frame_nbytes(df) for df in (self.sig.postes, self.sig.comptes, self.sig.mensuel))
+        return total
+
+
+def load_folder_sig(dbx, folder, path, rev):
+    """
+    SIG du dossier à la révision `rev` du grand livre (calculé une fois par processus).
+
+    Un FEC texte est lu en flux depuis la réponse Dropbox et agrégé au fil de
+    l'eau (core.fec.read_fec) : il n'est ni mis en cache disque ni chargé en
+    entier en mémoire. Un classeur Excel passe par le visualiseur indexé.
+    """
+    key = ("sig",) + ledger_key(folder, path, rev)
+
+    def compute():
+        if is_text_fec(path):
+            with span("fec_stream"):
+                _, lines = download_fec(dbx, path)
+            with span("sig_aggregation"):
+                return FolderSig.from_lines(lines)
+        view = load_ledger_view(dbx, folder, path, rev)
+        with span("sig_aggregation"):
+            return FolderSig.from_ledger(view.df)
+
+    return get_dataset_flight().do(key, lambda: get_dataset_store().get(key, compute))
@@ -0,0 +1,270 @@
+"""
+Cache disque des téléchargements Dropbox, adressé par contenu.
+
+Chaque fichier téléchargé est stocké sous son `content_hash` Dropbox.
+Un index (chemin -> rev / content_hash) permet de savoir, grâce à un simple
+`files_get_metadata`, si les octets en cache sont encore valides : on évite
+ainsi un `files_download` complet à chaque rerun Streamlit.
+
+Le cache est borné en taille ; les blobs les moins récemment utilisés sont
+évincés en premier. Un hit ne met à jour la récence LRU qu'en mémoire :
+l'index n'est réécrit sur disque qu'à l'ajout, à l'éviction, à
+l'invalidation, au plus toutes les INDEX_FLUSH_INTERVAL secondes après des
+hits, et à l'arrêt du processus.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "BI_PLUS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bi_plus_cache")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("BI_PLUS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Délai minimal entre deux réécritures de l'index dues aux seuls hits (secondes)
+INDEX_FLUSH_INTERVAL = 60
+
+# Taille des blocs utilisés par l'algorithme `content_hash` de Dropbox
+DROPBOX_HASH_BLOCK = 4 * 1024 * 1024
+
+
+def dropbox_content_hash(data):
+    """
+    Calcule le `content_hash` Dropbox d'un contenu (SHA-256 des SHA-256 par blocs de 4 Mo).
+    """
+    block_hashes = b""
+    for i in range(0, len(data), DROPBOX_HASH_BLOCK):
+        block_hashes += hashlib.sha256(data[i:i + DROPBOX_HASH_BLOCK]).digest()
+    return hashlib.sha256(block_hashes).hexdigest()
+
+
+class DropboxDownloadCache:
+    """
+    Cache LRU sur disque des fichiers Dropbox, clé = chemin + rev / content_hash.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._index = self._load_index()
+        # Récence modifiée en mémoire depuis la dernière écriture de l'index
+        self._dirty = False
+        self._saved_at = time.time()
+
+    # -------------------------------------------------------
+    # Index persistant
+    # -------------------------------------------------------
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("paths", {})
+        index.setdefault("blobs", {})
+        # Nettoyer les entrées dont le blob a disparu du disque
+        for h in list(index["blobs"]):
+            if not os.path.exists(self._blob_path(h)):
+                del index["blobs"][h]
+        for p, entry in list(index["paths"].items()):
+            if entry["content_hash"] not in index["blobs"]:
+                del index["paths"][p]
+        return index
+
+    def _save_index(self):
+        # Fichier temporaire unique : plusieurs processus peuvent partager le cache
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix="index.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._dirty = False
+        self._saved_at = time.time()
+
+    def flush(self):
+        """
+        Écrit l'index si des hits ont modifié la récence depuis la dernière écriture.
+        """
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _write_blob(self, blob_path, data):
+        # Fichier temporaire unique, comme l'index : deux processus peuvent stocker le même blob
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, prefix=".blob.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blob_dir, content_hash)
+
+    @staticmethod
+    def _key(path):
+        # Dropbox est insensible à la casse des chemins
+        return path.lower()
+
+    # -------------------------------------------------------
+    # API publique
+    # -------------------------------------------------------
+    def lookup(self, path, rev=None, content_hash=None):
+        """
+        Renvoie les octets en cache pour `path` si la révision correspond, sinon None.
+        """
+        with self._lock:
+            entry = self._index["paths"].get(self._key(path))
+            if entry is None:
+                return None
+            if rev is not None and entry["rev"] != rev:
+                return None
+            if content_hash is not None and entry["content_hash"] != content_hash:
+                return None
+            try:
+                with open(self._blob_path(entry["content_hash"]), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            self._index["blobs"][entry["content_hash"]]["last_access"] = time.time()
+            self._dirty = True
+            return data
+
+    def store(self, path, rev, data, content_hash=None):
+        """
+        Enregistre `data` pour `path` / `rev` et applique la limite de taille.
+        """
+        if content_hash is None:
+            content_hash = dropbox_content_hash(data)
+        with self._lock:
+            blob_path = self._blob_path(content_hash)
+            if content_hash not in self._index["blobs"]:
+                self._write_blob(blob_path, data)
+            self._index["blobs"][content_hash] = {
+                "size": len(data),
+                "last_access": time.time(),
+            }
+            self._index["paths"][self._key(path)] = {
+                "rev": rev,
+                "content_hash": content_hash,
+            }
+            self._evict()
+            self._save_index()
+        return content_hash
+
+    def download(self, dbx, path):
+        """
+        Équivalent de `dbx.files_download(path)` passant par le cache.
+
+        Renvoie (metadata, contenu en bytes). Un `files_get_metadata` suffit
+        lorsque la révision en cache est toujours la bonne.
+        """
+        metadata = dbx.files_get_metadata(path)
+        data = self.lookup(path, rev=metadata.rev, content_hash=metadata.content_hash)
+        with self._lock:
+            if data is not None:
+                self.hits += 1
+                self.bytes_saved += len(data)
+                if self._dirty and time.time() - self._saved_at >= INDEX_FLUSH_INTERVAL:
+                    self._save_index()
+                return metadata, data
+            self.misses += 1
+
+        metadata, res = dbx.files_download(path)
+        data = res.content
+        self.store(path, metadata.rev, data, content_hash=metadata.content_hash)
+        return metadata, data
+
+    def invalidate(self, path):
+        """
+        Oublie l'entrée associée à `path` (le blob reste jusqu'à éviction).
+        """
+        with self._lock:
+            if self._index["paths"].pop(self._key(path), None) is not None:
+                self._save_index()
+
+    def stats(self):
+        """
+        Compteurs du cache (hits, misses, taille occupée…).
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "entries": len(self._index["paths"]),
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+    # -------------------------------------------------------
+    # Éviction LRU
+    # -------------------------------------------------------
+    def _total_bytes(self):
+        return sum(b["size"] for b in self._index["blobs"].values())
+
+    def _evict(self):
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._index["blobs"].items(), key=lambda kv: kv[1]["last_access"])
+        for content_hash, blob in by_age:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._blob_path(content_hash))
+            except OSError:
+                pass
+            del self._index["blobs"][content_hash]
+            total -= blob["size"]
+            self.evictions += 1
+        # Retirer les chemins pointant vers un blob évincé
+        for p, entry in list(self._index["paths"].items()):
+            if entry["content_hash"] not in self._index["blobs"]:
+                del self._index["paths"][p]
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_download_cache():
+    """
+    Instance unique du cache pour tout le processus (partagée entre pages et sessions).
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = DropboxDownloadCache()
+            # Récence LRU des derniers hits conservée à l'arrêt
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
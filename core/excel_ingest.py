@@ -0,0 +1,133 @@
+"""
+Lecture rapide des classeurs Excel (FEC exportés, balances…).
+
+- openpyxl en mode lecture seule : les lignes sont lues en flux, sans
+  construire le modèle objet complet du classeur ;
+- projection : seules la feuille et les colonnes demandées sont matérialisées ;
+- typage au fil de l'eau, par blocs de lignes ;
+- un classeur à plusieurs feuilles (une par année ou par journal) est lu
+  en parallèle dans un pool de processus.
+
+Le résultat est le même DataFrame typé, que le classeur soit lu feuille
+par feuille ou en parallèle.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from core.columnar import compact_dtypes
+
+CHUNK_ROWS = 50_000
+# En dessous de cette taille, lancer des processus coûte plus que de lire en série
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+SHEET_COLUMN = "feuille"
+
+
+def sheet_names(content):
+    """
+    Noms des feuilles du classeur.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(BytesIO(content), read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _typed_chunk(rows, header, dtypes):
+    chunk = pd.DataFrame.from_records(rows, columns=header)
+    chunk = chunk.infer_objects()
+    for col, dtype in (dtypes or {}).items():
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+def read_sheet(content, sheet_name=0, columns=None, dtypes=None):
+    """
+    Lit une feuille en flux ; `columns` limite les colonnes matérialisées.
+
+    `sheet_name` : nom ou position de la feuille. `dtypes` : types imposés
+    par colonne (les autres sont déduits puis compactés).
+    """
+    # Import différé : openpyxl n'est chargé qu'au premier classeur lu
+    from openpyxl import load_workbook
+
+    wb = load_workbook(BytesIO(content), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=list(columns or []))
+        header = [str(h).strip() if h is not None else f"col_{i}" for i, h in enumerate(header)]
+
+        if columns is not None:
+            missing = [c for c in columns if c not in header]
+            if missing:
+                raise KeyError(f"Colonnes absentes de la feuille {sheet_name!r} : {', '.join(missing)}")
+            keep = [header.index(c) for c in columns]
+            header = list(columns)
+        else:
+            keep = list(range(len(header)))
+
+        chunks, buffer = [], []
+        for row in rows:
+            # Ignorer les lignes entièrement vides (fin de feuille mal bornée)
+            values = tuple(row[i] if i < len(row) else None for i in keep)
+            if all(v is None for v in values):
+                continue
+            buffer.append(values)
+            if len(buffer) >= CHUNK_ROWS:
+                chunks.append(_typed_chunk(buffer, header, dtypes))
+                buffer = []
+        if buffer or not chunks:
+            chunks.append(_typed_chunk(buffer, header, dtypes))
+    finally:
+        wb.close()
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    return compact_dtypes(df)
+
+
+def _read_sheet_task(args):
+    content, sheet, columns, dtypes = args
+    return read_sheet(content, sheet, columns, dtypes)
+
+
+def read_workbook(content, sheets=0, columns=None, dtypes=None, max_workers=None):
+    """
+    Lit une ou plusieurs feuilles et renvoie un seul DataFrame typé.
+
+    `sheets` : nom / position d'une feuille, liste de feuilles, ou None pour
+    toutes. Avec plusieurs feuilles, une colonne `feuille` indique l'origine
+    des lignes et les feuilles sont lues en parallèle si le classeur est gros.
+    """
+    if sheets is None:
+        sheets = sheet_names(content)
+    if not isinstance(sheets, (list, tuple)):
+        return read_sheet(content, sheets, columns, dtypes)
+
+    tasks = [(content, sheet, columns, dtypes) for sheet in sheets]
+    workers = min(len(sheets), max_workers or os.cpu_count() or 1)
+    if workers > 1 and len(content) >= PARALLEL_MIN_BYTES:
+        # « spawn » : ne pas forker un processus Streamlit multi-threadé
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            frames = list(pool.map(_read_sheet_task, tasks))
+    else:
+        frames = [_read_sheet_task(t) for t in tasks]
+
+    for sheet, frame in zip(sheets, frames):
+        frame.insert(0, SHEET_COLUMN, str(sheet))
+    # Les catégories diffèrent d'une feuille à l'autre : retypage après concaténation
+    df = pd.concat(
+        [f.astype({c: "object" for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)}) for f in frames],
+        ignore_index=True,
+    )
+    return compact_dtypes(df)
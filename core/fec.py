@@ -0,0 +1,221 @@
+"""
+Lecture en flux des Fichiers des Écritures Comptables (FEC) au format texte.
+
+Les FEC produits par les logiciels comptables sont des fichiers délimités
+(tabulation ou pipe, parfois point-virgule), encodés en UTF-8 ou ISO-8859-15.
+Ils sont lus par blocs depuis la réponse Dropbox et agrégés au fil de l'eau
+au grain (annee, mois, compte) : la mémoire reste bornée par le nombre de
+comptes × mois, quelle que soit la taille du fichier.
+
+Le résultat a le même format long que `make_sample_sig` :
+annee, mois, periode, compte, montant.
+"""
+
+import codecs
+import io
+
+import numpy as np
+import pandas as pd
+
+FEC_DELIMITERS = ["\t", "|", ";"]
+SAMPLE_SIZE = 64 * 1024
+DEFAULT_CHUNKSIZE = 200_000
+
+# Colonnes FEC utiles (noms normalisés en minuscules)
+COL_DATE = "ecrituredate"
+COL_COMPTE = "comptenum"
+COL_DEBIT = "debit"
+COL_CREDIT = "credit"
+# Variante autorisée par l'article A47 A-1 du LPF : Montant + Sens (D/C)
+COL_MONTANT = "montant"
+COL_SENS = "sens"
+
+LONG_COLUMNS = ["annee", "mois", "periode", "compte", "montant"]
+
+
+class FecFormatError(ValueError):
+    """Le fichier ne ressemble pas à un FEC exploitable."""
+
+
+class _PrefixedStream(io.RawIOBase):
+    """
+    Flux binaire qui relit d'abord l'échantillon déjà consommé, puis la source.
+    """
+
+    def __init__(self, prefix, source):
+        self._prefix = prefix
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._source.read(len(buffer))
+        if not data:
+            return 0
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def detect_encoding(sample):
+    """
+    UTF-8 (avec ou sans BOM) si l'échantillon est décodable, sinon ISO-8859-15.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False : un caractère coupé en fin d'échantillon n'est pas une erreur
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "iso-8859-15"
+
+
+def detect_delimiter(header_line):
+    """
+    Délimiteur le plus fréquent de la ligne d'en-tête.
+    """
+    counts = {d: header_line.count(d) for d in FEC_DELIMITERS}
+    delimiter = max(counts, key=counts.get)
+    if counts[delimiter] == 0:
+        raise FecFormatError("Délimiteur FEC introuvable (tabulation, pipe ou point-virgule attendu).")
+    return delimiter
+
+
+def _to_amount(s):
+    # Montants FEC : virgule décimale, éventuellement espaces de milliers
+    s = s.fillna("0").str.replace(r"[\s ]", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def _to_dates(s):
+    dates = pd.to_datetime(s, format="%Y%m%d", errors="coerce")
+    missing = dates.isna() & s.notna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(s[missing], format="%d/%m/%Y", errors="coerce")
+    return dates
+
+
+def _aggregate_chunk(chunk):
+    chunk.columns = [c.strip().lower() for c in chunk.columns]
+
+    if COL_DEBIT in chunk.columns and COL_CREDIT in chunk.columns:
+        solde = _to_amount(chunk[COL_DEBIT]) - _to_amount(chunk[COL_CREDIT])
+    elif COL_MONTANT in chunk.columns and COL_SENS in chunk.columns:
+        sens = np.where(chunk[COL_SENS].str.strip().str.upper().str.startswith("C"), -1.0, 1.0)
+        solde = _to_amount(chunk[COL_MONTANT]) * sens
+    else:
+        raise FecFormatError("Colonnes Debit/Credit (ou Montant/Sens) absentes du FEC.")
+
+    dates = _to_dates(chunk[COL_DATE])
+    compte = chunk[COL_COMPTE].str.strip()
+
+    # Convention de signe de make_sample_sig : produits (classe 7) positifs au crédit
+    solde = np.where(compte.str.startswith("7").to_numpy(), -solde, solde)
+
+    valid = dates.notna().to_numpy()
+    part = pd.DataFrame(
+        {
+            "annee": dates.dt.year.to_numpy()[valid].astype(np.int16),
+            "mois": dates.dt.month.to_numpy()[valid].astype(np.int8),
+            "compte": compte.to_numpy()[valid],
+            "montant": solde[valid],
+        }
+    )
+    return part.groupby(["annee", "mois", "compte"], sort=False)["montant"].sum()
+
+
+def read_fec(stream, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Lit un FEC texte depuis un flux binaire et renvoie le format long mensuel.
+
+    Le flux n'est jamais chargé en entier : il est décodé et parsé par blocs
+    de `chunksize` lignes, chaque bloc étant agrégé immédiatement.
+    """
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.BytesIO(stream)
+
+    sample = stream.read(SAMPLE_SIZE)
+    if not sample:
+        raise FecFormatError("Fichier FEC vide.")
+    encoding = detect_encoding(sample)
+    header_line = sample.split(b"\n", 1)[0].decode(encoding, errors="replace")
+    delimiter = detect_delimiter(header_line)
+
+    text = io.TextIOWrapper(
+        io.BufferedReader(_PrefixedStream(sample, stream)), encoding=encoding, newline=""
+    )
+    header = [c.strip().lower() for c in header_line.lstrip("﻿").rstrip("\r").split(delimiter)]
+    wanted = {COL_DATE, COL_COMPTE, COL_DEBIT, COL_CREDIT, COL_MONTANT, COL_SENS}
+    usecols = [i for i, c in enumerate(header) if c in wanted]
+    if COL_DATE not in header or COL_COMPTE not in header:
+        raise FecFormatError("Colonnes EcritureDate / CompteNum absentes du FEC.")
+
+    total = None
+    reader = pd.read_csv(
+        text,
+        sep=delimiter,
+        usecols=usecols,
+        dtype=str,
+        chunksize=chunksize,
+        quoting=3,  # csv.QUOTE_NONE : les libellés FEC peuvent contenir des guillemets
+        keep_default_na=False,
+        na_values=[""],
+    )
+    for chunk in reader:
+        part = _aggregate_chunk(chunk)
+        total = part if total is None else total.add(part, fill_value=0.0)
+
+    return _to_long(total)
+
+
+def _to_long(total):
+    if total is None:
+        return pd.DataFrame(columns=LONG_COLUMNS)
+
+    df = total.reset_index().sort_values(["annee", "mois", "compte"], ignore_index=True)
+    df["periode"] = pd.to_datetime({"year": df["annee"], "month": df["mois"], "day": 1})
+    df["compte"] = df["compte"].astype("category")
+    return df[LONG_COLUMNS]
+
+
+def _as_text(s):
+    # Colonnes typées par la lecture Excel -> texte au format FEC
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.strftime("%Y%m%d").astype("string")
+    if pd.api.types.is_float_dtype(s):
+        values = s.dropna()
+        # Numéros de compte lus comme flottants (607000.0)
+        if len(values) and (values == values.round()).all() and values.abs().max() >= 1e5:
+            return s.astype("Int64").astype("string")
+    return s.astype("string")
+
+
+def read_fec_frame(df):
+    """
+    Agrège un FEC déjà chargé en DataFrame (classeur Excel, Parquet) au même
+    format long mensuel que `read_fec`.
+    """
+    wanted = {COL_DATE, COL_COMPTE, COL_DEBIT, COL_CREDIT, COL_MONTANT, COL_SENS}
+    columns = {str(c).strip().lower(): c for c in df.columns}
+    if COL_DATE not in columns or COL_COMPTE not in columns:
+        raise FecFormatError("Colonnes EcritureDate / CompteNum absentes du FEC.")
+    chunk = pd.DataFrame({name: _as_text(df[col]) for name, col in columns.items() if name in wanted})
+    return _to_long(_aggregate_chunk(chunk) if len(chunk) else None)
+
+
+def download_fec(dbx, path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Télécharge un FEC texte depuis Dropbox en flux et le lit via `read_fec`.
+    """
+    metadata, res = dbx.files_download(path)
+    try:
+        res.raw.decode_content = True
+        return metadata, read_fec(res.raw, chunksize=chunksize)
+    finally:
+        res.close()
@@ -0,0 +1,242 @@
+"""
+Visualisation paginée côté serveur des grands livres / FEC.
+
+Le DataFrame reste côté serveur ; seules les lignes de la page demandée sont
+envoyées au navigateur. Les filtres s'appuient sur des index construits une
+fois par jeu de données :
+- compte : tableau trié + `searchsorted` (recherche par préfixe) ;
+- journal : positions par code journal ;
+- date : tableau trié + `searchsorted` (plage de dates) ;
+- tri : rangs précalculés (à la demande) par colonne.
+
+Le coût d'une requête dépend du nombre de lignes retenues, pas de la taille
+du fichier.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.dataset_store import frame_nbytes, freeze, get_dataset_store
+
+COMPTE_CANDIDATES = ["comptenum", "compte", "numero de compte", "n° compte"]
+JOURNAL_CANDIDATES = ["journalcode", "journal", "code journal"]
+DATE_CANDIDATES = ["ecrituredate", "date", "periode", "date ecriture"]
+
+DEFAULT_PAGE_SIZE = 100
+# Nombre de combinaisons de filtres mémorisées par visualiseur
+MAX_FILTERS = 16
+
+
+def _find_column(df, candidates):
+    lower = {str(c).strip().lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand in lower:
+            return lower[cand]
+    return None
+
+
+def _to_datetime(s):
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    as_str = s.astype("string").str.strip()
+    dates = pd.to_datetime(as_str, format="%Y%m%d", errors="coerce")
+    missing = dates.isna() & as_str.notna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(as_str[missing], dayfirst=True, errors="coerce")
+    return dates
+
+
+class LedgerView:
+    """
+    Index de filtrage / tri sur un DataFrame d'écritures, requêté page par page.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self.compte_col = _find_column(df, COMPTE_CANDIDATES)
+        self.journal_col = _find_column(df, JOURNAL_CANDIDATES)
+        self.date_col = _find_column(df, DATE_CANDIDATES)
+        self._ranks = {}
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+        self._base_nbytes = None
+        # Appelé quand les caches de tri / filtres grossissent (ré-évaluation du budget)
+        self.on_resize = None
+
+        if self.compte_col is not None:
+            comptes = df[self.compte_col].astype("string").fillna("").str.strip().to_numpy(dtype=object)
+            self._compte_order = np.argsort(comptes, kind="stable")
+            self._comptes_sorted = comptes[self._compte_order].astype(str)
+
+        if self.journal_col is not None:
+            codes, uniques = pd.factorize(df[self.journal_col].astype("string").str.strip(), sort=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.journals = [str(j) for j in uniques]
+            self._journal_positions = {
+                j: order[bounds[i]:bounds[i + 1]] for i, j in enumerate(self.journals)
+            }
+        else:
+            self.journals = []
+
+        if self.date_col is not None:
+            dates = _to_datetime(df[self.date_col]).to_numpy(dtype="datetime64[ns]")
+            self._date_order = np.argsort(dates, kind="stable")
+            self._dates_sorted = dates[self._date_order]
+            valid = ~np.isnat(self._dates_sorted)
+            self.date_min = pd.Timestamp(self._dates_sorted[valid][0]) if valid.any() else None
+            self.date_max = pd.Timestamp(self._dates_sorted[valid][-1]) if valid.any() else None
+
+    @property
+    def nbytes(self):
+        """
+        Mémoire occupée par les données, les index et les caches de tri / filtres
+        (pour le budget du magasin de données).
+        """
+        if self._base_nbytes is None:
+            # Données et index fixes : mesurés une fois
+            total = frame_nbytes(self.df)
+            for name in ("_compte_order", "_comptes_sorted", "_date_order", "_dates_sorted"):
+                if hasattr(self, name):
+                    total += getattr(self, name).nbytes
+            total += sum(p.nbytes for p in getattr(self, "_journal_positions", {}).values())
+            self._base_nbytes = total
+        with self._lock:
+            ranks = sum(order.nbytes + rank.nbytes for order, rank in self._ranks.values())
+            filters = sum(p.nbytes for p in self._filters.values() if p is not None)
+        return self._base_nbytes + ranks + filters
+
+    def _resized(self):
+        if self.on_resize is not None:
+            self.on_resize()
+
+    # -------------------------------------------------------
+    # Filtres indexés -> positions (triées)
+    # -------------------------------------------------------
+    def _positions_compte(self, prefix):
+        lo = np.searchsorted(self._comptes_sorted, prefix, side="left")
+        # Tout compte commençant par `prefix` est < prefix + caractère maximal
+        hi = np.searchsorted(self._comptes_sorted, prefix + "\U0010ffff", side="left")
+        return np.sort(self._compte_order[lo:hi])
+
+    def _positions_journal(self, journals):
+        parts = [self._journal_positions[j] for j in journals if j in self._journal_positions]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+    def _positions_date(self, start, end):
+        lo = 0 if start is None else np.searchsorted(self._dates_sorted, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = len(self._dates_sorted) if end is None else np.searchsorted(
+            self._dates_sorted, np.datetime64(pd.Timestamp(end), "ns"), side="right"
+        )
+        return np.sort(self._date_order[lo:hi])
+
+    def _sort_index(self, column):
+        """
+        Ordre trié et rang de chaque ligne selon `column` (calculés une fois par colonne).
+        """
+        with self._lock:
+            index = self._ranks.get(column)
+            if index is not None:
+                return index
+            order = self.df[column].argsort(kind="stable").to_numpy()
+            rank = np.empty(self.n, dtype=np.int64)
+            rank[order] = np.arange(self.n)
+            index = self._ranks[column] = (order, rank)
+        self._resized()
+        return index
+
+    def _filter(self, compte=None, journals=None, date_start=None, date_end=None):
+        """
+        Positions (triées) des lignes retenues, ou None sans filtre actif.
+
+        Les derniers résultats sont mémorisés : compter puis paginer avec les
+        mêmes filtres ne les évalue qu'une fois.
+        """
+        key = (compte or None, tuple(journals or ()), date_start, date_end)
+        with self._lock:
+            if key in self._filters:
+                self._filters.move_to_end(key)
+                return self._filters[key]
+
+        positions = None
+        filters = []
+        if compte and self.compte_col is not None:
+            filters.append(self._positions_compte(compte.strip()))
+        if journals and self.journal_col is not None:
+            filters.append(self._positions_journal(journals))
+        if (date_start is not None or date_end is not None) and self.date_col is not None:
+            filters.append(self._positions_date(date_start, date_end))
+
+        # Intersection en partant du filtre le plus sélectif
+        for pos in sorted(filters, key=len):
+            positions = pos if positions is None else np.intersect1d(positions, pos, assume_unique=True)
+
+        with self._lock:
+            self._filters[key] = positions
+            while len(self._filters) > MAX_FILTERS:
+                self._filters.popitem(last=False)
+        self._resized()
+        return positions
+
+    # -------------------------------------------------------
+    # Requête
+    # -------------------------------------------------------
+    def count(self, compte=None, journals=None, date_start=None, date_end=None):
+        """
+        Nombre de lignes retenues par les filtres.
+        """
+        positions = self._filter(compte, journals, date_start, date_end)
+        return self.n if positions is None else len(positions)
+
+    def query(self, columns=None, compte=None, journals=None, date_start=None, date_end=None,
+              sort_by=None, ascending=True, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Renvoie (lignes de la page, nombre total de lignes filtrées).
+        """
+        positions = self._filter(compte, journals, date_start, date_end)
+        total = self.n if positions is None else len(positions)
+        start = page * page_size
+        stop = min(start + page_size, total)
+
+        if sort_by is not None:
+            order, rank = self._sort_index(sort_by)
+            if positions is None:
+                # Sans filtre : on ne lit qu'une tranche de l'ordre trié
+                if ascending:
+                    rows = order[start:stop]
+                else:
+                    rows = order[::-1][start:stop]
+            else:
+                keys = rank[positions] if ascending else -rank[positions]
+                rows = positions[np.argsort(keys, kind="stable")][start:stop]
+        else:
+            rows = np.arange(start, stop) if positions is None else positions[start:stop]
+
+        result = self.df.iloc[rows]
+        if columns:
+            result = result[list(columns)]
+        return result, total
+
+
+def get_ledger_view(key, load):
+    """
+    LedgerView partagée par clé (ex. (chemin, rev)) ; `load()` fournit le DataFrame.
+
+    Les visualiseurs vivent dans le magasin de données du processus : leur
+    mémoire (données + index) compte dans son budget global.
+    """
+    store = get_dataset_store()
+    store_key = ("ledger_view",) + tuple(key)
+
+    def load_view():
+        view = LedgerView(freeze(load()))
+        view.on_resize = lambda: store.resize(store_key)
+        return view
+
+    return store.get(store_key, load_view)
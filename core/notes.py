@@ -0,0 +1,196 @@
+"""
+Lecture / écriture des notes Dropbox avec suivi de révision.
+
+- `fetch_if_changed` ne télécharge le fichier que si sa révision a changé
+  depuis la dernière lecture (et ne contacte Dropbox qu'au-delà d'un délai).
+- `save_notes` enregistre en mode « update » conditionné par la révision de
+  base : si un autre administrateur a modifié le fichier entre-temps, Dropbox
+  refuse l'écriture et l'appelant obtient un conflit à résoudre.
+- `merge_texts` fusionne ligne à ligne deux versions issues d'une même base.
+"""
+
+import difflib
+import time
+
+import dropbox
+
+# Délai minimal entre deux vérifications de révision (secondes)
+CHECK_INTERVAL = 60
+
+
+class NotesConflict(Exception):
+    """Le fichier a été modifié sur Dropbox depuis la révision de base."""
+
+    def __init__(self, remote_rev, remote_text):
+        super().__init__("Les notes ont été modifiées par ailleurs.")
+        self.remote_rev = remote_rev
+        self.remote_text = remote_text
+
+
+def _is_not_found(error):
+    return (
+        isinstance(error, dropbox.files.GetMetadataError)
+        and error.is_path()
+        and error.get_path().is_not_found()
+    ) or (
+        isinstance(error, dropbox.files.DownloadError)
+        and error.is_path()
+        and error.get_path().is_not_found()
+    )
+
+
+def fetch_notes(dbx, cache, path):
+    """
+    État des notes {"rev", "text", "checked_at"} ; fichier absent -> texte vide, rev None.
+    """
+    try:
+        metadata, content = cache.download(dbx, path)
+    except dropbox.exceptions.ApiError as e:
+        if _is_not_found(e.error):
+            return {"rev": None, "text": "", "checked_at": time.time()}
+        raise
+    return {"rev": metadata.rev, "text": content.decode("utf-8"), "checked_at": time.time()}
+
+
+def fetch_if_changed(dbx, cache, path, state, force=False, interval=CHECK_INTERVAL):
+    """
+    Renvoie `state` tel quel tant que le délai n'est pas écoulé ou que la
+    révision n'a pas changé ; sinon les notes relues.
+    """
+    if state is None:
+        return fetch_notes(dbx, cache, path)
+    if not force and time.time() - state["checked_at"] < interval:
+        return state
+    try:
+        rev = dbx.files_get_metadata(path).rev
+    except dropbox.exceptions.ApiError as e:
+        if not _is_not_found(e.error):
+            raise
+        rev = None
+    if rev == state["rev"]:
+        return dict(state, checked_at=time.time())
+    return fetch_notes(dbx, cache, path)
+
+
+def save_notes(dbx, cache, path, text, base_rev):
+    """
+    Enregistre `text` si le fichier est toujours à la révision `base_rev`.
+
+    Renvoie le nouvel état ; lève NotesConflict (avec la version distante)
+    si le fichier a changé entre-temps.
+    """
+    data = text.encode("utf-8")
+    if base_rev is None:
+        mode = dropbox.files.WriteMode("add")
+    else:
+        mode = dropbox.files.WriteMode.update(base_rev)
+    try:
+        saved = dbx.files_upload(data, path, mode=mode, autorename=False)
+    except dropbox.exceptions.ApiError as e:
+        error = e.error
+        if (
+            isinstance(error, dropbox.files.UploadError)
+            and error.is_path()
+            and error.get_path().reason.is_conflict()
+        ):
+            remote = fetch_notes(dbx, cache, path)
+            raise NotesConflict(remote["rev"], remote["text"]) from e
+        raise
+    cache.store(path, saved.rev, data, content_hash=saved.content_hash)
+    return {"rev": saved.rev, "text": text, "checked_at": time.time()}
+
+
+def merge_texts(base, mine, theirs):
+    """
+    Fusion à trois voies ligne à ligne.
+
+    Renvoie (texte fusionné, conflits) ; les zones modifiées des deux côtés
+    sont encadrées de marqueurs <<<<<<< / ======= / >>>>>>>.
+    """
+    if mine == theirs or theirs == base:
+        return mine, 0
+    if mine == base:
+        return theirs, 0
+
+    base_lines = base.splitlines(keepends=True)
+    mine_lines = mine.splitlines(keepends=True)
+    theirs_lines = theirs.splitlines(keepends=True)
+
+    def changes(other):
+        # Blocs modifiés : (début base, fin base) -> lignes de remplacement
+        matcher = difflib.SequenceMatcher(None, base_lines, other, autojunk=False)
+        return [(i1, i2, other[j1:j2]) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+    mine_changes = changes(mine_lines)
+    theirs_changes = changes(theirs_lines)
+
+    merged = []
+    conflicts = 0
+    pos = 0
+    mi = ti = 0
+    while mi < len(mine_changes) or ti < len(theirs_changes):
+        m = mine_changes[mi] if mi < len(mine_changes) else None
+        t = theirs_changes[ti] if ti < len(theirs_changes) else None
+        # Un bloc strictement avant l'autre s'applique tel quel
+        if t is None or (m is not None and m[1] < t[0]):
+            merged.extend(base_lines[pos:m[0]])
+            merged.extend(m[2])
+            pos = m[1]
+            mi += 1
+        elif m is None or t[1] < m[0]:
+            merged.extend(base_lines[pos:t[0]])
+            merged.extend(t[2])
+            pos = t[1]
+            ti += 1
+        else:
+            # Blocs qui se touchent ou se recouvrent : on les regroupe
+            start, end = min(m[0], t[0]), max(m[1], t[1])
+            while True:
+                grew = False
+                while mi < len(mine_changes) and mine_changes[mi][0] <= end:
+                    end = max(end, mine_changes[mi][1])
+                    mi += 1
+                    grew = True
+                while ti < len(theirs_changes) and theirs_changes[ti][0] <= end:
+                    end = max(end, theirs_changes[ti][1])
+                    ti += 1
+                    grew = True
+                if not grew:
+                    break
+            mine_part = _apply(base_lines, start, end, mine_changes)
+            theirs_part = _apply(base_lines, start, end, theirs_changes)
+            merged.extend(base_lines[pos:start])
+            if mine_part == theirs_part:
+                merged.extend(mine_part)
+            else:
+                conflicts += 1
+                merged.append("<<<<<<< ma version\n")
+                merged.extend(_ensure_newline(mine_part))
+                merged.append("=======\n")
+                merged.extend(_ensure_newline(theirs_part))
+                merged.append(">>>>>>> version Dropbox\n")
+            pos = end
+    merged.extend(base_lines[pos:])
+    return "".join(merged), conflicts
+
+
+def _apply(base_lines, start, end, changes):
+    """
+    Lignes de la base [start:end] une fois appliqués les blocs de `changes` inclus dans la zone.
+    """
+    out = []
+    pos = start
+    for i1, i2, lines in changes:
+        if i1 < start or i2 > end:
+            continue
+        out.extend(base_lines[pos:i1])
+        out.extend(lines)
+        pos = i2
+    out.extend(base_lines[pos:end])
+    return out
+
+
+def _ensure_newline(lines):
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
@@ -0,0 +1,125 @@
+"""
+Classement vectorisé des comptes PCG par préfixe le plus long.
+
+Les règles (préfixe -> attributs) sont indexées une fois par longueur de
+préfixe. Une colonne `compte` est d'abord factorisée : seuls ses comptes
+distincts sont classés, puis le résultat est rediffusé sur toutes les lignes
+par indexation NumPy. Les comptes déjà vus sont mémorisés, si bien qu'un FEC
+de plusieurs millions de lignes ne paie que pour ses quelques milliers de
+comptes distincts.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Types SIG par classe / sous-classe PCG
+PCG_TYPES = [
+    {"prefixe": "60", "type": "ACH"},
+    {"prefixe": "603", "type": "STK"},
+    {"prefixe": "61", "type": "SEXT"},
+    {"prefixe": "62", "type": "SEXT"},
+    {"prefixe": "63", "type": "IMPOTS"},
+    {"prefixe": "64", "type": "PERSONNEL"},
+    {"prefixe": "65", "type": "AUTRES_CHARGES"},
+    {"prefixe": "66", "type": "CHARGES_FIN"},
+    {"prefixe": "67", "type": "CHARGES_EXC"},
+    {"prefixe": "68", "type": "DOTATIONS"},
+    {"prefixe": "69", "type": "IS"},
+    {"prefixe": "70", "type": "CA"},
+    {"prefixe": "71", "type": "PROD_STOCKEE"},
+    {"prefixe": "72", "type": "PROD_IMMO"},
+    {"prefixe": "74", "type": "SUBVENTIONS"},
+    {"prefixe": "75", "type": "AUTRES_PRODUITS"},
+    {"prefixe": "76", "type": "PRODUITS_FIN"},
+    {"prefixe": "77", "type": "PRODUITS_EXC"},
+    {"prefixe": "78", "type": "REPRISES"},
+    {"prefixe": "79", "type": "TRANSFERTS"},
+]
+
+
+class PcgClassifier:
+    """
+    Associe à chaque compte les attributs de la règle au préfixe le plus long.
+    """
+
+    def __init__(self, rules):
+        # rules : liste de dicts {"prefixe": ..., <attributs>...}
+        rules = pd.DataFrame(rules)
+        if rules["prefixe"].duplicated().any():
+            dups = sorted(rules.loc[rules["prefixe"].duplicated(), "prefixe"])
+            raise ValueError(f"Préfixes PCG en double : {', '.join(dups)}")
+        prefixes = rules.pop("prefixe").astype(str)
+
+        # Table des attributs + une dernière ligne vide pour les comptes non classés
+        self.table = rules.reset_index(drop=True).reindex(range(len(rules) + 1))
+        self._unmatched = len(rules)
+
+        # Index des préfixes par longueur, du plus long au plus court
+        lengths = prefixes.str.len()
+        self._index = [
+            (n, pd.Index(prefixes[lengths == n]), np.flatnonzero(lengths == n))
+            for n in sorted(lengths.unique(), reverse=True)
+        ]
+
+        self._memo = pd.Series(np.empty(0, dtype=np.int64), index=pd.Index([], dtype=object))
+        self._lock = threading.Lock()
+
+    def _rules_for(self, uniques):
+        """
+        Numéro de règle de chaque compte distinct (mémoïsé).
+        """
+        with self._lock:
+            known = self._memo.index.get_indexer(uniques)
+            missing = uniques[known == -1].unique()
+            if len(missing):
+                found = np.full(len(missing), self._unmatched, dtype=np.int64)
+                as_str = missing.to_series().str
+                for n, index, rule_ids in self._index:
+                    todo = found == self._unmatched
+                    if not todo.any():
+                        break
+                    pos = index.get_indexer(as_str[:n][todo])
+                    found[todo] = np.where(pos >= 0, rule_ids[pos], self._unmatched)
+                self._memo = pd.concat([self._memo, pd.Series(found, index=missing)])
+                known = self._memo.index.get_indexer(uniques)
+            return self._memo.to_numpy()[known]
+
+    def classify(self, comptes):
+        """
+        Attributs (une ligne par compte de `comptes`, même ordre) pour une colonne entière.
+        """
+        comptes = pd.Series(comptes)
+        if isinstance(comptes.dtype, pd.CategoricalDtype):
+            codes = comptes.cat.codes.to_numpy()
+            uniques = pd.Index(comptes.cat.categories.astype(str))
+        else:
+            codes, uniques = pd.factorize(comptes)
+            uniques = pd.Index(uniques.astype(str))
+        uniques = pd.Index(uniques.str.strip())
+
+        if len(uniques):
+            rule_of_unique = self._rules_for(uniques)
+            rows = np.where(codes >= 0, rule_of_unique[np.maximum(codes, 0)], self._unmatched)
+        else:
+            rows = np.full(len(comptes), self._unmatched, dtype=np.int64)
+        result = self.table.take(rows)
+        result.index = comptes.index
+        return result
+
+    def memo_size(self):
+        return len(self._memo)
+
+
+_default_classifier = None
+
+
+def get_type_classifier():
+    """
+    Classifieur partagé des types SIG (PCG_TYPES).
+    """
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = PcgClassifier(PCG_TYPES)
+    return _default_classifier
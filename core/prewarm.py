@@ -0,0 +1,217 @@
+"""
+Pré-chargement en tâche de fond des dossiers clients.
+
+Un thread démon parcourt périodiquement tous les dossiers déclarés dans la
+configuration (`dropbox_folders` de chaque utilisateur) pendant une plage
+horaire creuse. Pour chaque dossier dont le grand livre a changé de révision
+(ou a été évincé du magasin de données), il prépare :
+- le téléchargement et le Parquet de la révision (core.columnar) ;
+- le visualiseur indexé (core.ledger_view) ;
+- le SIG N / N-1 (core.datasets.FolderSig).
+
+Le premier utilisateur du matin trouve ainsi tout en mémoire. Un nombre
+borné de dossiers est traité en parallèle pour ne pas saturer Dropbox.
+
+Réglages (variables d'environnement) :
+- BI_PLUS_PREWARM : 0 pour désactiver ;
+- BI_PLUS_PREWARM_WINDOW : plage horaire « début-fin » en heures (22-7 par
+  défaut, peut enjamber minuit ; vide = toute la journée) ;
+- BI_PLUS_PREWARM_WORKERS : dossiers traités en parallèle (2 par défaut) ;
+- BI_PLUS_PREWARM_INTERVAL : secondes entre deux passages (900 par défaut) ;
+- BI_PLUS_PREWARM_DELAY : secondes avant le premier passage (30 par défaut),
+  pour ne pas concurrencer la page de connexion au démarrage à froid.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core.tracing import begin_run
+
+DEFAULT_WINDOW = os.environ.get("BI_PLUS_PREWARM_WINDOW", "22-7")
+DEFAULT_WORKERS = int(os.environ.get("BI_PLUS_PREWARM_WORKERS", 2))
+DEFAULT_INTERVAL = int(os.environ.get("BI_PLUS_PREWARM_INTERVAL", 900))
+DEFAULT_DELAY = int(os.environ.get("BI_PLUS_PREWARM_DELAY", 30))
+ENABLED = os.environ.get("BI_PLUS_PREWARM", "1") != "0"
+
+
+def parse_window(spec):
+    """
+    « 22-7 » -> (22, 7) ; chaîne vide -> None (pas de restriction).
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    start, end = (int(h) for h in spec.split("-"))
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Plage horaire invalide : {spec!r}")
+    return start, end
+
+
+def in_window(window, now=None):
+    if window is None:
+        return True
+    hour = (now or datetime.now()).hour
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class Prewarmer:
+    """
+    Ordonnanceur de pré-chargement ; `folders()` renvoie la liste courante des dossiers.
+    """
+
+    def __init__(
+        self,
+        folders,
+        get_dbx,
+        window=DEFAULT_WINDOW,
+        workers=DEFAULT_WORKERS,
+        interval=DEFAULT_INTERVAL,
+        delay=DEFAULT_DELAY,
+    ):
+        self.folders = folders
+        self.get_dbx = get_dbx
+        self.window = parse_window(window) if isinstance(window, str) else window
+        self.workers = max(1, workers)
+        self.interval = interval
+        self.delay = delay
+        self._status = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._force = False
+        self._thread = None
+        self.last_pass = None
+
+    # -------------------------------------------------------
+    # Boucle
+    # -------------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="bi-plus-prewarm", daemon=True)
+            self._thread.start()
+
+    def trigger(self):
+        """
+        Lance un passage immédiat, même hors plage horaire.
+        """
+        self._force = True
+        self._wake.set()
+
+    def _loop(self):
+        self._wake.wait(self.delay)
+        self._wake.clear()
+        while True:
+            if self._force or in_window(self.window):
+                self._force = False
+                try:
+                    self.run_once()
+                except Exception:
+                    # Le thread ne doit jamais mourir : erreurs par dossier dans status()
+                    pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        """
+        Un passage sur tous les dossiers ; renvoie le nombre de dossiers préparés.
+        """
+        folders = list(self.folders())
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prewarm") as pool:
+            results = list(pool.map(self.warm_folder, folders))
+        self.last_pass = time.time()
+        return sum(1 for r in results if r)
+
+    # -------------------------------------------------------
+    # Un dossier
+    # -------------------------------------------------------
+    def warm_folder(self, folder):
+        """
+        Prépare le dossier si son grand livre a changé ; renvoie True s'il a été (re)calculé.
+        """
+        # Imports différés : la page de connexion démarre l'ordonnanceur sans
+        # charger pandas, pyarrow ni le SDK Dropbox (ils le sont ici, dans le thread)
+        import dropbox
+
+        from core.dataset_store import get_dataset_store
+        from core.datasets import ledger_key, ledger_path, load_folder_sig
+
+        begin_run("prewarm", None, folder)
+        path = ledger_path(folder)
+        start = time.perf_counter()
+        try:
+            dbx = self.get_dbx()
+            rev = dbx.files_get_metadata(path).rev
+            if ("sig",) + ledger_key(folder, path, rev) in get_dataset_store():
+                self._set(folder, rev=rev, checked_at=time.time(), error=None)
+                return False
+            load_folder_sig(dbx, folder, path, rev)
+        except dropbox.exceptions.ApiError as e:
+            self._set(folder, checked_at=time.time(), error=f"Dropbox : {e.error}")
+            return False
+        except Exception as e:
+            self._set(folder, checked_at=time.time(), error=f"{type(e).__name__} : {e}")
+            return False
+        now = time.time()
+        self._set(folder, rev=rev, checked_at=now, warmed_at=now, duration_s=time.perf_counter() - start, error=None)
+        return True
+
+    def _set(self, folder, **fields):
+        with self._lock:
+            self._status.setdefault(folder, {}).update(fields)
+
+    def status(self):
+        """
+        État par dossier : rev, dernière vérification, dernier calcul, durée, erreur.
+        """
+        with self._lock:
+            return {folder: dict(s) for folder, s in self._status.items()}
+
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+
+def start_prewarmer(secrets):
+    """
+    Démarre (une seule fois par processus) le pré-chargement des dossiers configurés.
+
+    La liste des dossiers est relue dans `secrets` à chaque passage : elle
+    suit les changements de la configuration d'auth sans redémarrage.
+
+    Renvoie l'ordonnanceur, ou None si BI_PLUS_PREWARM=0.
+    """
+    global _prewarmer
+    if not ENABLED:
+        return None
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            # Copie des secrets Dropbox : lus depuis un thread hors session Streamlit
+            dropbox_secrets = {
+                k: secrets[k] for k in ("DROPBOX_REFRESH_TOKEN", "DROPBOX_CLIENT_ID", "DROPBOX_CLIENT_SECRET")
+            }
+
+            def get_dbx():
+                from core.storage import get_dropbox_client
+
+                return get_dropbox_client(dropbox_secrets)
+
+            def folders():
+                from core.auth_config import load_auth_config
+
+                # Reparsé seulement si le secret a changé (cf. load_auth_config)
+                return load_auth_config(secrets["auth"]["config"]).all_folders
+
+            _prewarmer = Prewarmer(folders, get_dbx)
+            _prewarmer.start()
+        return _prewarmer
+
+
+def get_prewarmer():
+    return _prewarmer
@@ -0,0 +1,270 @@
+"""
+Moteur générique de Soldes Intermédiaires de Gestion (SIG).
+
+Un SIG est décrit par une table déclarative de lignes :
+- les postes « feuilles » regroupent des comptes PCG par préfixe
+  (le préfixe le plus long l'emporte) avec un signe ;
+- les sous-totaux sont des combinaisons linéaires de postes déjà définis.
+
+`SigEngine.compute` calcule en une seule passe groupby sur les données tous
+les postes, les comparatifs N / N-1 par compte et les séries mensuelles.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.pcg import PcgClassifier
+
+# Mini-SIG de la démo : jusqu'à la marge commerciale
+SIG_MARGE_COMMERCIALE = [
+    {"poste": "Chiffre d'affaires", "prefixes": ["707"]},
+    {"poste": "Achats consommés", "prefixes": ["607"]},
+    {"poste": "Variation de stock", "prefixes": ["603"]},
+    {
+        "poste": "Marge commerciale",
+        "formule": {"Chiffre d'affaires": 1, "Achats consommés": -1, "Variation de stock": -1},
+    },
+]
+
+# SIG complet selon le PCG, jusqu'au résultat de l'exercice.
+# Montants en sens « naturel » : produits positifs au crédit, charges positives au débit.
+SIG_PCG = [
+    {"poste": "Ventes de marchandises", "prefixes": ["707", "7097"]},
+    {"poste": "Coût d'achat des marchandises vendues", "prefixes": ["607", "6037", "6087", "6097"]},
+    {
+        "poste": "Marge commerciale",
+        "formule": {"Ventes de marchandises": 1, "Coût d'achat des marchandises vendues": -1},
+    },
+    {"poste": "Production vendue", "prefixes": ["701", "702", "703", "704", "705", "706", "708", "7091", "7092", "7094", "7095", "7096", "7098"]},
+    {"poste": "Production stockée", "prefixes": ["713"]},
+    {"poste": "Production immobilisée", "prefixes": ["72"]},
+    {
+        "poste": "Production de l'exercice",
+        "formule": {"Production vendue": 1, "Production stockée": 1, "Production immobilisée": 1},
+    },
+    {"poste": "Consommations en provenance des tiers", "prefixes": ["601", "602", "6031", "6032", "604", "605", "606", "6081", "6082", "6091", "6092", "61", "62"]},
+    {
+        "poste": "Valeur ajoutée",
+        "formule": {
+            "Marge commerciale": 1,
+            "Production de l'exercice": 1,
+            "Consommations en provenance des tiers": -1,
+        },
+    },
+    {"poste": "Subventions d'exploitation", "prefixes": ["74"]},
+    {"poste": "Impôts, taxes et versements assimilés", "prefixes": ["63"]},
+    {"poste": "Charges de personnel", "prefixes": ["64"]},
+    {
+        "poste": "Excédent brut d'exploitation",
+        "formule": {
+            "Valeur ajoutée": 1,
+            "Subventions d'exploitation": 1,
+            "Impôts, taxes et versements assimilés": -1,
+            "Charges de personnel": -1,
+        },
+    },
+    {"poste": "Reprises et autres produits d'exploitation", "prefixes": ["75", "781", "791"]},
+    {"poste": "Dotations et autres charges d'exploitation", "prefixes": ["65", "681"]},
+    {
+        "poste": "Résultat d'exploitation",
+        "formule": {
+            "Excédent brut d'exploitation": 1,
+            "Reprises et autres produits d'exploitation": 1,
+            "Dotations et autres charges d'exploitation": -1,
+        },
+    },
+    {"poste": "Produits financiers", "prefixes": ["76", "786", "796"]},
+    {"poste": "Charges financières", "prefixes": ["66", "686"]},
+    {
+        "poste": "Résultat courant avant impôts",
+        "formule": {
+            "Résultat d'exploitation": 1,
+            "Produits financiers": 1,
+            "Charges financières": -1,
+        },
+    },
+    {"poste": "Produits exceptionnels", "prefixes": ["77", "787", "797"]},
+    {"poste": "Charges exceptionnelles", "prefixes": ["67", "687"]},
+    {
+        "poste": "Résultat exceptionnel",
+        "formule": {"Produits exceptionnels": 1, "Charges exceptionnelles": -1},
+    },
+    {"poste": "Participation des salariés", "prefixes": ["691"]},
+    {"poste": "Impôts sur les bénéfices", "prefixes": ["695", "696", "697", "698", "699"]},
+    {
+        "poste": "Résultat de l'exercice",
+        "formule": {
+            "Résultat courant avant impôts": 1,
+            "Résultat exceptionnel": 1,
+            "Participation des salariés": -1,
+            "Impôts sur les bénéfices": -1,
+        },
+    },
+]
+
+
+def add_variations(df):
+    """
+    Ajoute les colonnes Var et Var_% (en %) à un tableau N / N_1.
+    """
+    df["Var"] = df["N"] - df["N_1"]
+    df["Var_%"] = np.where(df["N_1"] != 0, df["Var"] / df["N_1"].where(df["N_1"] != 0, 1) * 100, 0)
+    return df
+
+
+class SigResult:
+    """
+    Résultat d'un calcul SIG : postes, détail par compte et séries mensuelles.
+    """
+
+    def __init__(self, postes, comptes, mensuel):
+        self.postes = postes    # poste, N, N_1, Var, Var_%
+        self.comptes = comptes  # poste, compte, libelle, N, N_1, Var, Var_%
+        self.mensuel = mensuel  # poste, annee, periode, compte, montant
+
+    def poste(self, nom):
+        return self.postes.loc[self.postes["poste"] == nom].iloc[0]
+
+    def detail(self, poste):
+        return self.comptes.loc[self.comptes["poste"] == poste].reset_index(drop=True)
+
+    def monthly(self, poste):
+        return self.mensuel.loc[self.mensuel["poste"] == poste].reset_index(drop=True)
+
+
+class SigEngine:
+    """
+    Calcule un SIG à partir d'une définition déclarative (voir SIG_PCG).
+    """
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.leaves = [l for l in definition if "prefixes" in l]
+        self.formulas = [l for l in definition if "formule" in l]
+        self.order = [l["poste"] for l in definition]
+
+        known = set()
+        for line in definition:
+            for ref in line.get("formule", {}):
+                if ref not in known:
+                    raise ValueError(f"Poste « {ref} » utilisé avant d'être défini ({line['poste']}).")
+            known.add(line["poste"])
+
+        self.classifier = PcgClassifier(
+            [
+                {"prefixe": p, "poste": l["poste"], "signe": float(l.get("signe", 1))}
+                for l in self.leaves
+                for p in l["prefixes"]
+            ]
+        )
+
+    def classify(self, comptes):
+        """
+        Poste et signe de chaque compte (préfixe PCG le plus long), ligne à ligne.
+        """
+        return self.classifier.classify(comptes)
+
+    def compute(self, df, annee_n, annee_n_1, libelles=None):
+        """
+        Calcule le SIG N / N-1 sur `df` (annee, mois, compte, montant[, libelle]).
+
+        Une seule agrégation est faite sur les données ; postes, sous-totaux
+        et détails par compte sont dérivés de ce résultat réduit.
+        """
+        data = df.loc[df["annee"].isin([annee_n, annee_n_1])]
+        classes = self.classify(data["compte"])
+
+        keys = pd.DataFrame(
+            {
+                "poste": classes["poste"].to_numpy(),
+                "compte": data["compte"].astype(str).to_numpy(),
+                "annee": data["annee"].to_numpy(),
+                "mois": data["mois"].to_numpy(),
+            }
+        )
+        montant = data["montant"].to_numpy() * classes["signe"].fillna(0.0).to_numpy(dtype=float)
+        grouped = (
+            pd.Series(montant).groupby([keys[c] for c in keys.columns], sort=False).sum()
+        )
+
+        # Séries mensuelles
+        mensuel = grouped.reset_index(name="montant")
+        mensuel["periode"] = pd.to_datetime({"year": mensuel["annee"], "month": mensuel["mois"], "day": 1})
+        mensuel = mensuel[["poste", "annee", "periode", "compte", "montant"]]
+
+        # Détail par compte N / N-1
+        comptes_df = (
+            grouped.groupby(level=["poste", "compte", "annee"]).sum()
+            .unstack("annee")
+            .reindex(columns=[annee_n, annee_n_1], fill_value=0.0)
+            .fillna(0.0)
+            .rename(columns={annee_n: "N", annee_n_1: "N_1"})
+            .reset_index()
+        )
+        comptes_df.columns.name = None
+        if libelles is None and "libelle" in df.columns:
+            libelles = df.drop_duplicates("compte").set_index("compte")["libelle"]
+        return self._finish(comptes_df, mensuel, libelles)
+
+    def compute_windows(self, acube, window_n, window_n_1, label_n="N", label_n_1="N-1", libelles=None):
+        """
+        Calcule le SIG sur deux fenêtres de mois d'un ArrayCube (exercice,
+        exercice décalé, cumul à date, 12 mois glissants…).
+
+        Les totaux par compte sont lus sur les sommes cumulées du cube : aucun
+        groupby ni pivot sur les données.
+        """
+        classes = self.classify(pd.Series(acube.comptes))
+        keep = classes["poste"].notna().to_numpy()
+        signe = classes["signe"].fillna(0.0).to_numpy(dtype=float)[keep]
+        comptes = acube.comptes[keep]
+        postes = classes["poste"].to_numpy()[keep]
+
+        comptes_df = pd.DataFrame(
+            {
+                "poste": postes,
+                "compte": comptes,
+                "N": acube.total(window_n)[keep] * signe,
+                "N_1": acube.total(window_n_1)[keep] * signe,
+            }
+        )
+        comptes_df = comptes_df[(comptes_df["N"] != 0) | (comptes_df["N_1"] != 0)]
+
+        # Séries mensuelles des deux fenêtres, au format long
+        parts = []
+        for label, window in [(label_n, window_n), (label_n_1, window_n_1)]:
+            values = acube.monthly(window)[:, keep] * signe
+            t, a = np.nonzero(values)
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "poste": postes[a],
+                        "annee": label,
+                        "periode": acube.periods(window).to_numpy()[t],
+                        "compte": comptes[a],
+                        "montant": values[t, a],
+                    }
+                )
+            )
+        mensuel = pd.concat(parts, ignore_index=True)
+        return self._finish(comptes_df, mensuel, libelles)
+
+    def _finish(self, comptes_df, mensuel, libelles):
+        """
+        Libellés, ordre, variations et sous-totaux à partir du détail par compte.
+        """
+        comptes_df.insert(2, "libelle", comptes_df["compte"].map(libelles) if libelles is not None else "")
+        comptes_df["ordre"] = comptes_df["poste"].map({p: i for i, p in enumerate(self.order)})
+        comptes_df = comptes_df.sort_values(["ordre", "compte"]).drop(columns="ordre")
+        add_variations(comptes_df)
+
+        # Postes feuilles puis sous-totaux, dans l'ordre de la définition
+        totaux = comptes_df.groupby("poste")[["N", "N_1"]].sum()
+        totaux = totaux.reindex([l["poste"] for l in self.leaves], fill_value=0.0)
+        for line in self.formulas:
+            coefs = pd.Series(line["formule"], dtype=float)
+            totaux.loc[line["poste"]] = totaux.loc[coefs.index].mul(coefs, axis=0).sum()
+        postes = totaux.reindex(self.order).rename_axis("poste").reset_index()
+        add_variations(postes)
+
+        return SigResult(postes, comptes_df.reset_index(drop=True), mensuel)
@@ -0,0 +1,84 @@
+"""
+Regroupement (« single-flight ») des chargements concurrents identiques.
+
+Quand plusieurs sessions demandent en même temps le même fichier à la même
+révision, un seul téléchargement / parsing est exécuté ; les autres appels
+attendent sa fin et partagent le résultat (ou l'exception).
+"""
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Exécute au plus un appel en vol par clé.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Renvoie `fn()` ; si un appel de même clé est déjà en cours, attend son résultat.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                # Appels en attente d'un chargement en cours
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "coalesced_rate": self.coalesced / total if total else 0.0,
+            }
+
+
+_dataset_flight = SingleFlight()
+
+
+def get_dataset_flight():
+    """
+    Groupe single-flight partagé pour les chargements de jeux de données (clé = chemin, rev).
+    """
+    return _dataset_flight
@@ -0,0 +1,204 @@
+"""
+Client Dropbox partagé par toutes les pages.
+
+- Le jeton d'accès (courte durée) est obtenu via le refresh token et son
+  `expires_in` est suivi : il est renouvelé en arrière-plan avant expiration,
+  et de façon synchrone seulement s'il a déjà expiré.
+- Une seule session HTTP keep-alive, avec pool de connexions, sert à tous
+  les appels (OAuth et API Dropbox).
+- Une seule couche de retries par type d'erreur : les réponses 429 / 5xx
+  des appels API sont rejouées par le SDK Dropbox (backoff exponentiel,
+  Retry-After respecté) ; la session HTTP ne rejoue que les échecs de
+  connexion (requête jamais reçue, donc sans risque même pour un upload).
+  Le renouvellement du jeton, hors SDK, rejoue lui-même les 429 / 5xx.
+"""
+
+import threading
+import time
+
+import dropbox
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TOKEN_URL = "https://api.dropboxapi.com/oauth2/token"
+
+# Renouveler le jeton 5 minutes avant son expiration
+REFRESH_MARGIN = 300
+# Délai avant nouvel essai si un renouvellement en arrière-plan échoue
+REFRESH_RETRY_DELAY = 30
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Retries du SDK Dropbox sur 5xx et sur 429 (seule couche pour les appels API)
+SDK_RETRIES = 4
+# Tentatives de l'appel OAuth de renouvellement du jeton
+TOKEN_ATTEMPTS = 4
+TOKEN_BACKOFF = 0.5
+
+
+def make_http_session(pool_size=16, retries=3, backoff=0.5):
+    """
+    Session requests keep-alive avec pool de connexions.
+
+    Seuls les échecs de connexion sont rejoués ici ; les réponses 429 / 5xx
+    remontent à l'appelant (SDK Dropbox ou TokenManager), qui les rejoue.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=backoff,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class TokenManager:
+    """
+    Jeton d'accès Dropbox renouvelé avant expiration à partir du refresh token.
+    """
+
+    def __init__(self, refresh_token, client_id, client_secret, session,
+                 token_url=TOKEN_URL, margin=REFRESH_MARGIN):
+        self.refresh_token = refresh_token
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.session = session
+        self.token_url = token_url
+        self.margin = margin
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._timer = None
+        self.refresh_count = 0
+
+    def _post_token(self):
+        """
+        Appel OAuth ; les 429 / 5xx sont rejoués (Retry-After respecté).
+        """
+        for attempt in range(TOKEN_ATTEMPTS):
+            response = self.session.post(
+                self.token_url,
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": self.refresh_token,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+                timeout=30,
+            )
+            if response.status_code not in RETRY_STATUSES or attempt == TOKEN_ATTEMPTS - 1:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else TOKEN_BACKOFF * 2 ** attempt)
+        response.raise_for_status()
+        return response.json()
+
+    def _refresh(self):
+        payload = self._post_token()
+        self._token = payload["access_token"]
+        self._expires_at = time.time() + float(payload.get("expires_in", 4 * 3600))
+        self.refresh_count += 1
+        self._schedule(max(self._expires_at - self.margin - time.time(), 1.0))
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            try:
+                self._refresh()
+            except requests.RequestException:
+                # Le jeton courant reste utilisable : on réessaie un peu plus tard
+                self._schedule(REFRESH_RETRY_DELAY)
+
+    def get_token(self):
+        """
+        Jeton valide ; bloque seulement si aucun jeton n'est utilisable.
+        """
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_at - 10:
+                self._refresh()
+            return self._token
+
+    @property
+    def expires_in(self):
+        return max(self._expires_at - time.time(), 0.0)
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+class StorageClient:
+    """
+    Fournit un `dropbox.Dropbox` toujours muni d'un jeton valide.
+    """
+
+    def __init__(self, token_manager, session):
+        self.tokens = token_manager
+        self.session = session
+        self._lock = threading.Lock()
+        self._dbx = None
+        self._dbx_token = None
+
+    @property
+    def dbx(self):
+        token = self.tokens.get_token()
+        with self._lock:
+            if token != self._dbx_token:
+                # Même session HTTP (pool keep-alive) pour chaque client recréé
+                self._dbx = dropbox.Dropbox(
+                    oauth2_access_token=token,
+                    session=self.session,
+                    max_retries_on_error=SDK_RETRIES,
+                    max_retries_on_rate_limit=SDK_RETRIES,
+                )
+                self._dbx_token = token
+            return self._dbx
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_storage_client(secrets, token_url=TOKEN_URL):
+    """
+    Client unique par application Dropbox pour tout le processus.
+
+    `secrets` : mapping contenant DROPBOX_REFRESH_TOKEN, DROPBOX_CLIENT_ID
+    et DROPBOX_CLIENT_SECRET (typiquement `st.secrets`).
+    """
+    key = (secrets["DROPBOX_CLIENT_ID"], token_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            session = make_http_session()
+            tokens = TokenManager(
+                secrets["DROPBOX_REFRESH_TOKEN"],
+                secrets["DROPBOX_CLIENT_ID"],
+                secrets["DROPBOX_CLIENT_SECRET"],
+                session,
+                token_url=token_url,
+            )
+            client = StorageClient(tokens, session)
+            _clients[key] = client
+        return client
+
+
+def get_dropbox_client(secrets):
+    """
+    Raccourci : client `dropbox.Dropbox` prêt à l'emploi.
+    """
+    return get_storage_client(secrets).dbx
@@ -0,0 +1,144 @@
+"""
+Traçage léger des chemins critiques de chaque rerun (Dropbox, parsing, SIG, rendu).
+
+Chaque page ouvre un rerun avec `begin_run(page, user, folder)` puis entoure
+ses étapes de `with span("etape"):`. Les spans peuvent s'imbriquer : chacun
+porte sa profondeur (`depth`, 0 au premier niveau) et seuls ceux de premier
+niveau s'additionnent en durée de rerun. Les spans sont stockés dans un
+buffer circulaire en mémoire, borné, consulté par la page d'administration
+« Performances ».
+
+Désactivé (BI_PLUS_TRACING=0 ou `set_enabled(False)`), `span` renvoie un
+contexte vide partagé : le surcoût se limite à un test de booléen.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = 10_000
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "tags", "start", "depth")
+
+    def __init__(self, tracer, stage, tags):
+        self.tracer = tracer
+        self.stage = stage
+        self.tags = tags
+
+    def __enter__(self):
+        local = self.tracer._local
+        self.depth = getattr(local, "depth", 0)
+        local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        self.tracer._local.depth = self.depth
+        self.tracer._record(self.stage, duration, exc_type is not None, self.tags, self.depth)
+        return False
+
+
+class Tracer:
+    """
+    Collecte des spans dans un buffer circulaire partagé par tout le processus.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=True):
+        self.enabled = enabled
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run_ids = itertools.count(1)
+
+    def begin_run(self, page, user=None, folder=None):
+        """
+        Démarre un rerun pour le thread de script courant (une session Streamlit).
+        """
+        if not self.enabled:
+            return
+        self._local.context = {
+            "run_id": next(self._run_ids),
+            "page": page,
+            "user": user,
+            "folder": folder,
+        }
+
+    def tag(self, **tags):
+        """
+        Complète le contexte du rerun courant (ex. dossier connu après coup).
+        """
+        context = getattr(self._local, "context", None)
+        if self.enabled and context is not None:
+            context.update(tags)
+
+    def span(self, stage, **tags):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, stage, tags)
+
+    def _record(self, stage, duration, failed, tags, depth=0):
+        context = getattr(self._local, "context", None) or {}
+        entry = {
+            "ts": time.time(),
+            "run_id": context.get("run_id"),
+            "page": context.get("page"),
+            "user": context.get("user"),
+            "folder": context.get("folder"),
+            "stage": stage,
+            "depth": depth,
+            "duration_ms": duration * 1000.0,
+            "error": failed,
+        }
+        if tags:
+            entry.update(tags)
+        with self._lock:
+            self._spans.append(entry)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    @property
+    def capacity(self):
+        return self._spans.maxlen
+
+
+_tracer = Tracer(enabled=os.environ.get("BI_PLUS_TRACING", "1") != "0")
+
+
+def get_tracer():
+    return _tracer
+
+
+def begin_run(page, user=None, folder=None):
+    _tracer.begin_run(page, user, folder)
+
+
+def span(stage, **tags):
+    return _tracer.span(stage, **tags)
+
+
+def set_enabled(enabled):
+    _tracer.enabled = enabled
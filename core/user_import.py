@@ -0,0 +1,201 @@
+"""
+Import en masse d'utilisateurs (CSV ou YAML) pour la page d'administration.
+
+Toutes les lignes sont validées avant le moindre hachage : un fichier avec
+une erreur n'est pas importé à moitié. Les mots de passe sont ensuite hachés
+(bcrypt, via streamlit-authenticator) par lots dans un pool de processus,
+le coût bcrypt étant purement CPU.
+
+CSV attendu (séparateur , ou ;) :
+    username,name,email,role,dropbox_folders,password
+    jdupont,Jean Dupont,jd@cabinet.fr,viewer,/BI_PLUS/clients/c1|/BI_PLUS/clients/c2,secret
+
+YAML : liste d'utilisateurs avec les mêmes champs (dropbox_folders en liste),
+ou mapping username -> champs comme dans `credentials.usernames`. Les mots de
+passe déjà hachés (bcrypt, cas d'un export de `credentials`) sont repris tels
+quels.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import yaml
+
+ROLES = ["admin", "viewer"]
+FIELDS = ["username", "name", "email", "role", "dropbox_folders", "password"]
+FOLDER_SEPARATORS = r"[|\n]"
+BATCH_SIZE = 8
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_USERNAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+# Même motif que stauth.Hasher.is_hash (sans importer streamlit-authenticator)
+_BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d+\$.{53}$")
+
+
+class ImportFormatError(ValueError):
+    """Fichier illisible (format, colonnes manquantes)."""
+
+
+# -------------------------------------------------------
+# Lecture
+# -------------------------------------------------------
+def parse_users_file(filename, content):
+    """
+    Lignes brutes (dicts) d'un fichier CSV ou YAML, numérotées à partir de 1.
+    """
+    text = content.decode("utf-8-sig") if isinstance(content, bytes) else content
+    if filename.lower().endswith((".yaml", ".yml")):
+        data = yaml.safe_load(text) or []
+        if isinstance(data, dict):
+            data = data.get("credentials", {}).get("usernames", data)
+            data = [dict(info or {}, username=name) for name, info in data.items()]
+        if not isinstance(data, list) or not all(isinstance(r, dict) for r in data):
+            raise ImportFormatError("Le YAML doit contenir une liste d'utilisateurs.")
+        rows = data
+    else:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;")
+        reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+        missing = [f for f in ("username", "password") if f not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFormatError(f"Colonnes obligatoires absentes : {', '.join(missing)}")
+        rows = list(reader)
+    return [(i, r) for i, r in enumerate(rows, 1)]
+
+
+def _folders(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = re.split(FOLDER_SEPARATORS, str(value))
+    return [str(f).strip() for f in items if str(f).strip()]
+
+
+# -------------------------------------------------------
+# Validation
+# -------------------------------------------------------
+def validate_rows(rows, existing_usernames):
+    """
+    Valide toutes les lignes ; renvoie (utilisateurs normalisés, erreurs).
+
+    Les erreurs sont des chaînes « ligne N : … » ; s'il y en a, rien ne doit
+    être importé.
+    """
+    users, errors = [], []
+    seen = set()
+    for line, row in rows:
+        username = str(row.get("username") or "").strip()
+        password = str(row.get("password") or "")
+        role = str(row.get("role") or "viewer").strip().lower()
+        email = str(row.get("email") or "").strip()
+        folders = _folders(row.get("dropbox_folders"))
+
+        problems = []
+        if not username:
+            problems.append("username manquant")
+        elif not _USERNAME.match(username):
+            problems.append(f"username « {username} » invalide")
+        elif username in existing_usernames:
+            problems.append(f"« {username} » existe déjà")
+        elif username in seen:
+            problems.append(f"« {username} » en double dans le fichier")
+        if not password:
+            problems.append("mot de passe manquant")
+        if role not in ROLES:
+            problems.append(f"rôle « {role} » inconnu ({' / '.join(ROLES)})")
+        if email and not _EMAIL.match(email):
+            problems.append(f"email « {email} » invalide")
+        bad_folders = [f for f in folders if not f.startswith("/")]
+        if bad_folders:
+            problems.append(f"dossier(s) sans / initial : {', '.join(bad_folders)}")
+
+        if problems:
+            errors.append(f"ligne {line} : " + " ; ".join(problems))
+            continue
+        seen.add(username)
+        users.append(
+            {
+                "username": username,
+                "name": str(row.get("name") or "").strip(),
+                "email": email,
+                "role": role,
+                "dropbox_folders": folders,
+                "password": password,
+            }
+        )
+    return users, errors
+
+
+# -------------------------------------------------------
+# Hachage parallèle
+# -------------------------------------------------------
+def is_password_hash(value):
+    """
+    True si `value` est déjà un hash bcrypt (à ne pas hacher une seconde fois).
+    """
+    return bool(_BCRYPT_HASH.match(value))
+
+
+def _hash_batch(args):
+    index, passwords = args
+    # Import local : streamlit-authenticator n'est chargé que dans les processus de hachage
+    import streamlit_authenticator as stauth
+
+    start = time.perf_counter()
+    hashes = [stauth.Hasher().hash(p) for p in passwords]
+    return index, hashes, time.perf_counter() - start
+
+
+def hash_passwords(passwords, workers=None, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Hache `passwords` par lots dans un pool de processus.
+
+    Les valeurs déjà hachées sont renvoyées telles quelles. Renvoie (hashes
+    dans l'ordre d'entrée, minutages par lot). `on_batch(done, total)` est
+    appelé à chaque lot terminé (barre de progression).
+    """
+    result = list(passwords)
+    todo = [i for i, p in enumerate(passwords) if not is_password_hash(p)]
+    plain = [passwords[i] for i in todo]
+    batches = [(i, plain[i:i + batch_size]) for i in range(0, len(plain), batch_size)]
+    hashes = [None] * len(plain)
+    timings = []
+    if not batches:
+        return result, timings
+
+    workers = min(len(batches), workers or os.cpu_count() or 1)
+    # « spawn » : ne pas forker le processus Streamlit multi-threadé
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_hash_batch, batch) for batch in batches]
+        for done, future in enumerate(as_completed(futures), 1):
+            index, batch_hashes, seconds = future.result()
+            hashes[index:index + len(batch_hashes)] = batch_hashes
+            timings.append({"lot": index // batch_size + 1, "utilisateurs": len(batch_hashes), "secondes": round(seconds, 3)})
+            if on_batch is not None:
+                on_batch(done, len(batches))
+    timings.sort(key=lambda t: t["lot"])
+    for i, password_hash in zip(todo, hashes):
+        result[i] = password_hash
+    return result, timings
+
+
+def add_users(config, users, hashes):
+    """
+    Ajoute les utilisateurs validés (mots de passe hachés) à `config`.
+    """
+    target = config["credentials"]["usernames"]
+    for user, password_hash in zip(users, hashes):
+        target[user["username"]] = {
+            "email": user["email"],
+            "name": user["name"],
+            "password": password_hash,
+            "role": user["role"],
+            "dropbox_folders": user["dropbox_folders"],
+        }
+    return config
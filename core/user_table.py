@@ -0,0 +1,121 @@
+"""
+Table des utilisateurs pour la page d'administration.
+
+La table (une ligne par utilisateur) et ses index de recherche sont construits
+une seule fois par version de la configuration d'auth :
+- username trié + `searchsorted` pour la saisie semi-automatique par préfixe ;
+- texte « username nom email » en minuscules pour la recherche libre ;
+- positions par dossier pour le filtre par dossier.
+
+Recherche, filtres et pagination sont faits côté serveur : seule la page
+affichée part vers le navigateur.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 50
+SUGGESTIONS = 20
+TABLE_COLUMNS = ["username", "name", "email", "role", "nb_dossiers", "dropbox_folders"]
+
+
+class UserIndex:
+    """
+    Table des utilisateurs + index de recherche, pour une version de la config.
+    """
+
+    def __init__(self, auth):
+        users = auth.users
+        usernames = list(users)
+        folders = [list(users[u].get("dropbox_folders", [])) for u in usernames]
+        self.table = pd.DataFrame(
+            {
+                "username": usernames,
+                "name": [users[u].get("name", "") or "" for u in usernames],
+                "email": [users[u].get("email", "") or "" for u in usernames],
+                "role": [auth.role(u) for u in usernames],
+                "nb_dossiers": [len(f) for f in folders],
+                "dropbox_folders": [", ".join(f) for f in folders],
+            },
+            columns=TABLE_COLUMNS,
+        )
+
+        lower = np.array([u.lower() for u in usernames], dtype=object)
+        self._order = np.argsort(lower, kind="stable")
+        self._sorted = lower[self._order].astype(str)
+        self._haystack = (
+            self.table["username"] + " " + self.table["name"] + " " + self.table["email"]
+        ).str.lower()
+        self._roles = self.table["role"].to_numpy()
+        self._folder_positions = {}
+        for i, user_folders in enumerate(folders):
+            for folder in user_folders:
+                self._folder_positions.setdefault(folder.lower(), []).append(i)
+
+    def __len__(self):
+        return len(self.table)
+
+    def _prefix_positions(self, prefix):
+        prefix = prefix.lower()
+        lo = np.searchsorted(self._sorted, prefix, side="left")
+        hi = np.searchsorted(self._sorted, prefix + "\U0010ffff", side="left")
+        return self._order[lo:hi]
+
+    def suggest(self, query, limit=SUGGESTIONS):
+        """
+        Usernames pour la saisie semi-automatique : préfixes d'abord, puis
+        correspondances dans le nom ou l'email.
+        """
+        query = (query or "").strip()
+        if not query:
+            return [self.table["username"].iat[i] for i in self._order[:limit]]
+        positions = list(self._prefix_positions(query)[:limit])
+        if len(positions) < limit:
+            seen = set(positions)
+            contains = np.flatnonzero(self._haystack.str.contains(query.lower(), regex=False).to_numpy())
+            positions += [i for i in contains if i not in seen][: limit - len(positions)]
+        return [self.table["username"].iat[i] for i in positions]
+
+    def search(self, query=None, role=None, folder=None):
+        """
+        Positions (triées par username) des utilisateurs retenus.
+        """
+        mask = np.ones(len(self.table), dtype=bool)
+        query = (query or "").strip().lower()
+        if query:
+            mask &= self._haystack.str.contains(query, regex=False).to_numpy()
+        if role:
+            mask &= self._roles == role
+        if folder:
+            folder = folder.strip().lower()
+            keep = np.zeros(len(self.table), dtype=bool)
+            for name, positions in self._folder_positions.items():
+                if name.startswith(folder):
+                    keep[positions] = True
+            mask &= keep
+        return self._order[mask[self._order]]
+
+    def page(self, positions, page=1, page_size=DEFAULT_PAGE_SIZE):
+        """
+        (lignes de la page, nombre total de résultats).
+        """
+        start = (max(page, 1) - 1) * page_size
+        rows = self.table.iloc[positions[start:start + page_size]].reset_index(drop=True)
+        return rows, len(positions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_user_index(auth):
+    """
+    Index partagé pour la config courante (reconstruit seulement si elle change).
+    """
+    global _index
+    with _index_lock:
+        if _index is None or _index[0] != auth.digest:
+            _index = (auth.digest, UserIndex(auth))
+        return _index[1]
@@ -1,34 +1,28 @@
 import streamlit as st
-import yaml
+
+from core.acl import AccessDenied, guarded_client
+from core.auth_config import load_auth_config
+from core.prewarm import start_prewarmer
+from core.tracing import begin_run, span
 
 st.set_page_config(page_title="Accueil BI+", layout="centered")
 
 # Charger config utilisateurs
-config = yaml.safe_load(st.secrets["auth"]["config"])
+auth = load_auth_config(st.secrets["auth"]["config"])
 
 # Sécurité : vérifier authentification
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
     st.switch_page("app.py")
 
 username = st.session_state["username"]
-user_info = config["credentials"]["usernames"][username]
-role = user_info.get("role", "viewer")
 
 st.title("🏠 Accueil BI+")
 
 # ------------------------------------------
 # DÉTERMINATION DES DOSSIERS ACCESSIBLES
 # ------------------------------------------
-if role == "admin":
-    # Admin = accès à tous les dossiers de tous les utilisateurs
-    all_folders = []
-    for u, info in config["credentials"]["usernames"].items():
-        all_folders.extend(info.get("dropbox_folders", []))
-
-    folders = sorted(set(all_folders))
-else:
-    # Viewer = seulement ses dossiers autorisés
-    folders = user_info.get("dropbox_folders", [])
+# Admin = accès à tous les dossiers (index précalculé), viewer = ses dossiers autorisés
+folders = auth.folders_for(username)
 
 if not folders:
     st.error("Aucun dossier Dropbox autorisé pour cet utilisateur.")
@@ -50,6 +44,54 @@ st.session_state["selected_folder"] = selected_folder
 
 st.success(f"📂 Dossier actif : `{selected_folder}`")
 
+# ------------------------------------------
+# CHIFFRES CLÉS DU DOSSIER
+# ------------------------------------------
+# Préparés en tâche de fond (core.prewarm) : instantanés si la révision n'a pas changé
+start_prewarmer(st.secrets)
+begin_run("1_Accueil", username, selected_folder)
+
+
+def charger_chiffres_cles(folder):
+    """
+    SIG du dossier, ou None (message affiché) si le grand livre est absent ou illisible.
+
+    Imports locaux : pandas, pyarrow et le SDK Dropbox ne sont chargés
+    qu'une fois le sélecteur de dossier affiché.
+    """
+    import dropbox
+
+    from core.datasets import ledger_path, load_folder_sig
+    from core.fec import FecFormatError
+    from core.storage import get_dropbox_client
+
+    dbx = guarded_client(get_dropbox_client(st.secrets), auth, username, st.session_state)
+    path = ledger_path(folder)
+    try:
+        with span("dropbox_metadata"):
+            rev = dbx.files_get_metadata(path).rev
+        return load_folder_sig(dbx, folder, path, rev)
+    except AccessDenied:
+        st.error("⛔ Accès refusé à ce dossier.")
+    except dropbox.exceptions.ApiError:
+        st.info("Aucun grand livre trouvé pour ce dossier.")
+    except FecFormatError as e:
+        st.warning(f"Grand livre illisible : {e}")
+    except Exception as e:
+        # Classeur corrompu, réseau... : l'accueil reste utilisable sans chiffres clés
+        st.warning(f"Chiffres clés indisponibles : {e}")
+    return None
+
+
+with st.spinner("Calcul des chiffres clés…"):
+    folder_sig = charger_chiffres_cles(selected_folder)
+
+if folder_sig is not None and folder_sig.annee_n is not None:
+    st.subheader(f"📈 Chiffres clés {folder_sig.annee_n} (vs {folder_sig.annee_n_1})")
+    figures = folder_sig.key_figures()
+    for col, (poste, (n, n_1, var_pct)) in zip(st.columns(len(figures)), figures.items()):
+        col.metric(poste, f"{n:,.0f} €".replace(",", " "), f"{var_pct:+.1f} %" if n_1 else None)
+
 st.markdown("---")
 
 # Menu / boutons pour accès rapide
@@ -1,35 +1,13 @@
 import streamlit as st
 import dropbox
-import requests
-import pandas as pd
-from io import BytesIO
 
-# Fonction pour récupérer un access token via le refresh token
-def get_fresh_access_token():
-    """
-    Récupère un nouveau access_token via le refresh_token Dropbox.
-    """
-    token_url = "https://api.dropboxapi.com/oauth2/token"
-
-    data = {
-        "grant_type": "refresh_token",
-        "refresh_token": st.secrets["DROPBOX_REFRESH_TOKEN"],
-        "client_id": st.secrets["DROPBOX_CLIENT_ID"],
-        "client_secret": st.secrets["DROPBOX_CLIENT_SECRET"],
-    }
-
-    response = requests.post(token_url, data=data)
-    response.raise_for_status()
-    return response.json()["access_token"]
-
-# Crée un client Dropbox avec un access token valide
-@st.cache_resource(show_spinner=False)
-def get_dropbox_client():
-    """
-    Crée un client Dropbox toujours valide.
-    """
-    access_token = get_fresh_access_token()
-    return dropbox.Dropbox(access_token)
+from core.acl import AccessDenied, guarded_client
+from core.auth_config import load_auth_config
+from core.datasets import ledger_path, load_ledger_view
+from core.dropbox_cache import get_download_cache
+from core.singleflight import get_dataset_flight
+from core.storage import get_dropbox_client
+from core.tracing import begin_run, span
 
 # Assurer que l'utilisateur est connecté
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -42,23 +20,87 @@ if "selected_folder" not in st.session_state:
     st.stop()
 
 folder = st.session_state["selected_folder"]
+begin_run("2_Excel", st.session_state.get("username"), folder)
 
 # Affichage du titre
 st.title("📊 Données Excel")
 
-# Récupérer le client Dropbox
-dbx = get_dropbox_client()
+# Client Dropbox restreint aux dossiers autorisés de l'utilisateur
+auth = load_auth_config(st.secrets["auth"]["config"])
+dbx = guarded_client(get_dropbox_client(st.secrets), auth, st.session_state["username"], st.session_state)
 
 # Récupérer le chemin du fichier Excel dans Dropbox
-excel_path = f"{folder}/dossiers/2023/essai_fec.xlsx"  # Remplace ce chemin selon ton organisation
+excel_path = ledger_path(folder)
 
 # Tentative de téléchargement du fichier depuis Dropbox
+view = None
 try:
-    metadata, res = dbx.files_download(excel_path)
-    # Lire le contenu Excel avec pandas
-    df = pd.read_excel(BytesIO(res.content))
-    st.dataframe(df, use_container_width=True)
+    with span("dropbox_metadata"):
+        metadata = dbx.files_get_metadata(excel_path)
+    # Parquet par révision : le classeur n'est relu via openpyxl que s'il a changé.
+    # Les sessions concurrentes sur le même (dossier, fichier, rev) partagent un seul
+    # chargement, et les index du visualiseur sont construits une fois par révision
+    # puis conservés (en lecture seule) dans le magasin de données du processus.
+    # Le pré-chargement de nuit (core.prewarm) les a souvent déjà préparés.
+    with span("load"):
+        view = load_ledger_view(dbx, folder, excel_path, metadata.rev)
+except AccessDenied:
+    st.error("⛔ Accès refusé à ce dossier.")
 except dropbox.exceptions.ApiError as e:
     st.error(f"Erreur lors du téléchargement du fichier : {e}")
 except Exception as e:
     st.error(f"Erreur inconnue : {e}")
+
+# Visualiseur paginé : seules les lignes de la page courante partent vers le navigateur
+if view is not None:
+    with span("render"):
+        all_columns = list(view.df.columns)
+
+        with st.expander("🔎 Filtres et colonnes", expanded=False):
+            columns = st.multiselect("Colonnes affichées", all_columns, default=all_columns)
+            f1, f2, f3 = st.columns(3)
+            compte_filter = f1.text_input(
+                "Compte (préfixe)", disabled=view.compte_col is None, placeholder="ex. 607"
+            )
+            journal_filter = f2.multiselect("Journaux", view.journals, disabled=not view.journals)
+            date_filter = ()
+            if view.date_col is not None and view.date_min is not None:
+                date_filter = f3.date_input(
+                    "Période",
+                    value=(view.date_min.date(), view.date_max.date()),
+                    min_value=view.date_min.date(),
+                    max_value=view.date_max.date(),
+                )
+            s1, s2, s3 = st.columns(3)
+            sort_by = s1.selectbox("Trier par", [None] + all_columns, format_func=lambda c: "—" if c is None else str(c))
+            ascending = s2.radio("Ordre", ["Croissant", "Décroissant"], horizontal=True) == "Croissant"
+            page_size = s3.selectbox("Lignes par page", [50, 100, 250, 500], index=1)
+
+        date_start, date_end = (date_filter + (None, None))[:2] if isinstance(date_filter, tuple) else (date_filter, None)
+
+        total = view.count(
+            compte=compte_filter, journals=journal_filter, date_start=date_start, date_end=date_end
+        )
+        nb_pages = max((total - 1) // page_size + 1, 1)
+        page = st.number_input(f"Page (sur {nb_pages})", min_value=1, max_value=nb_pages, value=1) - 1
+
+        page_df, total = view.query(
+            columns=columns or None,
+            compte=compte_filter,
+            journals=journal_filter,
+            date_start=date_start,
+            date_end=date_end,
+            sort_by=sort_by,
+            ascending=ascending,
+            page=page,
+            page_size=page_size,
+        )
+        st.dataframe(page_df, use_container_width=True)
+        st.caption(f"{total:,} ligne(s) filtrée(s) sur {view.n:,}".replace(",", " "))
+
+cache_stats = get_download_cache().stats()
+st.caption(
+    f"Cache Dropbox : {cache_stats['hits']} hit(s) / {cache_stats['misses']} miss(es) "
+    f"– {cache_stats['bytes_saved'] / 1e6:.1f} Mo de téléchargements évités "
+    f"– {get_dataset_flight().stats()['coalesced']} chargement(s) mutualisé(s)"
+)
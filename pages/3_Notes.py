@@ -1,48 +1,18 @@
 import streamlit as st
-import yaml
-import streamlit_authenticator as stauth
 import dropbox
-import requests
-import pandas as pd
-from io import BytesIO
 
-# Fonction pour récupérer un access token via le refresh token
-def get_fresh_access_token():
-    """
-    Récupère un nouveau access_token via le refresh_token Dropbox.
-    """
-    token_url = "https://api.dropboxapi.com/oauth2/token"
-
-    data = {
-        "grant_type": "refresh_token",
-        "refresh_token": st.secrets["DROPBOX_REFRESH_TOKEN"],
-        "client_id": st.secrets["DROPBOX_CLIENT_ID"],
-        "client_secret": st.secrets["DROPBOX_CLIENT_SECRET"],
-    }
-
-    response = requests.post(token_url, data=data)
-    response.raise_for_status()
-    return response.json()["access_token"]
-
-# Crée un client Dropbox avec un access token valide
-@st.cache_resource(show_spinner=False)
-def get_dropbox_client():
-    """
-    Crée un client Dropbox toujours valide.
-    """
-    access_token = get_fresh_access_token()
-    return dropbox.Dropbox(access_token)
+from core.acl import AccessDenied, guarded_client
+from core.auth_config import get_authenticator, load_auth_config
+from core.dropbox_cache import get_download_cache
+from core.notes import NotesConflict, fetch_if_changed, merge_texts, save_notes
+from core.storage import get_dropbox_client
+from core.tracing import begin_run, span
 
 # Chargement de la configuration
-config = yaml.safe_load(st.secrets["auth"]["config"])
+auth = load_auth_config(st.secrets["auth"]["config"])
 
 # Instancier l'authentificateur
-authenticator = stauth.Authenticate(
-    config["credentials"],
-    config["cookie"]["name"],
-    config["cookie"]["key"],
-    config["cookie"]["expiry_days"]
-)
+authenticator = get_authenticator(auth)
 
 # Authentification de l'utilisateur
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -56,12 +26,12 @@ authenticator.logout("Déconnexion", "sidebar")
 username = st.session_state["username"]
 
 # Vérifier que l'utilisateur existe dans les credentials
-if username not in config["credentials"]["usernames"]:
+if not auth.has_user(username):
     st.error("Utilisateur non trouvé.")
     st.stop()
 
 # Récupérer les informations de l'utilisateur
-user_info = config["credentials"]["usernames"][username]
+user_info = auth.users[username]
 
 # Vérifier que 'dropbox_folders' existe dans l'info utilisateur
 if "dropbox_folders" not in user_info:
@@ -72,8 +42,11 @@ if "dropbox_folders" not in user_info:
 role = user_info["role"]
 folders = user_info["dropbox_folders"]
 
-# Sélectionner le premier dossier de la liste
-folder = folders[0]
+# Dossier actif choisi sur l'accueil s'il est autorisé, sinon le premier de la liste
+selected = st.session_state.get("selected_folder")
+folder = selected if selected in auth.folders_for(username) else folders[0]
+
+begin_run("3_Notes", username, folder)
 
 # Afficher les informations de l'utilisateur pour déboguer
 st.write(f"Dossier Dropbox de l'utilisateur {username}: {folder}")
@@ -81,34 +54,138 @@ st.write(f"Dossier Dropbox de l'utilisateur {username}: {folder}")
 # Chemin vers le fichier des notes dans Dropbox
 NOTES_PATH = folder + "/notes.md"
 
-# Créer un client Dropbox
-dbx = get_dropbox_client()
+# Client Dropbox restreint aux dossiers autorisés de l'utilisateur
+dbx = guarded_client(get_dropbox_client(st.secrets), auth, username, st.session_state)
+try:
+    dbx.check(NOTES_PATH)
+except AccessDenied:
+    st.error("⛔ Accès refusé à ce dossier.")
+    st.stop()
 
 # Titre de la page
 st.title("📝 Notes")
 
-# Lire les notes depuis Dropbox
+# Clés de session de la page
+state_key = f"notes::{NOTES_PATH}"
+edit_key = f"notes_edit::{NOTES_PATH}"  # base de l'édition en cours : {"rev", "text"}
+text_key = f"notes_text::{NOTES_PATH}"
+merged_key = f"notes_merged::{NOTES_PATH}"
+conflict_key = f"notes_conflict::{NOTES_PATH}"
+flash_key = f"notes_flash::{NOTES_PATH}"
+download_cache = get_download_cache()
+
+
+def enregistrer(text, base_rev, base_text):
+    """
+    Enregistre les notes ; en cas de modification concurrente, prépare la fusion.
+
+    Appelé depuis les callbacks des formulaires, donc avant la relecture des
+    notes : le texte saisi et sa révision de base ne peuvent pas être remplacés
+    par la version distante. Le message à afficher est conservé en session.
+    """
+    try:
+        with span("dropbox_upload"):
+            st.session_state[state_key] = save_notes(dbx, download_cache, NOTES_PATH, text, base_rev)
+    except NotesConflict as c:
+        merged, nb_conflicts = merge_texts(base_text, text, c.remote_text)
+        st.session_state[conflict_key] = {
+            "mine": text,
+            "remote_rev": c.remote_rev,
+            "remote_text": c.remote_text,
+            "merged": merged,
+            "conflicts": nb_conflicts,
+        }
+        st.session_state[merged_key] = merged
+    except dropbox.exceptions.ApiError as e:
+        # La saisie et sa base sont conservées pour pouvoir réessayer
+        st.session_state[flash_key] = ("error", f"Erreur lors de l'enregistrement des notes : {e}")
+        return
+    else:
+        st.session_state.pop(conflict_key, None)
+        st.session_state.pop(merged_key, None)
+        st.session_state[flash_key] = ("success", "Notes enregistrées.")
+    # Enregistré ou passé en fusion : la prochaine édition repart des notes à jour
+    st.session_state.pop(edit_key, None)
+    st.session_state.pop(text_key, None)
+
+
+def on_save():
+    edit = st.session_state[edit_key]
+    enregistrer(st.session_state[text_key], edit["rev"], edit["text"])
+
+
+def on_save_merged():
+    conflict = st.session_state[conflict_key]
+    enregistrer(st.session_state[merged_key], conflict["remote_rev"], conflict["remote_text"])
+
+
+def on_keep_mine():
+    conflict = st.session_state[conflict_key]
+    enregistrer(conflict["mine"], conflict["remote_rev"], conflict["remote_text"])
+
+
+def on_take_remote():
+    st.session_state.pop(conflict_key, None)
+    st.session_state.pop(merged_key, None)
+    st.session_state.pop(state_key, None)  # relecture forcée ci-dessous
+
+
+# Lire les notes : téléchargement seulement si la révision Dropbox a changé
+force_refresh = st.button("🔄 Recharger depuis Dropbox")
+if force_refresh:
+    # Recharger abandonne l'édition en cours
+    st.session_state.pop(edit_key, None)
+    st.session_state.pop(text_key, None)
 try:
-    meta, res = dbx.files_download(NOTES_PATH)
-    notes = res.content.decode("utf-8")
+    with span("dropbox_download"):
+        st.session_state[state_key] = fetch_if_changed(
+            dbx, download_cache, NOTES_PATH, st.session_state.get(state_key), force=force_refresh
+        )
 except dropbox.exceptions.ApiError as e:
     st.error(f"Erreur lors du téléchargement des notes : {e}")
-    notes = ""  # Si l'erreur survient, on laisse les notes vides
+    st.session_state.setdefault(state_key, {"rev": None, "text": "", "checked_at": 0.0})
+
+notes_state = st.session_state[state_key]
+notes = notes_state["text"]
+
+flash = st.session_state.pop(flash_key, None)
+if flash is not None:
+    getattr(st, flash[0])(flash[1])
 
 # Affichage en fonction du rôle de l'utilisateur
 if role == "admin":
-    # L'administrateur peut modifier les notes
-    edited = st.text_area("Éditer les notes", notes, height=300)
-    if st.button("💾 Enregistrer"):
-        try:
-            dbx.files_upload(
-                edited.encode("utf-8"),
-                NOTES_PATH,
-                mode=dropbox.files.WriteMode("overwrite")
+    conflict = st.session_state.get(conflict_key)
+    if conflict is None:
+        edit = st.session_state.get(edit_key)
+        if edit is not None and edit["rev"] != notes_state["rev"] and st.session_state.get(text_key) == edit["text"]:
+            # Rien n'a été saisi depuis la dernière lecture : suivre la version distante
+            edit = None
+        if edit is None:
+            st.session_state[edit_key] = {"rev": notes_state["rev"], "text": notes}
+            st.session_state[text_key] = notes
+        # Formulaire : la saisie ne déclenche aucun rerun (donc aucun appel Dropbox)
+        with st.form("notes_form"):
+            st.text_area("Éditer les notes", key=text_key, height=300)
+            st.form_submit_button("💾 Enregistrer", on_click=on_save)
+    else:
+        # Un autre administrateur a enregistré entre-temps : proposer la fusion
+        st.warning(
+            "⚠️ Les notes ont été modifiées sur Dropbox pendant votre édition. "
+            + (
+                f"{conflict['conflicts']} zone(s) en conflit sont marquées ci-dessous."
+                if conflict["conflicts"]
+                else "Vos modifications ont pu être fusionnées automatiquement."
             )
-            st.success("Notes enregistrées.")
-        except dropbox.exceptions.ApiError as e:
-            st.error(f"Erreur lors de l'enregistrement des notes : {e}")
+        )
+        with st.expander("Version actuellement sur Dropbox"):
+            st.code(conflict["remote_text"], language="markdown")
+        st.session_state.setdefault(merged_key, conflict["merged"])
+        with st.form("notes_merge_form"):
+            st.text_area("Version fusionnée", key=merged_key, height=300)
+            c1, c2, c3 = st.columns(3)
+            c1.form_submit_button("💾 Enregistrer la fusion", on_click=on_save_merged)
+            c2.form_submit_button("Écraser avec ma version", on_click=on_keep_mine)
+            c3.form_submit_button("Abandonner mes modifications", on_click=on_take_remote)
 else:
     # Les lecteurs (utilisateurs avec rôle 'viewer') ne peuvent pas modifier les notes
     st.text_area("Notes (lecture seule)", notes, height=300, disabled=True)
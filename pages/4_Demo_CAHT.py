@@ -1,15 +1,47 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import numpy as np
-import altair as alt
+import os
+
+from core.charts import (
+    cached_spec,
+    donut_chart,
+    line_chart,
+    monthly_chart_data,
+    share_chart_data,
+)
+from core.account_index import build_account_index, frame_fingerprint, open_account_index
+from core.array_cube import ArrayCube
+from core.columnar import COLUMNAR_DIR
+from core.cube import SigCube
+from core.dataset_store import get_dataset_store
+from core.pcg import get_type_classifier
+from core.sig import SIG_MARGE_COMMERCIALE, SigEngine
+from core.tracing import begin_run, span
 
 st.set_page_config(page_title="Démo SIG – Marge commerciale", layout="wide")
 
+begin_run("4_Demo_CAHT", st.session_state.get("username"), st.session_state.get("selected_folder"))
+
+
+def begin_fragment_run(section):
+    """
+    Rerun d'un fragment seul : mesuré comme un rerun à part entière, sinon ses
+    spans s'ajouteraient au dernier rerun complet de la session.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        begin_run(
+            f"4_Demo_CAHT / {section}",
+            st.session_state.get("username"),
+            st.session_state.get("selected_folder"),
+        )
+
 # =========================
 # 1. DATAFRAME D'ESSAI
 # =========================
 
-@st.cache_data
 def make_sample_sig():
     """
     Données d'essai pour un mini-SIG :
@@ -20,14 +52,14 @@ def make_sample_sig():
     - Répartition mensuelle avec une petite saisonnalité
     """
 
-    accounts = [
-        {"compte": "7071", "type": "CA", "libelle": "Ventes négoce"},
-        {"compte": "7072", "type": "CA", "libelle": "Ventes services"},
-        {"compte": "7073", "type": "CA", "libelle": "Autres ventes"},
-        {"compte": "6071", "type": "ACH", "libelle": "Achats marchandises"},
-        {"compte": "6072", "type": "ACH", "libelle": "Achats négoce"},
-        {"compte": "6031", "type": "STK", "libelle": "Variation stock marchandises"},
-    ]
+    libelles = {
+        "7071": "Ventes négoce",
+        "7072": "Ventes services",
+        "7073": "Autres ventes",
+        "6071": "Achats marchandises",
+        "6072": "Achats négoce",
+        "6031": "Variation stock marchandises",
+    }
 
     # Totaux annuels par compte
     annual_totals = {
@@ -65,62 +97,200 @@ def make_sample_sig():
             )
 
     df = pd.DataFrame(rows)
-    df = df.merge(pd.DataFrame(accounts), on="compte", how="left")
+    # Type SIG déduit du plan comptable (préfixe PCG le plus long)
+    df["type"] = get_type_classifier().classify(df["compte"])["type"].to_numpy()
+    df["libelle"] = df["compte"].map(libelles)
     return df
 
-df = make_sample_sig()
+# Cube (annee, mois, compte) construit une seule fois par version des données
+@st.cache_resource
+def get_sig_cube():
+    # Écritures partagées en lecture seule entre sessions (pas de copie par appel)
+    lines = get_dataset_store().get(("demo", "sample_sig", 1), make_sample_sig)
+    return SigCube.from_lines(lines)
+
+# Cube dense années × mois × comptes : toute fenêtre de mois se lit sans re-pivoter
+@st.cache_resource
+def get_array_cube(_cube, version):
+    return ArrayCube.from_cube(_cube)
+
+# Écritures triées par compte sur disque : le niveau 3 ne lit que la tranche du compte ouvert.
+# Le fichier est nommé d'après une empreinte du contenu : des données d'essai
+# modifiées produisent un nouvel index, jamais celui d'un processus précédent.
+@st.cache_resource
+def get_account_index():
+    lines = get_dataset_store().get(("demo", "sample_sig", 1), make_sample_sig)
+    base_dir = os.path.join(COLUMNAR_DIR, "demo")
+    stem = os.path.join(base_dir, f"sample_sig_{frame_fingerprint(lines)}")
+    index = open_account_index(stem)
+    if index is None:
+        build_account_index(lines, stem)
+        index = open_account_index(stem)
+        for name in os.listdir(base_dir):
+            if name.startswith("sample_sig_") and not os.path.join(base_dir, name).startswith(stem + "."):
+                os.remove(os.path.join(base_dir, name))
+    return index
+
+with span("load"):
+    cube = get_sig_cube()
+    acube = get_array_cube(cube, cube.version)
+    account_index = get_account_index()
+
+MOIS = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+        "août", "septembre", "octobre", "novembre", "décembre"]
+
+# Période d'analyse : exercice (éventuellement décalé), cumul à date ou 12 mois glissants
+with st.sidebar:
+    st.markdown("### 📅 Période d'analyse")
+    ANNEE_N = st.selectbox("Exercice N (année de clôture)", acube.years[::-1])
+    ecart = st.number_input(
+        "Comparer à N-k", min_value=1, max_value=max(len(acube.years) - 1, 1), value=1
+    )
+    debut_exercice = st.selectbox(
+        "Début d'exercice", range(1, 13), format_func=lambda m: MOIS[m - 1]
+    )
+    mode_periode = st.radio("Période", ["Exercice complet", "Cumul à date", "12 mois glissants"])
+    mois_fin = 12
+    if mode_periode != "Exercice complet":
+        mois_fin = st.selectbox(
+            "Jusqu'au mois (inclus)", range(1, 13), index=11, format_func=lambda m: MOIS[m - 1]
+        )
+
+ANNEE_N_1 = ANNEE_N - ecart
+if mode_periode == "Exercice complet":
+    window_n = acube.fiscal_window(ANNEE_N, debut_exercice)
+else:
+    # Le mois de fin appartient à l'exercice N (année de clôture ou année précédente)
+    annee_fin = ANNEE_N if mois_fin < debut_exercice or debut_exercice == 1 else ANNEE_N - 1
+    if mode_periode == "Cumul à date":
+        window_n = acube.ytd_window(annee_fin, mois_fin, debut_exercice)
+    else:
+        window_n = acube.rolling_window(annee_fin, mois_fin)
+window_n_1 = acube.shift(window_n, -ecart)
 
-ANNEE_N = 2024
-ANNEE_N_1 = 2023
 fmt = lambda x: f"{x:,.0f} €".replace(",", " ")
 
 # =========================
 # 2. CALCUL DU MINI-SIG
 # =========================
 
-def sig_agg(df):
-    agg_year = (
-        df.groupby(["annee", "type"])["montant"]
-        .sum()
-        .reset_index()
-        .pivot(index="type", columns="annee", values="montant")
-        .fillna(0)
-    )
-    # S'assurer des colonnes
-    for a in [ANNEE_N, ANNEE_N_1]:
-        if a not in agg_year.columns:
-            agg_year[a] = 0
-    agg_year = agg_year.reset_index().rename(columns={ANNEE_N: "N", ANNEE_N_1: "N_1"})
-
-    # Reconstitution des lignes SIG
-    ca = agg_year.loc[agg_year["type"] == "CA", ["N", "N_1"]].sum()
-    achats = agg_year.loc[agg_year["type"] == "ACH", ["N", "N_1"]].sum()
-    var_stk = agg_year.loc[agg_year["type"] == "STK", ["N", "N_1"]].sum()
-
-    sig_rows = []
-    sig_rows.append({"poste": "Chiffre d'affaires", "N": ca["N"], "N_1": ca["N_1"]})
-    sig_rows.append({"poste": "Achats consommés", "N": achats["N"], "N_1": achats["N_1"]})
-    sig_rows.append({"poste": "Variation de stock", "N": var_stk["N"], "N_1": var_stk["N_1"]})
-
-    marge_N = ca["N"] - achats["N"] - var_stk["N"]
-    marge_N_1 = ca["N_1"] - achats["N_1"] - var_stk["N_1"]
-    sig_rows.append({"poste": "Marge commerciale", "N": marge_N, "N_1": marge_N_1})
-
-    sig_df = pd.DataFrame(sig_rows)
-    sig_df["Var"] = sig_df["N"] - sig_df["N_1"]
-    sig_df["Var_%"] = np.where(
-        sig_df["N_1"] != 0, sig_df["Var"] / sig_df["N_1"] * 100, 0
+# Le mini-SIG est une configuration du moteur générique (voir core/sig.py),
+# compilée une seule fois pour le processus
+@st.cache_resource
+def get_sig_engine():
+    return SigEngine(SIG_MARGE_COMMERCIALE)
+
+sig_engine = get_sig_engine()
+with span("sig_aggregation"):
+    sig = sig_engine.compute_windows(
+        acube, window_n, window_n_1, str(ANNEE_N), str(ANNEE_N_1), libelles=cube.accounts["libelle"]
     )
-    return sig_df
+sig_df = sig.postes
 
-sig_df = sig_agg(df)
+# Les specs de graphiques sont réutilisées tant que les données ne changent pas
+chart_version = ("demo", cube.version, window_n, window_n_1)
 
-total_row = sig_df.loc[sig_df["poste"] == "Marge commerciale"].iloc[0]
+total_row = sig.poste("Marge commerciale")
 total_N = total_row["N"]
 total_N_1 = total_row["N_1"]
 total_Var = total_row["Var"]
 total_Var_pct = total_row["Var_%"]
 
+
+def formater_comparatif(df, colonnes_cles):
+    """
+    Met en forme un tableau N / N-1 / Var / Var_% pour l'affichage.
+    """
+    aff = df[colonnes_cles].copy()
+    for col in ["N", "N_1", "Var"]:
+        aff[col] = df[col].map(fmt)
+    aff["Var_%"] = df["Var_%"].map(lambda v: f"{v:.1f} %")
+    return aff.rename(
+        columns={
+            "poste": "Poste",
+            "compte": "Compte",
+            "libelle": "Libellé",
+            "N": f"N {ANNEE_N}",
+            "N_1": f"N-1 {ANNEE_N_1}",
+            "Var": "Écart",
+            "Var_%": "Écart %",
+        }
+    )
+
+
+def detail_inputs(sig, chart_version, poste):
+    """
+    Entrées d'une section de détail, mémorisées par (données, fenêtres, poste) :
+    un rerun de fragment ne refait ni le formatage du tableau ni l'extraction
+    des séries mensuelles.
+    """
+    memo = st.session_state.setdefault("demo_detail_inputs", {})
+    key = (chart_version, poste)
+    if key not in memo:
+        if len(memo) >= 16:
+            memo.clear()
+        memo[key] = {
+            "detail": formater_comparatif(sig.detail(poste), ["compte", "libelle"]),
+            "mensuel": sig.monthly(poste),
+        }
+    return memo[key]
+
+def window_dates(window):
+    """
+    Bornes (premier jour, dernier jour) d'une fenêtre de mois [début, fin[ du cube.
+    """
+    origin = pd.Timestamp(year=acube.first_year, month=1, day=1)
+    start = origin + pd.DateOffset(months=int(window[0]))
+    end = origin + pd.DateOffset(months=int(window[1])) - pd.Timedelta(days=1)
+    return start, end
+
+
+ECRITURES_PAGE_SIZE = 25
+
+
+def ecritures_compte(sig, poste, key):
+    """
+    Niveau 3 : écritures d'un compte du poste, filtrées par période et paginées.
+    """
+    st.markdown("### Niveau 3 – Écritures du compte")
+    comptes = list(sig.detail(poste)["compte"])
+    c1, c2 = st.columns(2)
+    compte = c1.selectbox("Compte", comptes, key=f"{key}_compte")
+    periodes = {
+        f"N ({ANNEE_N})": [window_n],
+        f"N-1 ({ANNEE_N_1})": [window_n_1],
+        "N et N-1": [window_n_1, window_n],
+    }
+    choix = c2.radio("Période", list(periodes), horizontal=True, key=f"{key}_periode")
+    windows = periodes[choix]
+    date_start, date_end = window_dates(windows[0])[0], window_dates(windows[-1])[1]
+
+    page_key = f"{key}_page"
+    with span("ecritures"):
+        # Une seule lecture donne la page et le total ; relecture seulement si
+        # la page mémorisée dépasse le nouveau total (compte ou période changé)
+        page = st.session_state.get(page_key, 1)
+        rows, total = account_index.entries(
+            compte, date_start, date_end, page=page, page_size=ECRITURES_PAGE_SIZE,
+            columns=["libelle", "montant"],
+        )
+        nb_pages = max((total + ECRITURES_PAGE_SIZE - 1) // ECRITURES_PAGE_SIZE, 1)
+        if page > nb_pages:
+            page = st.session_state[page_key] = nb_pages
+            rows, total = account_index.entries(
+                compte, date_start, date_end, page=page, page_size=ECRITURES_PAGE_SIZE,
+                columns=["libelle", "montant"],
+            )
+    page = st.number_input("Page", min_value=1, max_value=nb_pages, key=page_key)
+    st.caption(f"{total} écriture(s) – page {page}/{nb_pages}")
+    rows["date"] = rows["date"].dt.strftime("%d/%m/%Y")
+    rows["montant"] = rows["montant"].map(fmt)
+    st.dataframe(
+        rows.rename(columns={"compte": "Compte", "date": "Date", "libelle": "Libellé", "montant": "Montant"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
 # =========================
 # 3. ENTÊTE + BOUTONS DÉTAIL
 # =========================
@@ -135,278 +305,106 @@ c3.metric("Variation", fmt(total_Var), f"{total_Var_pct:.1f} %")
 st.markdown("---")
 st.subheader("Tableau SIG (N / N-1)")
 
-sig_aff = sig_df.copy()
-sig_aff["N_fmt"] = sig_aff["N"].map(fmt)
-sig_aff["N1_fmt"] = sig_aff["N_1"].map(fmt)
-sig_aff["Var_fmt"] = sig_aff["Var"].map(fmt)
-sig_aff["Var_%_fmt"] = sig_aff["Var_%"].map(lambda v: f"{v:.1f} %")
-
-st.table(
-    sig_aff[["poste", "N_fmt", "N1_fmt", "Var_fmt", "Var_%_fmt"]]
-    .rename(
-        columns={
-            "poste": "Poste",
-            "N_fmt": f"N {ANNEE_N}",
-            "N1_fmt": f"N-1 {ANNEE_N_1}",
-            "Var_fmt": "Écart",
-            "Var_%_fmt": "Écart %",
-        }
-    )
-)
+st.table(formater_comparatif(sig_df, ["poste"]))
 
 st.markdown("---")
 st.subheader("Options d’affichage du détail *(à terme : réservées aux administrateurs)*")
-
-col_opt1, col_opt2, col_opt3 = st.columns(3)
-with col_opt1:
-    show_ca_detail = st.toggle("Détail Chiffre d'affaires", value=True)
-with col_opt2:
-    show_achats_detail = st.toggle("Détail Achats consommés", value=True)
-with col_opt3:
-    show_stock_detail = st.toggle("Détail Variation de stock", value=False)
+st.caption("Chaque section se met à jour seule : afficher ou masquer un détail ne recalcule pas le reste de la page.")
 
 # =========================
 # 4. DÉTAIL CA – 707x
 # =========================
 
-if show_ca_detail:
-    st.markdown("## 🔹 Détail Chiffre d'affaires")
-
-    df_ca = df[df["type"] == "CA"].copy()
-
-    # Niveau 1 : par compte, N / N-1
-    ca_totaux = (
-        df_ca.groupby(["annee", "compte", "libelle"])["montant"]
-        .sum()
-        .reset_index()
-        .pivot(index=["compte", "libelle"], columns="annee", values="montant")
-        .fillna(0)
-    )
-
-    for a in [ANNEE_N, ANNEE_N_1]:
-        if a not in ca_totaux.columns:
-            ca_totaux[a] = 0
-
-    ca_totaux = ca_totaux.reset_index().rename(
-        columns={ANNEE_N: "N", ANNEE_N_1: "N_1"}
-    )
-    ca_totaux["Var"] = ca_totaux["N"] - ca_totaux["N_1"]
-    ca_totaux["Var_%"] = np.where(
-        ca_totaux["N_1"] != 0, ca_totaux["Var"] / ca_totaux["N_1"] * 100, 0
-    )
-
-    ca_totaux["N_fmt"] = ca_totaux["N"].map(fmt)
-    ca_totaux["N1_fmt"] = ca_totaux["N_1"].map(fmt)
-    ca_totaux["Var_fmt"] = ca_totaux["Var"].map(fmt)
-    ca_totaux["Var_%_fmt"] = ca_totaux["Var_%"].map(lambda v: f"{v:.1f} %")
-
-    st.markdown("### Niveau 1 – Comparatif par compte 707x")
-
-    st.dataframe(
-        ca_totaux[
-            ["compte", "libelle", "N_fmt", "N1_fmt", "Var_fmt", "Var_%_fmt"]
-        ].rename(
-            columns={
-                "compte": "Compte",
-                "libelle": "Libellé",
-                "N_fmt": f"N {ANNEE_N}",
-                "N1_fmt": f"N-1 {ANNEE_N_1}",
-                "Var_fmt": "Écart",
-                "Var_%_fmt": "Écart %",
-            }
-        ),
-        use_container_width=True,
-    )
-
-    st.markdown("### Niveau 2 – Graphiques Chiffre d'affaires")
-
-    # Évolution mensuelle par compte & année
-    st.markdown("**Évolution mensuelle par compte (N / N-1)**")
-    df_ca_month = (
-        df_ca.groupby(["annee", "periode", "compte"])["montant"]
-        .sum()
-        .reset_index()
-    )
-
-    chart_ca = (
-        alt.Chart(df_ca_month)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X("periode:T", title="Mois"),
-            y=alt.Y("montant:Q", title="CA HT"),
-            color="compte:N",
-            strokeDash="annee:N",
-            tooltip=["annee", "compte", "periode", "montant"],
+@st.fragment
+def section_ca(sig, chart_version):
+    begin_fragment_run("ca")
+    if not st.toggle("Détail Chiffre d'affaires", value=True):
+        return
+    with span("render_ca"):
+        inputs = detail_inputs(sig, chart_version, "Chiffre d'affaires")
+        st.markdown("## 🔹 Détail Chiffre d'affaires")
+
+        st.markdown("### Niveau 1 – Comparatif par compte 707x")
+        st.dataframe(inputs["detail"], use_container_width=True)
+
+        st.markdown("### Niveau 2 – Graphiques Chiffre d'affaires")
+
+        # Évolution mensuelle par compte & année
+        st.markdown("**Évolution mensuelle par compte (N / N-1)**")
+        chart_ca = cached_spec(
+            chart_version,
+            "ca_mensuel",
+            lambda: line_chart(monthly_chart_data(inputs["mensuel"]), "CA HT"),
         )
-        .properties(height=300)
-    )
-
-    st.altair_chart(chart_ca, use_container_width=True)
-
-    # Double donut : structure du CA dans le total CA
-    st.markdown("**Structure du CA par compte dans le total CA (N / N-1)**")
-
-    tot_ca_by_year = (
-        df_ca.groupby(["annee", "compte"])["montant"].sum().reset_index()
-    )
-    tot_ca_by_year["exercice"] = tot_ca_by_year["annee"].astype(str)
-
-    donut_ca = (
-        alt.Chart(tot_ca_by_year)
-        .mark_arc(innerRadius=50)
-        .encode(
-            theta="montant:Q",
-            color="compte:N",
-            tooltip=["exercice", "compte", "montant"],
+        st.vega_lite_chart(chart_ca, use_container_width=True)
+
+        # Double donut : structure du CA dans le total CA
+        st.markdown("**Structure du CA par compte dans le total CA (N / N-1)**")
+        donut_ca = cached_spec(
+            chart_version,
+            "ca_structure",
+            lambda: donut_chart(share_chart_data(inputs["mensuel"])),
         )
-        .properties(width=220, height=220)
-        .facet(column="exercice:N")
-    )
+        st.vega_lite_chart(donut_ca, use_container_width=True)
 
-    st.altair_chart(donut_ca, use_container_width=True)
+        ecritures_compte(sig, "Chiffre d'affaires", "ca")
 
 # =========================
 # 5. DÉTAIL ACHATS – 607x
 # =========================
 
-if show_achats_detail:
-    st.markdown("## 🔹 Détail Achats consommés")
-
-    df_ach = df[df["type"] == "ACH"].copy()
-
-    ach_totaux = (
-        df_ach.groupby(["annee", "compte", "libelle"])["montant"]
-        .sum()
-        .reset_index()
-        .pivot(index=["compte", "libelle"], columns="annee", values="montant")
-        .fillna(0)
-    )
-
-    for a in [ANNEE_N, ANNEE_N_1]:
-        if a not in ach_totaux.columns:
-            ach_totaux[a] = 0
-
-    ach_totaux = ach_totaux.reset_index().rename(
-        columns={ANNEE_N: "N", ANNEE_N_1: "N_1"}
-    )
-    ach_totaux["Var"] = ach_totaux["N"] - ach_totaux["N_1"]
-    ach_totaux["Var_%"] = np.where(
-        ach_totaux["N_1"] != 0, ach_totaux["Var"] / ach_totaux["N_1"] * 100, 0
-    )
-
-    ach_totaux["N_fmt"] = ach_totaux["N"].map(fmt)
-    ach_totaux["N1_fmt"] = ach_totaux["N_1"].map(fmt)
-    ach_totaux["Var_fmt"] = ach_totaux["Var"].map(fmt)
-    ach_totaux["Var_%_fmt"] = ach_totaux["Var_%"].map(lambda v: f"{v:.1f} %")
+@st.fragment
+def section_achats(sig, chart_version):
+    begin_fragment_run("achats")
+    if not st.toggle("Détail Achats consommés", value=True):
+        return
+    with span("render_achats"):
+        inputs = detail_inputs(sig, chart_version, "Achats consommés")
+        st.markdown("## 🔹 Détail Achats consommés")
 
-    st.markdown("### Niveau 1 – Comparatif par compte 607x")
+        st.markdown("### Niveau 1 – Comparatif par compte 607x")
+        st.dataframe(inputs["detail"], use_container_width=True)
 
-    st.dataframe(
-        ach_totaux[
-            ["compte", "libelle", "N_fmt", "N1_fmt", "Var_fmt", "Var_%_fmt"]
-        ].rename(
-            columns={
-                "compte": "Compte",
-                "libelle": "Libellé",
-                "N_fmt": f"N {ANNEE_N}",
-                "N1_fmt": f"N-1 {ANNEE_N_1}",
-                "Var_fmt": "Écart",
-                "Var_%_fmt": "Écart %",
-            }
-        ),
-        use_container_width=True,
-    )
-
-    st.markdown("### Niveau 2 – Évolution des achats")
+        st.markdown("### Niveau 2 – Évolution des achats")
 
-    df_ach_month = (
-        df_ach.groupby(["annee", "periode", "compte"])["montant"]
-        .sum()
-        .reset_index()
-    )
-
-    chart_ach = (
-        alt.Chart(df_ach_month)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X("periode:T", title="Mois"),
-            y=alt.Y("montant:Q", title="Achats"),
-            color="compte:N",
-            strokeDash="annee:N",
-            tooltip=["annee", "compte", "periode", "montant"],
+        chart_ach = cached_spec(
+            chart_version,
+            "ach_mensuel",
+            lambda: line_chart(monthly_chart_data(inputs["mensuel"]), "Achats"),
         )
-        .properties(height=300)
-    )
+        st.vega_lite_chart(chart_ach, use_container_width=True)
 
-    st.altair_chart(chart_ach, use_container_width=True)
+        ecritures_compte(sig, "Achats consommés", "ach")
 
 # =========================
 # 6. DÉTAIL VARIATION DE STOCK – 603x
 # =========================
 
-if show_stock_detail:
-    st.markdown("## 🔹 Détail Variation de stock")
-
-    df_stk = df[df["type"] == "STK"].copy()
-
-    stk_totaux = (
-        df_stk.groupby(["annee", "compte", "libelle"])["montant"]
-        .sum()
-        .reset_index()
-        .pivot(index=["compte", "libelle"], columns="annee", values="montant")
-        .fillna(0)
-    )
-
-    for a in [ANNEE_N, ANNEE_N_1]:
-        if a not in stk_totaux.columns:
-            stk_totaux[a] = 0
-
-    stk_totaux = stk_totaux.reset_index().rename(
-        columns={ANNEE_N: "N", ANNEE_N_1: "N_1"}
-    )
-    stk_totaux["Var"] = stk_totaux["N"] - stk_totaux["N_1"]
-    stk_totaux["Var_%"] = np.where(
-        stk_totaux["N_1"] != 0, stk_totaux["Var"] / stk_totaux["N_1"] * 100, 0
-    )
-
-    stk_totaux["N_fmt"] = stk_totaux["N"].map(fmt)
-    stk_totaux["N1_fmt"] = stk_totaux["N_1"].map(fmt)
-    stk_totaux["Var_fmt"] = stk_totaux["Var"].map(fmt)
-    stk_totaux["Var_%_fmt"] = stk_totaux["Var_%"].map(lambda v: f"{v:.1f} %")
-
-    st.dataframe(
-        stk_totaux[
-            ["compte", "libelle", "N_fmt", "N1_fmt", "Var_fmt", "Var_%_fmt"]
-        ].rename(
-            columns={
-                "compte": "Compte",
-                "libelle": "Libellé",
-                "N_fmt": f"N {ANNEE_N}",
-                "N1_fmt": f"N-1 {ANNEE_N_1}",
-                "Var_fmt": "Écart",
-                "Var_%_fmt": "Écart %",
-            }
-        ),
-        use_container_width=True,
-    )
-
-    df_stk_month = (
-        df_stk.groupby(["annee", "periode", "compte"])["montant"]
-        .sum()
-        .reset_index()
-    )
-
-    chart_stk = (
-        alt.Chart(df_stk_month)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X("periode:T", title="Mois"),
-            y=alt.Y("montant:Q", title="Variation de stock"),
-            color="annee:N",
-            tooltip=["annee", "periode", "montant"],
+@st.fragment
+def section_stock(sig, chart_version):
+    begin_fragment_run("stock")
+    if not st.toggle("Détail Variation de stock", value=False):
+        return
+    with span("render_stock"):
+        inputs = detail_inputs(sig, chart_version, "Variation de stock")
+        st.markdown("## 🔹 Détail Variation de stock")
+
+        st.dataframe(inputs["detail"], use_container_width=True)
+
+        chart_stk = cached_spec(
+            chart_version,
+            "stk_mensuel",
+            lambda: line_chart(
+                monthly_chart_data(inputs["mensuel"], by_compte=False),
+                "Variation de stock",
+                by_compte=False,
+            ),
         )
-        .properties(height=300)
-    )
+        st.vega_lite_chart(chart_stk, use_container_width=True)
+
+        ecritures_compte(sig, "Variation de stock", "stk")
 
-    st.altair_chart(chart_stk, use_container_width=True)
 
+section_ca(sig, chart_version)
+section_achats(sig, chart_version)
+section_stock(sig, chart_version)
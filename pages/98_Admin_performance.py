@@ -0,0 +1,170 @@
+import streamlit as st
+import pandas as pd
+
+from core.auth_config import get_authenticator, load_auth_config
+from core.dataset_store import get_dataset_store
+from core.dropbox_cache import get_download_cache
+from core.prewarm import get_prewarmer
+from core.singleflight import get_dataset_flight
+from core.tracing import get_tracer
+
+st.set_page_config(page_title="BI+ – Performances", layout="wide")
+
+# Charger la config depuis les secrets
+auth = load_auth_config(st.secrets["auth"]["config"])
+
+# Authenticator
+authenticator = get_authenticator(auth)
+
+# Sécurité : accès seulement si connecté
+if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
+    st.switch_page("app.py")
+
+username = st.session_state["username"]
+
+# Sécurité : accès réservé admin
+if auth.role(username) != "admin":
+    st.error("⛔ Accès réservé à l'administrateur.")
+    st.stop()
+
+authenticator.logout("Se déconnecter", "sidebar")
+
+st.title("⏱ Performances BI+")
+
+tracer = get_tracer()
+
+# -------------------------------------------------------
+# Réglages du traçage
+# -------------------------------------------------------
+c1, c2 = st.columns([3, 1])
+tracer.enabled = c1.toggle("Traçage activé", value=tracer.enabled)
+if c2.button("🧹 Vider les mesures"):
+    tracer.clear()
+
+spans = pd.DataFrame(tracer.spans())
+st.caption(f"{len(spans)} span(s) en mémoire (capacité : {tracer.capacity}).")
+
+if spans.empty:
+    st.info("Aucune mesure pour l'instant : naviguez dans l'application puis revenez ici.")
+    st.stop()
+
+
+def percentiles(df, keys):
+    """
+    p50 / p95 / max / nombre d'occurrences de `duration_ms` par `keys`.
+    """
+    grouped = df.groupby(keys)["duration_ms"]
+    out = pd.DataFrame(
+        {
+            "p50 (ms)": grouped.quantile(0.5),
+            "p95 (ms)": grouped.quantile(0.95),
+            "max (ms)": grouped.max(),
+            "n": grouped.size(),
+        }
+    )
+    return out.round(1).sort_values("p95 (ms)", ascending=False).reset_index()
+
+
+# Spans mesurés hors d'un rerun (pré-chargement, threads de fond) : regroupés
+# sous une étiquette à part et exclus des statistiques par rerun
+OUTSIDE_RUN = "(hors rerun)"
+in_run = spans["run_id"].notna()
+spans["page"] = spans["page"].where(in_run, OUTSIDE_RUN)
+
+# Durée d'un rerun = somme de ses étapes de premier niveau (les spans imbriqués
+# sont déjà compris dans leur parent)
+runs = (
+    spans[in_run & (spans["depth"] == 0)]
+    .groupby(["run_id", "page"])
+    .agg(duration_ms=("duration_ms", "sum"), folder=("folder", "first"), user=("user", "first"))
+    .reset_index()
+)
+
+# -------------------------------------------------------
+# 1. Latence par page
+# -------------------------------------------------------
+st.subheader("📄 Latence par page (rerun complet)")
+st.dataframe(percentiles(runs, ["page"]), use_container_width=True)
+
+# -------------------------------------------------------
+# 2. Latence par étape
+# -------------------------------------------------------
+st.subheader("🧩 Latence par page et par étape")
+st.dataframe(percentiles(spans, ["page", "stage"]), use_container_width=True)
+
+# -------------------------------------------------------
+# 3. Dossiers les plus lents
+# -------------------------------------------------------
+st.subheader("🐢 Dossiers les plus lents")
+by_folder = runs.dropna(subset=["folder"])
+if by_folder.empty:
+    st.write("Aucun dossier associé aux mesures.")
+else:
+    st.dataframe(percentiles(by_folder, ["folder"]).head(20), use_container_width=True)
+
+# -------------------------------------------------------
+# 4. Caches
+# -------------------------------------------------------
+st.subheader("🗄 Caches")
+cache_stats = get_download_cache().stats()
+flight_stats = get_dataset_flight().stats()
+m1, m2, m3 = st.columns(3)
+m1.metric("Cache Dropbox – hits", cache_stats["hits"], f"{cache_stats['hit_rate'] * 100:.0f} %")
+m2.metric("Cache Dropbox – taille", f"{cache_stats['bytes'] / 1e6:.1f} Mo")
+m3.metric(
+    "Chargements mutualisés",
+    flight_stats["coalesced"],
+    f"{flight_stats['waiting']} en attente",
+    delta_color="off",
+)
+
+store_stats = get_dataset_store().stats()
+d1, d2, d3 = st.columns(3)
+d1.metric(
+    "Jeux de données en mémoire",
+    store_stats["entries"],
+    f"{store_stats['hit_rate'] * 100:.0f} % de hits",
+)
+d2.metric(
+    "Mémoire partagée",
+    f"{store_stats['bytes'] / 1e6:.1f} Mo",
+    f"budget {store_stats['max_bytes'] / 1e6:.0f} Mo",
+    delta_color="off",
+)
+d3.metric("Évictions", store_stats["evictions"])
+if store_stats["datasets"]:
+    datasets = pd.DataFrame(store_stats["datasets"])
+    datasets["key"] = datasets["key"].map(lambda k: " / ".join(str(p) for p in k))
+    datasets["Mo"] = (datasets["bytes"] / 1e6).round(2)
+    for col in ["loaded_at", "last_access"]:
+        datasets[col] = pd.to_datetime(datasets[col], unit="s")
+    st.dataframe(
+        datasets[["key", "Mo", "hits", "loaded_at", "last_access"]],
+        use_container_width=True,
+    )
+
+# -------------------------------------------------------
+# 5. Pré-chargement des dossiers
+# -------------------------------------------------------
+st.subheader("🌙 Pré-chargement des dossiers")
+prewarmer = get_prewarmer()
+if prewarmer is None:
+    st.write("Pré-chargement désactivé (BI_PLUS_PREWARM=0) ou pas encore démarré.")
+else:
+    window = prewarmer.window
+    st.caption(
+        f"Plage horaire : {f'{window[0]} h – {window[1]} h' if window else 'toute la journée'} "
+        f"– {prewarmer.workers} dossier(s) en parallèle – passage toutes les {prewarmer.interval // 60} min"
+    )
+    if st.button("▶️ Lancer un passage maintenant"):
+        prewarmer.trigger()
+    status = prewarmer.status()
+    if status:
+        status_df = pd.DataFrame.from_dict(status, orient="index").rename_axis("dossier").reset_index()
+        for col in ["checked_at", "warmed_at"]:
+            if col in status_df.columns:
+                status_df[col] = pd.to_datetime(status_df[col], unit="s")
+        st.dataframe(status_df, use_container_width=True)
+
+with st.expander("Dernières mesures brutes"):
+    st.dataframe(spans.sort_values("ts", ascending=False).head(200), use_container_width=True)
@@ -1,29 +1,40 @@
+import csv
+import time
+
 import streamlit as st
 import yaml
 import streamlit_authenticator as stauth
 
+from core.auth_config import get_authenticator, load_auth_config
+from core.user_import import (
+    ImportFormatError,
+    add_users,
+    hash_passwords,
+    is_password_hash,
+    parse_users_file,
+    validate_rows,
+)
+from core.user_table import get_user_index
+
 st.set_page_config(page_title="BI+ – Admin utilisateurs", layout="wide")
 
-# Charger la config depuis les secrets
-config = yaml.safe_load(st.secrets["auth"]["config"])
+USERS_PAGE_SIZE = 50
+
+# Charger la config depuis les secrets (copie modifiable de la config en cache)
+auth = load_auth_config(st.secrets["auth"]["config"])
+config = auth.copy_config()
 
 # Authenticator
-authenticator = stauth.Authenticate(
-    config["credentials"],
-    config["cookie"]["name"],
-    config["cookie"]["key"],
-    config["cookie"]["expiry_days"]
-)
+authenticator = get_authenticator(auth)
 
 # Sécurité : accès seulement si connecté
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
     st.switch_page("app.py")
 
 username = st.session_state["username"]
-user_info = config["credentials"]["usernames"][username]
 
 # Sécurité : accès réservé admin
-if user_info.get("role") != "admin":
+if auth.role(username) != "admin":
     st.error("⛔ Accès réservé à l'administrateur.")
     st.stop()
 
@@ -65,21 +76,23 @@ def afficher_bloc_secrets(config):
 # -------------------------------------------------------
 st.subheader("👥 Utilisateurs existants")
 
-cols = st.columns([1, 2, 2, 1, 3])
-cols[0].markdown("**Username**")
-cols[1].markdown("**Nom**")
-cols[2].markdown("**Email**")
-cols[3].markdown("**Rôle**")
-cols[4].markdown("**Dossiers Dropbox**")
-
-for u, data in users.items():
-    folders = ", ".join(data.get("dropbox_folders", []))
-    row = st.columns([1, 2, 2, 1, 3])
-    row[0].write(u)
-    row[1].write(data.get("name", ""))
-    row[2].write(data.get("email", ""))
-    row[3].write(data.get("role", ""))
-    row[4].write(folders)
+# Table et index construits une fois par version de la config
+user_index = get_user_index(auth)
+
+f1, f2, f3 = st.columns([2, 1, 2])
+search = f1.text_input("Rechercher (username, nom, email)", key="users_search")
+role_filter = f2.selectbox("Rôle", ["Tous", "admin", "viewer"], key="users_role")
+folder_filter = f3.text_input("Dossier (préfixe)", key="users_folder", placeholder="/BI_PLUS/clients/")
+
+positions = user_index.search(search, None if role_filter == "Tous" else role_filter, folder_filter)
+nb_pages = max(1, -(-len(positions) // USERS_PAGE_SIZE))
+# Page mémorisée ramenée dans les bornes quand un filtre réduit le nombre de pages
+if st.session_state.get("users_page", 1) > nb_pages:
+    st.session_state["users_page"] = nb_pages
+users_page = st.number_input("Page", min_value=1, max_value=nb_pages, step=1, key="users_page")
+page_df, total = user_index.page(positions, int(users_page), USERS_PAGE_SIZE)
+st.dataframe(page_df, use_container_width=True, hide_index=True)
+st.caption(f"{total} utilisateur(s) trouvé(s) sur {len(user_index)} – page {int(users_page)}/{nb_pages}")
 
 st.markdown("---")
 
@@ -125,14 +138,60 @@ if add_submit:
 
 st.markdown("---")
 
+# -------------------------------------------------------
+# 2 bis. Import en masse (CSV / YAML)
+# -------------------------------------------------------
+st.subheader("📥 Importer des utilisateurs en masse")
+st.caption(
+    "CSV (username, name, email, role, dropbox_folders séparés par |, password) "
+    "ou YAML (liste d'utilisateurs). Toutes les lignes sont vérifiées avant import."
+)
+
+import_file = st.file_uploader("Fichier CSV ou YAML", type=["csv", "yaml", "yml"], key="bulk_import")
+
+if import_file is not None:
+    try:
+        import_rows = parse_users_file(import_file.name, import_file.getvalue())
+    except (ImportFormatError, csv.Error, yaml.YAMLError) as e:
+        st.error(f"Fichier illisible : {e}")
+        import_rows = []
+    import_users, import_errors = validate_rows(import_rows, set(users))
+
+    if import_errors:
+        st.error(f"{len(import_errors)} ligne(s) en erreur : aucun utilisateur n'est importé.")
+        st.code("\n".join(import_errors))
+    elif import_users:
+        st.write(f"{len(import_users)} utilisateur(s) prêts à être importés.")
+        already_hashed = sum(is_password_hash(u["password"]) for u in import_users)
+        if already_hashed:
+            st.caption(f"{already_hashed} mot(s) de passe déjà haché(s) : repris tels quels.")
+        if st.button(f"Importer {len(import_users)} utilisateur(s)"):
+            progress = st.progress(0.0, text="Hachage des mots de passe…")
+            start = time.perf_counter()
+            hashes, timings = hash_passwords(
+                [u["password"] for u in import_users],
+                on_batch=lambda done, total: progress.progress(done / total, text=f"Lot {done}/{total}"),
+            )
+            elapsed = time.perf_counter() - start
+            add_users(config, import_users, hashes)
+
+            st.success(f"{len(import_users)} utilisateur(s) importé(s) en {elapsed:.1f} s.")
+            with st.expander("Durée par lot"):
+                st.dataframe(timings, use_container_width=True)
+            afficher_bloc_secrets(config)
+
+st.markdown("---")
+
 # -------------------------------------------------------
 # 3. Modifier un utilisateur
 # -------------------------------------------------------
 st.subheader("✏️ Modifier un utilisateur")
 
-selected_user = st.selectbox("Choisir un utilisateur", list(users.keys()))
+# Saisie semi-automatique : seules les meilleures correspondances sont proposées
+edit_query = st.text_input("Rechercher l'utilisateur à modifier", key="edit_query")
+selected_user = st.selectbox("Choisir un utilisateur", user_index.suggest(edit_query), key="edit_user_choice")
 
-if selected_user:
+if selected_user in users:
     u = users[selected_user]
 
     with st.form("edit_user"):
@@ -175,9 +234,12 @@ st.markdown("---")
 # -------------------------------------------------------
 st.subheader("🗑 Supprimer un utilisateur")
 
-delete_user = st.selectbox("Sélectionner l’utilisateur à supprimer", list(users.keys()), key="delete_user")
+delete_query = st.text_input("Rechercher l’utilisateur à supprimer", key="delete_query")
+delete_user = st.selectbox("Sélectionner l’utilisateur à supprimer", user_index.suggest(delete_query), key="delete_user")
 
-if delete_user == "admin":
+if not delete_user:
+    st.write("Aucun utilisateur ne correspond à la recherche.")
+elif delete_user == "admin":
     st.warning("Impossible de supprimer l'utilisateur admin.")
 else:
     if st.button(f"⚠️ Supprimer {delete_user}"):
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les tests importent le paquet `core` depuis la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,118 @@
+"""
+Contrôle d'accès : trie de dossiers, client Dropbox restreint, config par utilisateur.
+"""
+
+import types
+
+import pytest
+
+from core.acl import AccessDenied, FolderTrie, GuardedDropbox, split_path
+from core.auth_config import AuthConfig
+
+CONFIG = """
+credentials:
+  usernames:
+    alice:
+      role: viewer
+      dropbox_folders: ["/Clients/A/B"]
+    bob:
+      role: viewer
+      dropbox_folders: ["/Clients/Autre/", "/Clients/Partage"]
+    carole:
+      role: viewer
+      dropbox_folders: ["/Clients/Partage"]
+    root:
+      role: admin
+"""
+
+
+@pytest.fixture
+def auth():
+    return AuthConfig(CONFIG)
+
+
+def test_prefix_stops_at_segment_boundary(auth):
+    assert auth.can_access("alice", "/Clients/A/B")
+    assert auth.can_access("alice", "/Clients/A/B/grand_livre.xlsx")
+    assert not auth.can_access("alice", "/Clients/A/BC")
+    assert not auth.can_access("alice", "/Clients/A/BC/grand_livre.xlsx")
+    assert not auth.can_access("alice", "/Clients/A")
+
+
+def test_parent_segments_are_refused(auth):
+    assert split_path("/a/../b") is None
+    assert not auth.can_access("alice", "/Clients/A/B/../../Autre/gl.xlsx")
+    assert not auth.can_access("alice", "/Clients/A/B/..")
+    # `.` et séparateurs redondants ne changent pas le dossier
+    assert auth.can_access("alice", "/Clients/./A//B/gl.xlsx")
+
+
+def test_trailing_slash_is_normalised(auth):
+    assert split_path("/Clients/Autre/") == split_path("/Clients/Autre") == ["clients", "autre"]
+    assert auth.can_access("bob", "/Clients/Autre")
+    assert auth.can_access("bob", "/Clients/Autre/gl.xlsx")
+    assert auth.can_access("alice", "/Clients/A/B/")
+
+
+def test_case_is_folded(auth):
+    assert auth.can_access("alice", "/clients/a/b/GL.xlsx")
+    assert auth.can_access("alice", "/CLIENTS/A/B")
+
+
+def test_root_is_never_granted():
+    trie = FolderTrie.from_folders({"/": ["alice"], "": ["alice"]})
+    assert not trie.allows("/Clients/A", "alice")
+
+
+def test_admin_sees_configured_folders_only(auth):
+    assert auth.can_access("root", "/Clients/A/B/gl.xlsx")
+    assert auth.can_access("root", "/Clients/Partage")
+    assert not auth.can_access("root", "/Personnel/gl.xlsx")
+    assert auth.folders_for("root") == auth.all_folders
+
+
+def test_trie_is_built_per_user(auth):
+    assert auth.can_access("carole", "/Clients/Partage/gl.xlsx")
+    assert not auth.can_access("carole", "/Clients/Autre/gl.xlsx")
+    assert not auth.can_access("alice", "/Clients/Partage/gl.xlsx")
+    assert auth.users_of("/Clients/Partage") == ["bob", "carole"]
+    assert not auth.can_access("inconnu", "/Clients/Partage")
+
+
+class _FakeDropbox:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append(name)
+            return types.SimpleNamespace(rev="0123456789a")
+
+        return method
+
+
+def test_guarded_client_checks_paths(auth):
+    dbx = _FakeDropbox()
+    guarded = GuardedDropbox(dbx, auth, "alice")
+    guarded.files_get_metadata("/Clients/A/B/gl.xlsx")
+    guarded.files_upload(b"x", path="/Clients/A/B/notes.json")
+    with pytest.raises(AccessDenied):
+        guarded.files_download("/Clients/A/BC/gl.xlsx")
+    with pytest.raises(AccessDenied):
+        guarded.files_upload(b"x", "/Clients/Autre/notes.json")
+    with pytest.raises(AccessDenied):
+        guarded.files_download(path=None)
+    assert dbx.calls == ["files_get_metadata", "files_upload"]
+
+
+@pytest.mark.parametrize(
+    "name", ["files_delete_v2", "files_list_folder", "files_upload_session_finish", "sharing_create_shared_link"]
+)
+def test_guarded_client_rejects_unlisted_methods(auth, name):
+    dbx = _FakeDropbox()
+    guarded = GuardedDropbox(dbx, auth, "root")
+    with pytest.raises(AccessDenied):
+        getattr(guarded, name)
+    assert dbx.calls == []
+    with pytest.raises(AttributeError):
+        guarded._dbx_private
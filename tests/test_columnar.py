@@ -0,0 +1,39 @@
+"""
+Sidecars Parquet : une révision ne remplace que la même feuille du classeur.
+"""
+
+import io
+import os
+
+import pandas as pd
+
+from core.columnar import read_columnar, sidecar_path
+
+
+def workbook():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({"CompteNum": ["401000"], "EcritureDate": ["20230105"], "Debit": [1.0]}).to_excel(
+            writer, sheet_name="A", index=False
+        )
+        pd.DataFrame({"x": [1]}).to_excel(writer, sheet_name="A_b", index=False)
+    return buffer.getvalue()
+
+
+def test_sheets_do_not_evict_each_other(tmp_path):
+    content = workbook()
+    parses = []
+
+    def load_bytes():
+        parses.append(1)
+        return content
+
+    for sheet in ["A", "A_b", "A", "A_b"]:
+        read_columnar("/c/fec.xlsx", "r1", load_bytes, sheet_name=sheet, base_dir=str(tmp_path))
+    assert len(parses) == 2
+
+    read_columnar("/c/fec.xlsx", "r2", load_bytes, sheet_name="A", base_dir=str(tmp_path))
+    assert not os.path.exists(sidecar_path("/c/fec.xlsx", "r1", "A", str(tmp_path)))
+    assert os.path.exists(sidecar_path("/c/fec.xlsx", "r1", "A_b", str(tmp_path)))
+    assert os.path.exists(sidecar_path("/c/fec.xlsx", "r2", "A", str(tmp_path)))
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
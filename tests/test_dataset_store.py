@@ -0,0 +1,79 @@
+"""
+Magasin de jeux de données : une vue ne peut pas modifier le jeu partagé.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.dataset_store import DatasetStore
+
+
+def shared_frame():
+    return pd.DataFrame(
+        {
+            "Debit": np.array([1.0, 2.0]),
+            "Libelle": pd.array(["a", "b"], dtype="string"),
+            "Piece": pd.array([1, None], dtype="Int64"),
+            "Lettre": pd.array([True, None], dtype="boolean"),
+            "Journal": pd.array(["VT", "AC"], dtype="string[pyarrow]"),
+            "Code": pd.Categorical(["x", "y"]),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "column, value",
+    [("Debit", 9.0), ("Libelle", "z"), ("Piece", 9), ("Lettre", False), ("Journal", "OD"), ("Code", "y")],
+)
+def test_view_cannot_write_shared_frame(column, value):
+    store = DatasetStore()
+    expected = shared_frame()
+    view = store.get("k", shared_frame)
+
+    with pytest.raises(ValueError):
+        view.loc[0, column] = value
+    with pytest.raises(ValueError):
+        view[column].array[0] = value
+
+    pd.testing.assert_series_equal(
+        store.get("k", shared_frame)[column].astype(object), expected[column].astype(object)
+    )
+
+
+def test_view_can_add_and_replace_columns():
+    store = DatasetStore()
+    view = store.get("k", shared_frame)
+    view["Libelle"] = view["Libelle"].str.upper()
+    view["Nouvelle"] = 1
+    shared = store.get("k", shared_frame)
+    assert list(shared["Libelle"]) == ["a", "b"]
+    assert "Nouvelle" not in shared
+
+
+def test_ledger_view_caches_count_in_budget(monkeypatch):
+    import core.ledger_view as ledger_view
+
+    store = DatasetStore()
+    monkeypatch.setattr(ledger_view, "get_dataset_store", lambda: store)
+    n = 10_000
+    ledger = pd.DataFrame(
+        {
+            "CompteNum": np.where(np.arange(n) % 2, "607000", "707000"),
+            "EcritureDate": pd.date_range("2023-01-01", periods=n, freq="h").strftime("%Y%m%d"),
+            "Debit": np.arange(n, dtype=float),
+        }
+    )
+    view = ledger_view.get_ledger_view(("/A/gl.xlsx", "0123456789a"), lambda: ledger)
+    before = store.stats()["bytes"]
+
+    view.query(sort_by="Debit", compte="607")
+    grown = store.stats()["bytes"]
+    # Rangs de tri (2 × n int64) + positions filtrées (n / 2 int64)
+    assert grown - before == 2 * n * 8 + n // 2 * 8
+
+    # Au-delà du budget, le visualiseur qui a grossi est évincé
+    store.max_bytes = before
+    store.get("autre", lambda: pd.DataFrame({"x": [1.0]}))
+    view.query(sort_by="EcritureDate")
+    assert ("ledger_view", "/A/gl.xlsx", "0123456789a") not in store
@@ -0,0 +1,77 @@
+"""
+Cache de téléchargements : un hit ne réécrit pas l'index sur disque.
+"""
+
+import os
+import types
+
+from core.dropbox_cache import INDEX_FLUSH_INTERVAL, DropboxDownloadCache, dropbox_content_hash
+
+DATA = b"grand livre"
+
+
+class _FakeDropbox:
+    def __init__(self):
+        self.downloads = 0
+
+    def files_get_metadata(self, path):
+        return types.SimpleNamespace(rev="0123456789a", content_hash=dropbox_content_hash(DATA))
+
+    def files_download(self, path):
+        self.downloads += 1
+        return self.files_get_metadata(path), types.SimpleNamespace(content=DATA)
+
+
+def test_hits_update_recency_in_memory_only(tmp_path):
+    cache = DropboxDownloadCache(str(tmp_path))
+    dbx = _FakeDropbox()
+    cache.download(dbx, "/c/fec.xlsx")
+    written = os.stat(cache.index_path).st_mtime_ns
+
+    for _ in range(5):
+        assert cache.download(dbx, "/c/fec.xlsx")[1] == DATA
+    assert dbx.downloads == 1
+    assert os.stat(cache.index_path).st_mtime_ns == written
+
+    cache.flush()
+    reloaded = DropboxDownloadCache(str(tmp_path))
+    assert reloaded.lookup("/c/fec.xlsx", rev="0123456789a") == DATA
+
+
+def test_hits_flush_after_interval(tmp_path):
+    cache = DropboxDownloadCache(str(tmp_path))
+    dbx = _FakeDropbox()
+    cache.download(dbx, "/c/fec.xlsx")
+    cache.download(dbx, "/c/fec.xlsx")
+    assert cache._dirty
+    cache._saved_at -= INDEX_FLUSH_INTERVAL
+    cache.download(dbx, "/c/fec.xlsx")
+    assert not cache._dirty
+
+
+def test_concurrent_stores_share_blob_dir(tmp_path):
+    import threading
+
+    # Deux instances = deux processus partageant le répertoire de cache
+    caches = [DropboxDownloadCache(str(tmp_path)) for _ in range(2)]
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def store(cache):
+        barrier.wait()
+        try:
+            for _ in range(20):
+                cache._index["blobs"].clear()
+                cache.store("/c/fec.xlsx", "0123456789a", DATA)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(caches[i % 2],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert os.listdir(caches[0].blob_dir) == [dropbox_content_hash(DATA)]
+    assert DropboxDownloadCache(str(tmp_path)).lookup("/c/fec.xlsx", rev="0123456789a") == DATA
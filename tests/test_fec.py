@@ -0,0 +1,85 @@
+"""
+Le FEC texte lu en flux (core.fec.read_fec) et le même FEC lu depuis un
+classeur Excel (read_workbook + read_fec_frame) donnent les mêmes totaux.
+"""
+
+import io
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.datasets import FolderSig, load_folder_sig
+from core.excel_ingest import read_workbook
+from core.fec import download_fec, read_fec, read_fec_frame
+
+COMPTES = [607000, 601000, 603100, 641000, 645000, 681100, 706000, 707100, 411000, 401000]
+
+
+@pytest.fixture(scope="module")
+def ecritures():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    montants = rng.integers(1, 1_000_000, n) / 100
+    debit = rng.random(n) < 0.5
+    return pd.DataFrame(
+        {
+            "JournalCode": "VE",
+            "EcritureDate": dates,
+            "CompteNum": rng.choice(COMPTES, n),
+            "EcritureLib": "Libellé « test » n°1",
+            "Debit": np.where(debit, montants, 0.0),
+            "Credit": np.where(debit, 0.0, montants),
+        }
+    )
+
+
+def as_text_fec(df, delimiter="\t", encoding="iso-8859-15"):
+    text = df.assign(
+        EcritureDate=df["EcritureDate"].dt.strftime("%Y%m%d"),
+        Debit=df["Debit"].map(lambda v: f"{v:.2f}".replace(".", ",")),
+        Credit=df["Credit"].map(lambda v: f"{v:.2f}".replace(".", ",")),
+    ).to_csv(sep=delimiter, index=False, lineterminator="\r\n")
+    return text.encode(encoding)
+
+
+def as_xlsx(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def totals(lines):
+    return lines.assign(compte=lines["compte"].astype(str)).groupby(["annee", "mois", "compte"])["montant"].sum()
+
+
+@pytest.mark.parametrize("delimiter", ["\t", "|", ";"])
+def test_text_totals_match_excel(ecritures, delimiter):
+    streamed = read_fec(io.BytesIO(as_text_fec(ecritures, delimiter)), chunksize=300)
+    from_excel = read_fec_frame(read_workbook(as_xlsx(ecritures)))
+    pd.testing.assert_series_equal(totals(streamed), totals(from_excel), check_dtype=False)
+
+
+class _FakeDropbox:
+    def __init__(self, content):
+        self.content = content
+
+    def files_download(self, path):
+        raw = io.BytesIO(self.content)
+        return types.SimpleNamespace(rev="a1b2c3d4e"), types.SimpleNamespace(raw=raw, close=raw.close)
+
+
+def test_download_fec_streams_response(ecritures):
+    _, lines = download_fec(_FakeDropbox(as_text_fec(ecritures)), "/c/fec.txt", chunksize=300)
+    pd.testing.assert_series_equal(totals(lines), totals(read_fec_frame(ecritures)), check_dtype=False)
+
+
+def test_folder_sig_uses_text_fec(ecritures):
+    dbx = _FakeDropbox(as_text_fec(ecritures))
+    folder_sig = load_folder_sig(dbx, "/test_fec", "/test_fec/fec.txt", "a1b2c3d4e")
+    expected = FolderSig.from_ledger(read_workbook(as_xlsx(ecritures)))
+    assert folder_sig.annee_n == expected.annee_n == 2024
+    for poste, (n, n_1, _) in expected.key_figures().items():
+        assert folder_sig.key_figures()[poste][:2] == pytest.approx((n, n_1))
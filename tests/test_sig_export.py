@@ -0,0 +1,154 @@
+"""
+Export SIG par lots : un dossier traité avec un client Dropbox factice.
+"""
+
+import io
+import os
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch.sig_export as sig_export
+
+DROPBOX_SECRETS = {k: "x" for k in sig_export.DROPBOX_KEYS}
+
+
+def ledger_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    n = 400
+    montants = rng.integers(1, 100_000, n) / 100
+    debit = rng.random(n) < 0.5
+    return pd.DataFrame(
+        {
+            "EcritureDate": (pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")).strftime("%Y%m%d"),
+            "CompteNum": rng.choice(["607000", "601000", "707000", "706000", "641000"], n),
+            "Debit": np.where(debit, montants, 0.0),
+            "Credit": np.where(debit, 0.0, montants),
+        }
+    )
+
+
+def as_xlsx(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def as_text(df):
+    return df.to_csv(sep="\t", index=False).encode("utf-8")
+
+
+class StubDropbox:
+    """
+    files_get_metadata / files_download sur un contenu en mémoire ; `fail` lève à la lecture.
+    """
+
+    def __init__(self, content, rev="0123456789a", fail=False):
+        self.content = content
+        self.rev = rev
+        self.fail = fail
+        self.downloads = 0
+
+    def files_get_metadata(self, path):
+        return types.SimpleNamespace(rev=self.rev, size=len(self.content))
+
+    def files_download(self, path):
+        if self.fail:
+            raise ConnectionError("réseau indisponible")
+        self.downloads += 1
+        raw = io.BytesIO(self.content)
+        res = types.SimpleNamespace(content=self.content, raw=raw, close=raw.close)
+        return self.files_get_metadata(path), res
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    holder = {}
+    monkeypatch.setattr(sig_export, "get_dropbox_client", lambda secrets: holder["dbx"])
+    return holder
+
+
+def test_process_folder_excel(stub, tmp_path):
+    content = as_xlsx(ledger_frame())
+    stub["dbx"] = StubDropbox(content)
+    entry = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path))
+    assert entry["status"] == "done", entry
+    assert entry["lines"] == 400
+    assert entry["bytes"] == len(content)
+    client_dir = tmp_path / "clients" / "Clients_A"
+    assert {"postes.parquet", "comptes.parquet", "sig.xlsx"} <= set(os.listdir(client_dir))
+
+
+def test_process_folder_text_fec(stub, tmp_path, monkeypatch):
+    content = as_text(ledger_frame())
+    stub["dbx"] = StubDropbox(content)
+    monkeypatch.setattr(sig_export, "ledger_path", lambda folder: f"{folder}/fec.txt")
+    entry = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path))
+    assert entry["status"] == "done", entry
+    assert entry["bytes"] == len(content)
+    # Lignes agrégées (annee, mois, compte) : au plus 24 mois × 5 comptes
+    assert 0 < entry["lines"] <= 120
+
+
+def test_unchanged_rev_is_skipped(stub, tmp_path):
+    stub["dbx"] = StubDropbox(as_xlsx(ledger_frame()))
+    first = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path))
+    second = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path), previous=first)
+    assert second["skipped"] is True
+    assert stub["dbx"].downloads == 1
+
+    # Nouvelle révision ou --force : recalcul
+    stub["dbx"].rev = "0123456789b"
+    third = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path), previous=first)
+    assert "skipped" not in third and third["rev"] == "0123456789b"
+    sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path), previous=third, force=True)
+    assert stub["dbx"].downloads == 3
+
+
+def test_failed_folder_is_retried(stub, tmp_path):
+    stub["dbx"] = StubDropbox(as_xlsx(ledger_frame()), fail=True)
+    failed = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path))
+    assert failed["status"] == "failed"
+    assert "ConnectionError" in failed["error"]
+
+    stub["dbx"].fail = False
+    entry = sig_export.process_folder("/Clients/A", DROPBOX_SECRETS, str(tmp_path), previous=failed)
+    assert entry["status"] == "done" and "skipped" not in entry
+
+
+def test_consolidate(stub, tmp_path):
+    manifest = {}
+    for i, folder in enumerate(["/Clients/A", "/Clients/B"]):
+        stub["dbx"] = StubDropbox(as_xlsx(ledger_frame(seed=i)))
+        manifest[folder] = sig_export.process_folder(folder, DROPBOX_SECRETS, str(tmp_path))
+    manifest["/Clients/C"] = {"status": "failed", "error": "x"}
+
+    postes = sig_export.consolidate(str(tmp_path), manifest)
+    assert set(postes["dossier"]) == {"/Clients/A", "/Clients/B"}
+    assert (tmp_path / "consolide_postes.parquet").exists()
+    synthese = pd.read_excel(tmp_path / "consolide.xlsx", sheet_name="Synthèse")
+    assert list(synthese["dossier"]) == ["/Clients/A", "/Clients/B"]
+    assert sig_export.consolidate(str(tmp_path), {"/Clients/C": manifest["/Clients/C"]}) is None
+
+
+def test_main_records_crashed_worker(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def process_folder(folder, *args):
+        if folder == "/Clients/B":
+            raise MemoryError("processus arrêté")
+        return {"status": "failed", "error": "x", "finished_at": "", "seconds": 0.0}
+
+    secrets = tmp_path / "secrets.toml"
+    secrets.write_text("".join(f'{k} = "x"\n' for k in sig_export.DROPBOX_KEYS), encoding="utf-8")
+    monkeypatch.setattr(sig_export, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(sig_export, "process_folder", process_folder)
+    out = tmp_path / "out"
+    code = sig_export.main(["--output", str(out), "--secrets", str(secrets), "--folders", "/Clients/A", "/Clients/B"])
+    assert code == 1
+    manifest = sig_export.load_manifest(str(out))
+    assert manifest["/Clients/B"]["status"] == "failed"
+    assert "MemoryError" in manifest["/Clients/B"]["error"]
+    assert set(manifest) == {"/Clients/A", "/Clients/B"}
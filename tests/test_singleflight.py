@@ -0,0 +1,87 @@
+"""
+Single-flight : appels concurrents de même clé regroupés en un seul.
+"""
+
+import threading
+import time
+
+from core.singleflight import SingleFlight
+
+N = 8
+
+
+def run_concurrently(flight, key, fn):
+    """
+    Lance N appels `flight.do(key, fn)` ; renvoie [(résultat, exception)] par appel.
+    """
+    outcomes = [None] * N
+    started = threading.Barrier(N + 1)
+
+    def call(i):
+        started.wait()
+        try:
+            outcomes[i] = (flight.do(key, fn), None)
+        except Exception as e:
+            outcomes[i] = (None, e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(N)]
+    for t in threads:
+        t.start()
+    started.wait()
+    return threads, outcomes
+
+
+def wait_for_waiters(flight, release):
+    # Tous les suiveurs attendent le meneur avant de le libérer
+    for _ in range(1000):
+        if flight.stats()["waiting"] == N - 1:
+            break
+        time.sleep(0.005)
+    stats = flight.stats()
+    assert (stats["in_flight"], stats["waiting"]) == (1, N - 1)
+    release.set()
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def load():
+        runs.append(1)
+        release.wait()
+        return object()
+
+    threads, outcomes = run_concurrently(flight, ("/A/gl.xlsx", "0123456789a"), load)
+    wait_for_waiters(flight, release)
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1
+    results = {id(result) for result, error in outcomes}
+    assert len(results) == 1 and all(error is None for _, error in outcomes)
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"], stats["waiting"]) == (1, N - 1, 0, 0)
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def load():
+        runs.append(1)
+        release.wait()
+        raise ConnectionError("réseau indisponible")
+
+    key = ("/A/gl.xlsx", "0123456789a")
+    threads, outcomes = run_concurrently(flight, key, load)
+    wait_for_waiters(flight, release)
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1
+    assert all(isinstance(error, ConnectionError) for _, error in outcomes)
+    # L'échec n'est pas mémorisé : l'appel suivant réexécute la fonction
+    assert flight.do(key, lambda: "ok") == "ok"
+    assert flight.stats()["executed"] == 2
@@ -0,0 +1,131 @@
+"""
+Client Dropbox face à un serveur HTTP local qui joue l'API et l'OAuth :
+rejeu des 503, renouvellement du jeton et nombre total de tentatives.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dropbox
+import pytest
+import requests
+
+from core.storage import SDK_RETRIES, TOKEN_ATTEMPTS, StorageClient, TokenManager, make_http_session
+
+METADATA = {
+    ".tag": "file",
+    "name": "fec.xlsx",
+    "id": "id:abc",
+    "client_modified": "2024-01-01T00:00:00Z",
+    "server_modified": "2024-01-01T00:00:00Z",
+    "rev": "0123456789abc",
+    "size": 3,
+    "path_lower": "/c/fec.xlsx",
+    "path_display": "/c/fec.xlsx",
+}
+
+
+class StandIn(ThreadingHTTPServer):
+    """
+    Réponses scriptées par chemin : file de (statut, corps) ; la dernière se répète.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.scripts = {}
+        self.requests = []
+        self.tokens_issued = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, path):
+        return sum(1 for p, _ in self.requests if p == path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server.requests.append((self.path, self.headers.get("Authorization")))
+        script = server.scripts.get(self.path, [(404, {})])
+        status, payload = script.pop(0) if len(script) > 1 else script[0]
+        if self.path == "/oauth2/token" and status == 200:
+            assert b"grant_type=refresh_token" in body
+            server.tokens_issued += 1
+            payload = dict(payload, access_token=f"tok{server.tokens_issued}")
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = StandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # Appels API du SDK vers le serveur local (en http), sans attente entre les essais
+    monkeypatch.setattr(dropbox.Dropbox, "_get_route_url", lambda self, host, route: f"{server.url}/2/{route}")
+    monkeypatch.setattr("dropbox.dropbox_client.time.sleep", lambda seconds: None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server):
+    session = make_http_session()
+    tokens = TokenManager("refresh", "id", "secret", session, token_url=f"{server.url}/oauth2/token")
+    return StorageClient(tokens, session)
+
+
+def test_token_refresh_retries_503_then_renews(stand_in):
+    # expires_in court : le jeton est considéré expiré à chaque appel
+    stand_in.scripts["/oauth2/token"] = [(503, {}), (200, {"expires_in": 5})]
+    client = make_client(stand_in)
+    try:
+        assert client.tokens.get_token() == "tok1"
+        assert client.tokens.get_token() == "tok2"
+    finally:
+        client.tokens.close()
+    assert stand_in.count("/oauth2/token") == 3
+
+
+def test_api_503_is_retried_once_per_attempt(stand_in):
+    stand_in.scripts["/oauth2/token"] = [(200, {"expires_in": 14400})]
+    stand_in.scripts["/2/files/get_metadata"] = [(503, {}), (200, METADATA)]
+    client = make_client(stand_in)
+    try:
+        assert client.dbx.files_get_metadata("/c/fec.xlsx").rev == METADATA["rev"]
+    finally:
+        client.tokens.close()
+    # Un 503 puis un succès : deux requêtes, pas de rejeu caché dans la session HTTP
+    assert stand_in.count("/2/files/get_metadata") == 2
+    assert all(auth == "Bearer tok1" for path, auth in stand_in.requests if path.startswith("/2/"))
+
+
+def test_persistent_503_is_bounded(stand_in):
+    stand_in.scripts["/oauth2/token"] = [(200, {"expires_in": 14400})]
+    stand_in.scripts["/2/files/get_metadata"] = [(503, {})]
+    client = make_client(stand_in)
+    try:
+        with pytest.raises(dropbox.exceptions.InternalServerError):
+            client.dbx.files_get_metadata("/c/fec.xlsx")
+    finally:
+        client.tokens.close()
+    assert stand_in.count("/2/files/get_metadata") == 1 + SDK_RETRIES
+
+
+def test_token_endpoint_failure_is_bounded(stand_in):
+    stand_in.scripts["/oauth2/token"] = [(503, {})]
+    client = make_client(stand_in)
+    with pytest.raises(requests.HTTPError):
+        client.tokens.get_token()
+    assert stand_in.count("/oauth2/token") == TOKEN_ATTEMPTS